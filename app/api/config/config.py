@@ -18,12 +18,94 @@ class Settings(BaseSettings):
 
     SQLALCHEMY_DATABASE_URI: Optional[PostgresDsn] = None
 
+    # Database connection pool
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # -1 disables recycling
+    DB_POOL_PRE_PING: bool = False  # recycling replaces the ping on checkout
+    DB_CONNECT_RETRIES: int = 10
+    DB_CONNECT_BACKOFF_SECONDS: float = 0.5
+    DB_CONNECT_BACKOFF_MAX_SECONDS: float = 10.0
+
+    # Warm-up of the base mlflow image in the background
+    BASE_IMAGE_WARMUP_ENABLED: bool = True
+
+    # Pools for blocking kubernetes, docker and mlflow work
+    EXECUTOR_THREAD_WORKERS: int = 16
+    EXECUTOR_SHUTDOWN_TIMEOUT_SECONDS: float = 20.0  # wait for running tasks
+    MAX_CONCURRENT_BUILDS: int = 2  # slots of the docker daemon
+    MAX_CONCURRENT_PUSHES: int = 4
+    MAX_CONCURRENT_DEPLOYS: int = 8
+    MAX_CONCURRENT_DEACTIVATIONS: int = 8
+
+    # Shared kubernetes API client
+    K8S_POOL_SIZE: int = 32  # covers the watches of the informer and of deploys
+    K8S_RETRIES: int = 3
+    K8S_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    K8S_READ_TIMEOUT_SECONDS: float = 30.0
+
+    # Teardown of the resources of deactivated models
+    K8S_TEARDOWN_CONCURRENCY: int = 16  # deletions in flight at once
+    K8S_DELETE_PROPAGATION: str = "Background"  # or "Foreground", "Orphan"
+    K8S_TEARDOWN_WAIT: bool = True  # wait until the pods are terminated
+    K8S_TEARDOWN_TIMEOUT_SECONDS: int = 120
+
+    # Local cache of the resources of the models namespace
+    K8S_INFORMER_ENABLED: bool = True
+    K8S_INFORMER_WATCH_SECONDS: int = 300  # watches are renewed after this
+    K8S_INFORMER_BACKOFF_SECONDS: float = 1.0
+    K8S_INFORMER_BACKOFF_MAX_SECONDS: float = 60.0
+
+    # Inference proxy of the gates
+    # Base URL of the service of a model, formatted with service, namespace, port
+    PROXY_BACKEND_URL: str = "http://{service}.{namespace}:{port}"
+    PROXY_MAX_CONNECTIONS: int = 200
+    PROXY_MAX_KEEPALIVE_CONNECTIONS: int = 100
+    PROXY_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    PROXY_CONNECT_TIMEOUT_SECONDS: float = 1.0
+    PROXY_TIMEOUT_SECONDS: float = 30.0
+    # Fraction of the requests of a gate copied to its staging models
+    SHADOW_FRACTION: float = 0.0
+    SHADOW_QUEUE_SIZE: int = 1000
+    SHADOW_WORKERS: int = 8
+    SHADOW_TIMEOUT_SECONDS: float = 30.0
+    # Recent responses differing from production kept per staging model
+    SHADOW_DIFF_HISTORY: int = 20
+
+    # Recent image pushes kept for progress reports
+    REGISTRY_PUSH_HISTORY: int = 100
+
+    # Server-sent progress events
+    EVENT_QUEUE_SIZE: int = 256  # events buffered for a slow subscriber
+    EVENT_KEEPALIVE_SECONDS: float = 15.0
+    EVENT_PROGRESS_INTERVAL_SECONDS: float = 0.5
+
+    # Resource budget of parallel image builds on one node, None uses the
+    # resources of the host
+    BUILD_CPU_BUDGET: Optional[float] = None
+    BUILD_MEMORY_BUDGET_MB: Optional[int] = None
+    BUILD_CPU_PER_BUILD: float = 1.0
+    BUILD_MEMORY_PER_BUILD_MB: int = 2048
+
+    # Background job queue
+    JOB_WORKER_ENABLED: bool = True
+    JOB_WORKER_CONCURRENCY: int = 4
+    JOB_POLL_SECONDS: float = 2.0
+    JOB_LEASE_SECONDS: int = 60
+    JOB_HEARTBEAT_SECONDS: int = 20
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: int = 30
+    JOB_RETRY_BACKOFF_MAX_SECONDS: int = 600
+    JOB_QUEUE_LIMIT: int = 1000
+    JOB_DURATION_SAMPLE_SIZE: int = 50  # recent jobs averaged for estimates
+
     @validator("SQLALCHEMY_DATABASE_URI", pre=True, allow_reuse=True)
     def assemble_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> Any:
         if isinstance(v, str):
             return v
         return PostgresDsn.build(
-            scheme="postgresql",
+            scheme="postgresql+asyncpg",
             user=values.get("POSTGRES_USER"),
             password=values.get("POSTGRES_PASSWORD"),
             host=values.get("POSTGRES_HOST"),
@@ -0,0 +1,103 @@
+"""
+This module brings the database schema up to date with the alembic migrations.
+
+The migrate_db() function from this module should be called
+with each start of the program. If the stored revision already is the newest
+one, it only reads the version table.
+"""
+
+import logging
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import Connection, inspect, text
+
+import models
+from .session import engine
+
+
+_logger = logging.getLogger(__name__)
+
+ALEMBIC_CONFIG = os.path.join(os.path.dirname(__file__), os.pardir, "alembic.ini")
+# Arbitrary key of the advisory lock which serializes migrating replicas
+MIGRATION_LOCK_ID = 7_305_118_404
+
+# Revisions matching schemas created by create_all before the migrations
+LEGACY_REVISION = "0001"
+LEGACY_JOB_REVISION = "0002"
+
+
+def get_revision(conn: Connection) -> str | None:
+    """Returns the revision stored in the database
+
+    :param conn: Database connection
+    :return: the current revision or None if the database is not versioned
+    """
+    context = MigrationContext.configure(
+        conn, opts={"version_table_schema": models.Base.metadata.schema}
+    )
+    return context.get_current_revision()
+
+
+def upgrade(conn: Connection, config: Config) -> None:
+    """Upgrades the database to the head revision
+
+    Databases created by create_all are stamped with the matching revision
+    first, so their tables are not created again.
+
+    :param conn: Database connection
+    :param config: alembic config
+    """
+    postgres = conn.dialect.name == "postgresql"
+    if postgres:
+        conn.execute(text(f"SELECT pg_advisory_lock({MIGRATION_LOCK_ID})"))
+        conn.commit()
+    config.attributes["connection"] = conn
+    try:
+        if get_revision(conn) is None:
+            schema = models.Base.metadata.schema
+            inspector = inspect(conn)
+            if inspector.has_table("model", schema=schema):
+                revision = (
+                    LEGACY_JOB_REVISION
+                    if inspector.has_table("job", schema=schema)
+                    else LEGACY_REVISION
+                )
+                _logger.info(f"Stamping unversioned database with {revision}")
+                command.stamp(config, revision)
+        # Alembic owns the transactions of the migrations, e.g. to leave them
+        # for concurrent index builds
+        conn.commit()
+        command.upgrade(config, "head")
+        conn.commit()
+    finally:
+        if postgres:
+            conn.execute(text(f"SELECT pg_advisory_unlock({MIGRATION_LOCK_ID})"))
+            conn.commit()
+
+
+async def migrate_db() -> dict:
+    """Applies the pending migrations to the database
+
+    :return: A dict with the status and the current revision
+    """
+    config = Config(ALEMBIC_CONFIG)
+    head = ScriptDirectory.from_config(config).get_current_head()
+    try:
+        async with engine.connect() as conn:
+            revision = await conn.run_sync(get_revision)
+            if revision == head:
+                _logger.info(f"Database is up to date at revision {head}")
+                return {"status": "ok", "revision": head}
+
+            _logger.info(f"Migrating database from revision {revision} to {head}...")
+            await conn.rollback()
+            await conn.run_sync(upgrade, config)
+    except Exception as e:
+        _logger.error(f"Migrating database failed with error {e}")
+        raise e
+    _logger.info("Migrating database finished")
+    return {"status": "ok", "revision": head}
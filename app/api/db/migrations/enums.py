@@ -0,0 +1,56 @@
+"""
+Helpers for enum columns in migrations.
+
+On PostgreSQL the enums are native types shared by several tables, so they
+are created once, explicitly, instead of with each table.
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+def enum(name: str, *values: str) -> sa.Enum:
+    """
+    Returns an enum column type which does not create its native type
+
+    :param name: name of the native type
+    :param values: the enum values
+
+    :return: the enum type
+    """
+    return sa.Enum(*values, name=name).with_variant(
+        postgresql.ENUM(*values, name=name, create_type=False), "postgresql"
+    )
+
+
+def create_enums(*enums: sa.Enum) -> None:
+    """
+    Creates the native types of the given enums if they do not exist yet
+
+    :param enums: enum types returned by enum()
+    """
+    if op.get_context().dialect.name != "postgresql":
+        return
+    for e in enums:
+        native = postgresql.ENUM(*e.enums, name=e.name)
+        if context.is_offline_mode():
+            op.execute(postgresql.CreateEnumType(native))
+        else:
+            native.create(op.get_bind(), checkfirst=True)
+
+
+def drop_enums(*enums: sa.Enum) -> None:
+    """
+    Drops the native types of the given enums
+
+    :param enums: enum types returned by enum()
+    """
+    if op.get_context().dialect.name != "postgresql":
+        return
+    for e in enums:
+        native = postgresql.ENUM(*e.enums, name=e.name)
+        if context.is_offline_mode():
+            op.execute(postgresql.DropEnumType(native))
+        else:
+            native.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,89 @@
+"""
+Alembic environment of the backend database.
+
+The application runs the migrations on its own connection, which is passed in
+``config.attributes["connection"]``. The alembic command line opens a
+connection from the settings instead.
+"""
+
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import Connection, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+import models
+from config.config import settings
+
+
+config = context.config
+if config.config_file_name is not None and "connection" not in config.attributes:
+    fileConfig(config.config_file_name)
+
+target_metadata = models.Base.metadata
+schema = target_metadata.schema
+
+
+def include_name(name: str | None, type_: str, parent_names: dict) -> bool:
+    if type_ == "schema":
+        return name == schema
+    return True
+
+
+def configure(**kwargs) -> None:
+    context.configure(
+        target_metadata=target_metadata,
+        version_table_schema=schema,
+        include_schemas=True,
+        include_name=include_name,
+        **kwargs,
+    )
+
+
+def create_schema() -> None:
+    # The version table lives in the schema, so it is created before it
+    if context.get_context().dialect.name == "postgresql":
+        context.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+
+
+def run_migrations_offline() -> None:
+    configure(
+        url=str(settings.SQLALCHEMY_DATABASE_URI),
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        create_schema()
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    configure(connection=connection, transaction_per_migration=True)
+    with context.begin_transaction():
+        create_schema()
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    engine = create_async_engine(
+        str(settings.SQLALCHEMY_DATABASE_URI), poolclass=NullPool
+    )
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is None:
+        asyncio.run(run_async_migrations())
+    else:
+        do_run_migrations(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
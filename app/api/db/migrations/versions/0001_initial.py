@@ -0,0 +1,191 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2023-05-22 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from db.migrations.enums import enum, create_enums, drop_enums
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+SCHEMA = "core"
+
+
+user_role = enum("userrole", "OWNER", "ADMIN", "READER", "WRITER")
+model_status = enum(
+    "modelstatus",
+    "INACTIVE",
+    "BUILT",
+    "BUILDING",
+    "BUILD_FAILED",
+    "PUSHED",
+    "PUSHING",
+    "PUSH_FAILED",
+    "DEPLOYED",
+    "DEPLOYING",
+    "DEPLOY_FAILED",
+    "DEACTIVATING",
+    "DEACTIVATION_FAILED",
+)
+pool_model_mode = enum("poolmodelmode", "PRODUCTION", "STAGING")
+
+
+def audit_columns(nullable_users: bool = True) -> list[sa.Column]:
+    return [
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "created_by",
+            sa.Integer(),
+            sa.ForeignKey("core.user.id"),
+            nullable=nullable_users,
+        ),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "updated_by",
+            sa.Integer(),
+            sa.ForeignKey("core.user.id"),
+            nullable=nullable_users,
+        ),
+    ]
+
+
+def role_table(name: str, parent: str, *args) -> None:
+    op.create_table(
+        name,
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column(f"{parent}_id", sa.Integer(), sa.ForeignKey(f"core.{parent}.id")),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("core.user.id")),
+        sa.Column("role", user_role, nullable=False),
+        *args,
+        schema=SCHEMA,
+    )
+
+
+def upgrade() -> None:
+    create_enums(user_role, model_status, pool_model_mode)
+
+    op.create_table(
+        "user",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("surname", sa.String(255), nullable=False),
+        sa.Column("email", sa.String(255), nullable=False),
+        schema=SCHEMA,
+    )
+    op.create_table(
+        "model",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.String(255), nullable=False),
+        *audit_columns(),
+        sa.Column("status", model_status, nullable=False),
+        schema=SCHEMA,
+    )
+    op.create_table(
+        "test",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.String(255), nullable=False),
+        *audit_columns(),
+        schema=SCHEMA,
+    )
+    op.create_table(
+        "mlflow_server",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("tracking_uri", sa.String(), nullable=False),
+        *audit_columns(),
+        schema=SCHEMA,
+    )
+    op.create_table(
+        "pool",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.String(255), nullable=False),
+        *audit_columns(nullable_users=False),
+        schema=SCHEMA,
+    )
+    op.create_table(
+        "gate",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(255), nullable=False, unique=True),
+        sa.Column("description", sa.String(255), nullable=False),
+        *audit_columns(nullable_users=False),
+        schema=SCHEMA,
+    )
+    op.create_table(
+        "model_test",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("model_id", sa.Integer(), sa.ForeignKey("core.model.id")),
+        sa.Column("test_id", sa.Integer(), sa.ForeignKey("core.test.id")),
+        schema=SCHEMA,
+    )
+    op.create_table(
+        "model_details",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("model_id", sa.Integer(), sa.ForeignKey("core.model.id")),
+        sa.Column(
+            "mlflow_server_id", sa.Integer(), sa.ForeignKey("core.mlflow_server.id")
+        ),
+        sa.Column("artifact_uri", sa.String(255)),
+        sa.Column("image_tag", sa.String(255)),
+        sa.Column("min_replicas", sa.Integer()),
+        sa.Column("max_replicas", sa.Integer()),
+        sa.Column("cpu_request", sa.String(255)),
+        sa.Column("cpu_limit", sa.String(255)),
+        sa.Column("cpu_utilization", sa.Integer()),
+        sa.Column("memory_request", sa.String(255)),
+        sa.Column("memory_limit", sa.String(255)),
+        sa.Column("memory_utilization", sa.Integer()),
+        schema=SCHEMA,
+    )
+    op.create_table(
+        "pool_model",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("pool_id", sa.Integer(), sa.ForeignKey("core.pool.id")),
+        sa.Column("model_id", sa.Integer(), sa.ForeignKey("core.model.id")),
+        sa.Column("mode", pool_model_mode, nullable=False),
+        sa.Column("weight", sa.Integer(), nullable=False),
+        schema=SCHEMA,
+    )
+    op.create_table(
+        "gate_pool",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("gate_id", sa.Integer(), sa.ForeignKey("core.gate.id")),
+        sa.Column("pool_id", sa.Integer(), sa.ForeignKey("core.pool.id")),
+        sa.UniqueConstraint("gate_id", "pool_id"),
+        schema=SCHEMA,
+    )
+    role_table("model_user_role", "model")
+    role_table("pool_user_role", "pool")
+    role_table("test_user_role", "test")
+    role_table("gate_user_role", "gate", sa.UniqueConstraint("gate_id", "user_id"))
+
+
+def downgrade() -> None:
+    for table in (
+        "gate_user_role",
+        "test_user_role",
+        "pool_user_role",
+        "model_user_role",
+        "gate_pool",
+        "pool_model",
+        "model_details",
+        "model_test",
+        "gate",
+        "pool",
+        "mlflow_server",
+        "test",
+        "model",
+        "user",
+    ):
+        op.drop_table(table, schema=SCHEMA)
+    drop_enums(pool_model_mode, model_status, user_role)
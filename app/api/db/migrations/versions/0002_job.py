@@ -0,0 +1,56 @@
+"""job queue
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2023-05-29 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from db.migrations.enums import enum, create_enums, drop_enums
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+SCHEMA = "core"
+
+job_kind = enum("jobkind", "BUILD", "DEPLOY", "DEACTIVATE")
+job_status = enum("jobstatus", "QUEUED", "RUNNING", "SUCCEEDED", "FAILED")
+
+
+def upgrade() -> None:
+    create_enums(job_kind, job_status)
+    op.create_table(
+        "job",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("kind", job_kind, nullable=False),
+        sa.Column("status", job_status, nullable=False),
+        sa.Column(
+            "model_id",
+            sa.Integer(),
+            sa.ForeignKey("core.model.id", ondelete="SET NULL"),
+        ),
+        sa.Column("payload", sa.JSON()),
+        sa.Column("result", sa.JSON()),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_after", sa.DateTime(), nullable=False),
+        sa.Column("lease_owner", sa.String(255)),
+        sa.Column("lease_expires_at", sa.DateTime()),
+        sa.Column("last_error", sa.Text()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("created_by", sa.Integer(), sa.ForeignKey("core.user.id")),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime()),
+        sa.Column("finished_at", sa.DateTime()),
+        schema=SCHEMA,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job", schema=SCHEMA)
+    drop_enums(job_status, job_kind)
@@ -0,0 +1,145 @@
+"""indexes of lookup columns
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2023-06-05 12:00:00.000000
+
+The indexes are built concurrently on PostgreSQL, so the tables stay writable
+while the migration runs. Indexes created by earlier versions of create_db
+already exist and are skipped, the unique index of pool_model created by them
+under its former name is renamed. An invalid index left behind by an
+interrupted concurrent build is dropped and built again.
+
+Databases created by create_db may hold duplicated rows, over which a unique
+index cannot be built. The migration then fails before building any index,
+naming the tables and columns whose duplicates have to be removed, so the
+schema never differs from the models at this revision.
+"""
+
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+SCHEMA = "core"
+
+_logger = logging.getLogger(__name__)
+
+INDEXES = [
+    ("ix_core_user_email", "user", ["email"], False),
+    ("ix_core_model_name", "model", ["name"], True),
+    ("ix_core_model_status", "model", ["status"], False),
+    ("ix_core_pool_name", "pool", ["name"], False),
+    ("ix_core_test_name", "test", ["name"], False),
+    ("ix_core_mlflow_server_name", "mlflow_server", ["name"], False),
+    ("ix_core_model_details_model_id", "model_details", ["model_id"], True),
+    ("ix_core_model_details_image_tag", "model_details", ["image_tag"], False),
+    ("ix_core_pool_model_model_id", "pool_model", ["model_id"], False),
+    (
+        "ix_core_pool_model_pool_id_model_id",
+        "pool_model",
+        ["pool_id", "model_id"],
+        True,
+    ),
+]
+
+# Names of indexes created by earlier versions of create_db
+RENAMED_INDEXES = {
+    "ix_pool_model_pool_id_model_id": "ix_core_pool_model_pool_id_model_id",
+}
+
+
+def is_invalid(name: str) -> bool:
+    """
+    Checks whether an index exists but is invalid, e.g. after a failed
+    concurrent build
+
+    :param name: name of the index
+    :return: True if the index is invalid
+    """
+    return bool(
+        op.get_bind().scalar(
+            sa.text(
+                "SELECT NOT i.indisvalid FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE n.nspname = :schema AND c.relname = :name"
+            ),
+            {"schema": SCHEMA, "name": name},
+        )
+    )
+
+
+def has_duplicates(table: str, columns: list[str]) -> bool:
+    """
+    Checks whether rows of a table share the values of the given columns
+
+    :param table: name of the table
+    :param columns: names of the columns
+    :return: True if a unique index over the columns cannot be built
+    """
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    return (
+        op.get_bind().scalar(
+            sa.text(
+                f'SELECT 1 FROM {SCHEMA}."{table}" GROUP BY {column_list} '
+                "HAVING count(*) > 1 LIMIT 1"
+            )
+        )
+        is not None
+    )
+
+
+def upgrade() -> None:
+    duplicates = [
+        f"{SCHEMA}.{table} ({', '.join(columns)})"
+        for _, table, columns, unique in INDEXES
+        if unique and has_duplicates(table, columns)
+    ]
+    if duplicates:
+        raise RuntimeError(
+            "Unique indexes cannot be built over duplicate rows of "
+            f"{'; '.join(duplicates)}. Find them with SELECT <columns>, count(*) "
+            "FROM <table> GROUP BY <columns> HAVING count(*) > 1, remove or "
+            "merge them and run the migration again"
+        )
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for old_name, name in RENAMED_INDEXES.items():
+            if postgresql:
+                op.execute(
+                    f"ALTER INDEX IF EXISTS {SCHEMA}.{old_name} RENAME TO {name}"
+                )
+            else:
+                op.drop_index(old_name, schema=SCHEMA, if_exists=True)
+        for name, table, columns, unique in INDEXES:
+            if postgresql and is_invalid(name):
+                _logger.warning(f"Dropping invalid index {name} to build it again")
+                op.drop_index(name, table, schema=SCHEMA, postgresql_concurrently=True)
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=unique,
+                schema=SCHEMA,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table,
+                schema=SCHEMA,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
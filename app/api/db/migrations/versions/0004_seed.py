@@ -0,0 +1,90 @@
+"""system user and mlflow server
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2023-06-05 12:30:00.000000
+
+Databases created by create_db already contain the seed rows, possibly more
+than once, so rows are only inserted if none exists.
+
+The migration is irreversible: the rows of all other tables reference the
+SYSTEM user and mlflow server, and databases created by create_db had them
+before this revision existed.
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+SCHEMA = "core"
+SYSTEM_EMAIL = "system@system.com"
+
+user = sa.table(
+    "user",
+    sa.column("id", sa.Integer),
+    sa.column("name", sa.String),
+    sa.column("surname", sa.String),
+    sa.column("email", sa.String),
+    schema=SCHEMA,
+)
+mlflow_server = sa.table(
+    "mlflow_server",
+    sa.column("name", sa.String),
+    sa.column("tracking_uri", sa.String),
+    sa.column("created_at", sa.DateTime),
+    sa.column("created_by", sa.Integer),
+    sa.column("updated_at", sa.DateTime),
+    sa.column("updated_by", sa.Integer),
+    schema=SCHEMA,
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        user.insert().from_select(
+            ["name", "surname", "email"],
+            sa.select(
+                sa.literal("SYSTEM"), sa.literal("SYSTEM"), sa.literal(SYSTEM_EMAIL)
+            ).where(~sa.exists().where(user.c.email == SYSTEM_EMAIL)),
+        )
+    )
+    now = datetime.utcnow()
+    system_user_id = (
+        sa.select(sa.func.min(user.c.id))
+        .where(user.c.email == SYSTEM_EMAIL)
+        .scalar_subquery()
+    )
+    op.execute(
+        mlflow_server.insert().from_select(
+            [
+                "name",
+                "tracking_uri",
+                "created_at",
+                "created_by",
+                "updated_at",
+                "updated_by",
+            ],
+            sa.select(
+                sa.literal("SYSTEM"),
+                sa.literal("http://tyro-mlflow:80"),
+                sa.literal(now, sa.DateTime),
+                system_user_id,
+                sa.literal(now, sa.DateTime),
+                system_user_id,
+            ).where(~sa.exists().where(mlflow_server.c.name == "SYSTEM")),
+        )
+    )
+
+
+def downgrade() -> None:
+    raise NotImplementedError(
+        "Revision 0004 cannot be downgraded, the seed rows are referenced by "
+        "the other tables"
+    )
@@ -0,0 +1,43 @@
+"""build cache
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2023-06-12 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+SCHEMA = "core"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "build_cache",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("fingerprint", sa.String(64), nullable=False),
+        sa.Column("image_tag", sa.String(255), nullable=False),
+        sa.Column("image_digest", sa.String(255), nullable=False),
+        sa.Column("hits", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(), nullable=False),
+        schema=SCHEMA,
+    )
+    op.create_index(
+        "ix_core_build_cache_fingerprint",
+        "build_cache",
+        ["fingerprint"],
+        unique=True,
+        schema=SCHEMA,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_core_build_cache_fingerprint", "build_cache", schema=SCHEMA)
+    op.drop_table("build_cache", schema=SCHEMA)
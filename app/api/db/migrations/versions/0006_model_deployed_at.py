@@ -0,0 +1,33 @@
+"""deployment time of models
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2023-06-19 12:00:00.000000
+
+Models which are deployed now are taken as deployed since their last update.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+SCHEMA = "core"
+
+
+def upgrade() -> None:
+    op.add_column("model", sa.Column("deployed_at", sa.DateTime()), schema=SCHEMA)
+    op.execute(
+        sa.text(
+            f"UPDATE {SCHEMA}.model SET deployed_at = updated_at "
+            "WHERE status = 'DEPLOYED'"
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("model", "deployed_at", schema=SCHEMA)
@@ -0,0 +1,29 @@
+"""digest of the images of models
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2023-06-20 12:00:00.000000
+
+Images pushed before are deployed by tag until the model is built again.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+SCHEMA = "core"
+
+
+def upgrade() -> None:
+    op.add_column(
+        "model_details", sa.Column("image_digest", sa.String(255)), schema=SCHEMA
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("model_details", "image_digest", schema=SCHEMA)
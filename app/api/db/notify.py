@@ -0,0 +1,186 @@
+"""
+This module fans database notifications out to the API replicas.
+
+Writers send a notification in the transaction of their change, so it is
+delivered to the listeners only if the change is committed. Every replica
+listens on a dedicated connection outside of the pool and passes the
+notifications on to its in-memory handlers, e.g. the event bus of the
+server-sent event streams.
+
+Notifications are a PostgreSQL feature, on other databases nothing is sent
+and the listener is not started. Notifications sent while the listener
+reconnects are lost, so state derived from them is refreshed by the connect
+handlers, which run after every (re)connect.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Callable
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.config import settings
+from .session import engine
+
+
+_logger = logging.getLogger(__name__)
+
+# Identifies notifications sent by this process, which handles its own
+# changes without waiting for the database
+ORIGIN = uuid.uuid4().hex
+
+MODEL_STATUS_CHANNEL = "model_status"
+ROUTING_CHANNEL = "gate_routing"
+
+
+async def notify(db: AsyncSession, channel: str, payload: dict) -> None:
+    """
+    Sends a notification when the transaction of the session is committed
+
+    :param db: Database session
+    :param channel: notification channel
+    :param payload: JSON serializable payload, the origin is added to it
+    """
+    await notify_many(db, channel, [payload])
+
+
+async def notify_many(db: AsyncSession, channel: str, payloads: list[dict]) -> None:
+    """
+    Sends several notifications with a single statement when the transaction
+    of the session is committed
+
+    :param db: Database session
+    :param channel: notification channel
+    :param payloads: JSON serializable payloads, the origin is added to them
+    """
+    if not payloads or db.bind.dialect.name != "postgresql":
+        return
+    await db.execute(
+        text(
+            "SELECT pg_notify(:channel, payload) "
+            "FROM unnest(CAST(:payloads AS text[])) AS payload"
+        ),
+        {
+            "channel": channel,
+            "payloads": [
+                json.dumps({"origin": ORIGIN, **payload}) for payload in payloads
+            ],
+        },
+    )
+
+
+class NotificationListener:
+    """
+    Listens to notification channels on a dedicated connection and reconnects
+    with exponential backoff when the connection is lost.
+
+    Example:
+    >>> notification_listener.add_handler(MODEL_STATUS_CHANNEL, print)
+    >>> notification_listener.add_connect_handler(routing_tables.invalidate)
+    >>> notification_listener.start()
+    >>> await notification_listener.stop()
+    """
+
+    def __init__(self) -> None:
+        self.handlers: dict[str, list[Callable[[dict], None]]] = {}
+        self.connect_handlers: list[Callable[[], None]] = []
+        self.connection: asyncpg.Connection | None = None
+        self.task: asyncio.Task | None = None
+
+    @property
+    def connected(self) -> bool:
+        return self.connection is not None and not self.connection.is_closed()
+
+    def add_handler(self, channel: str, handler: Callable[[dict], None]) -> None:
+        """
+        Registers a handler of the notifications of a channel. Handlers run on
+        the event loop and must not block.
+
+        :param channel: notification channel
+        :param handler: callable receiving the decoded payload
+        """
+        self.handlers.setdefault(channel, []).append(handler)
+
+    def add_connect_handler(self, handler: Callable[[], None]) -> None:
+        """
+        Registers a handler run whenever the listener has (re)connected, to
+        catch up on the notifications which may have been missed meanwhile.
+        Handlers run on the event loop and must not block.
+
+        :param handler: callable without arguments
+        """
+        self.connect_handlers.append(handler)
+
+    def start(self) -> None:
+        """
+        Starts listening in the background, if the database supports it.
+        """
+        if engine.dialect.name != "postgresql":
+            _logger.info("Database notifications are not supported, not listening")
+            return
+        if self.task is None:
+            self.task = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        """
+        Stops listening and closes the connection.
+        """
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def __run(self) -> None:
+        delay = settings.DB_CONNECT_BACKOFF_SECONDS
+        url = engine.url
+        while True:
+            lost = asyncio.Event()
+            try:
+                self.connection = await asyncpg.connect(
+                    host=url.host,
+                    port=url.port,
+                    user=url.username,
+                    password=url.password,
+                    database=url.database,
+                )
+                self.connection.add_termination_listener(lambda _: lost.set())
+                for channel in self.handlers:
+                    await self.connection.add_listener(channel, self.__dispatch)
+                _logger.info(f"Listening to notifications of {list(self.handlers)}")
+                delay = settings.DB_CONNECT_BACKOFF_SECONDS
+                for handler in self.connect_handlers:
+                    try:
+                        handler()
+                    except Exception as e:
+                        _logger.error(f"Connect handler failed with error: {e}")
+                await lost.wait()
+                _logger.warning("Notification connection lost, reconnecting...")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                _logger.error(f"Listening to notifications failed with error {e}")
+            finally:
+                if self.connection is not None and not self.connection.is_closed():
+                    await self.connection.close()
+                self.connection = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.DB_CONNECT_BACKOFF_MAX_SECONDS)
+
+    def __dispatch(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            _logger.warning(f"Invalid notification payload on {channel}: {payload}")
+            return
+        for handler in self.handlers.get(channel, []):
+            try:
+                handler(data)
+            except Exception as e:
+                _logger.error(f"Handling notification on {channel} failed: {e}")
+
+
+notification_listener = NotificationListener()
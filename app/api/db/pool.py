@@ -0,0 +1,105 @@
+"""
+This module provides the connection pool of the database engine.
+
+The pool records how long sessions wait for a connection, so pool exhaustion
+under burst traffic is visible through the admin API.
+"""
+
+import time
+from collections import deque
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolStats:
+    """
+    Counters of a connection pool. Wait times are kept for the most recent
+    checkouts only.
+    """
+
+    WINDOW = 1000
+
+    def __init__(self) -> None:
+        self.checkouts: int = 0
+        self.timeouts: int = 0
+        self.connections_created: int = 0
+        self.wait_max: float = 0.0
+        self.waits: deque[float] = deque(maxlen=self.WINDOW)
+
+    def record_checkout(self, wait: float) -> None:
+        """
+        Records a successful checkout
+
+        :param wait: seconds spent waiting for the connection
+        """
+        self.checkouts += 1
+        self.wait_max = max(self.wait_max, wait)
+        self.waits.append(wait)
+
+    def summary(self) -> dict:
+        """
+        Returns the counters together with wait time statistics of the recent
+        checkouts in milliseconds
+
+        :return: dict with the counters and wait times
+        """
+        waits = sorted(self.waits)
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "connections_created": self.connections_created,
+            "wait_avg_ms": sum(waits) / len(waits) * 1000 if waits else 0.0,
+            "wait_p95_ms": waits[int(len(waits) * 0.95)] * 1000 if waits else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+        }
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool of the async engine which records checkout wait times.
+
+    Example:
+    >>> engine = create_async_engine(uri, poolclass=InstrumentedPool)
+    >>> engine.pool.stats.summary()
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def recreate(self) -> "InstrumentedPool":
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _create_connection(self):
+        self.stats.connections_created += 1
+        return super()._create_connection()
+
+    def status_dict(self) -> dict:
+        """
+        Returns the current state of the pool
+
+        :return: dict with pool size, idle, checked out and overflow connections
+        """
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout": self._timeout,
+            "recycle": self._recycle,
+            "pre_ping": self._pre_ping,
+            "idle": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+        }
@@ -0,0 +1,51 @@
+"""
+This module provides a helper which counts the SQL statements sent to the
+database, so accidental per-row queries (N+1) of relationship traversals
+are caught early.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class QueryCounter:
+    """
+    Counts the statements executed by an engine inside a ``with`` block.
+    If ``max_queries`` is given, leaving the block with more statements
+    raises an AssertionError listing them.
+
+    Example:
+    >>> with QueryCounter(engine, max_queries=1) as counter:
+    >>>     await PoolModelService.get_pool_models(db, pool_id)
+    >>> counter.count
+    1
+    """
+
+    def __init__(
+        self, engine: Engine | AsyncEngine, max_queries: int | None = None
+    ) -> None:
+        self.engine: Engine = (
+            engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+        )
+        self.max_queries: int | None = max_queries
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self.__record)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        event.remove(self.engine, "before_cursor_execute", self.__record)
+        if exc_type is None and self.max_queries is not None:
+            assert self.count <= self.max_queries, (
+                f"Expected at most {self.max_queries} queries, got {self.count}:\n"
+                + "\n".join(self.statements)
+            )
+
+    def __record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
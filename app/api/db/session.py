@@ -1,12 +1,66 @@
 """
-This module defines SessionLocal which may be imported for creating a
-database session
+This module defines SessionLocal which may be imported for creating an
+asynchronous database session
 """
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import asyncio
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from config.config import settings
+from .pool import InstrumentedPool
+
+
+_logger = logging.getLogger(__name__)
+
+engine = create_async_engine(
+    settings.SQLALCHEMY_DATABASE_URI,
+    poolclass=InstrumentedPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+async def ping_db() -> bool:
+    """
+    Checks whether the database accepts queries
+
+    :return: True if the database answered, False otherwise
+    """
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        _logger.warning(f"Database ping failed with error {e}")
+        return False
+
+
+async def wait_for_db() -> None:
+    """
+    Waits until the database accepts queries, retrying with exponential backoff
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    :raises ConnectionError: if the database is not reachable after
+    DB_CONNECT_RETRIES attempts
+    """
+    delay = settings.DB_CONNECT_BACKOFF_SECONDS
+    for attempt in range(1, settings.DB_CONNECT_RETRIES + 1):
+        if await ping_db():
+            return
+        if attempt == settings.DB_CONNECT_RETRIES:
+            break
+        _logger.info(
+            f"Database not reachable (attempt {attempt}/"
+            f"{settings.DB_CONNECT_RETRIES}), retrying in {delay:.1f}s..."
+        )
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, settings.DB_CONNECT_BACKOFF_MAX_SECONDS)
+    raise ConnectionError(
+        f"Database not reachable after {settings.DB_CONNECT_RETRIES} attempts"
+    )
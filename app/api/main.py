@@ -3,15 +3,25 @@ This is the main module.
 It contains the FastAPI app.
 """
 
-import time
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from starlette.middleware.sessions import SessionMiddleware
 import logging
 import secrets
 
-from db.create import create_db
-from utils.model_builder import ModelBuilder
+from db.migrate import migrate_db
+from db.notify import MODEL_STATUS_CHANNEL, ROUTING_CHANNEL, notification_listener
+from db.session import wait_for_db
+from config.config import settings
+from services import JobWorker, ModelService
+from utils import ModelBuilder, TaskExecutor, TaskKind
+from utils.events import EventBus
+from utils.inference_proxy import InferenceProxy
+from utils.k8s_client import K8sClient
+from utils.k8s_informer import informer
+from utils.routing import routing_tables
+from utils.shadow import shadow_mirror
+from utils.warmup import database_warmup, base_image_warmup
 
 
 from routers import (
@@ -22,18 +32,61 @@ from routers import (
     test,
     mlflow_server,
     login,
+    job,
+    admin,
+    health,
 )
 
 _logger = logging.getLogger(__name__)
 
 
+async def prepare_database(job_worker: JobWorker) -> None:
+    """
+    Waits for the database, brings the schema and initial data up to date,
+    starts listening to notifications of other replicas and starts the job
+    worker.
+    """
+    await wait_for_db()
+    await migrate_db()
+    notification_listener.start()
+    if settings.JOB_WORKER_ENABLED:
+        job_worker.start()
+
+
+async def build_base_image() -> None:
+    await TaskExecutor.run(TaskKind.BUILD, ModelBuilder.build_base_image)
+
+
 @asynccontextmanager
 async def init(app: FastAPI):
-    time.sleep(5)
-    # Create the database tables with initial data
-    create_db()
-    ModelBuilder.build_base_image()
+    # The warm-up runs in the background, readiness is reported by /health/ready
+    job_worker = JobWorker()
+    EventBus.start()
+    notification_listener.add_handler(
+        MODEL_STATUS_CHANNEL, ModelService.handle_status_notification
+    )
+    notification_listener.add_handler(
+        ROUTING_CHANNEL, routing_tables.handle_notification
+    )
+    # Routing changes of other replicas may be missed while reconnecting
+    notification_listener.add_connect_handler(routing_tables.invalidate)
+    database_warmup.start(lambda: prepare_database(job_worker))
+    if settings.BASE_IMAGE_WARMUP_ENABLED:
+        base_image_warmup.start(build_base_image)
+    if settings.K8S_INFORMER_ENABLED:
+        informer.start()
+    shadow_mirror.start()
     yield
+    await shadow_mirror.stop()
+    await base_image_warmup.stop()
+    await database_warmup.stop()
+    await job_worker.stop()
+    await notification_listener.stop()
+    await TaskExecutor.shutdown()
+    informer.stop()
+    K8sClient.reset()
+    await InferenceProxy.close()
+    EventBus.stop()
 
 
 app = FastAPI(
@@ -50,6 +103,9 @@ app.include_router(model.router)
 app.include_router(test.router)
 app.include_router(mlflow_server.router)
 app.include_router(login.router)
+app.include_router(job.router)
+app.include_router(admin.router)
+app.include_router(health.router)
 
 app.add_middleware(SessionMiddleware, secret_key=secrets.token_bytes(32))
 
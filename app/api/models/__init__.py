@@ -5,3 +5,6 @@ from models.model import Model, ModelTest  # noqa: F401
 from models.pool import Pool, PoolModel  # noqa: F401
 from models.test import Test  # noqa: F401
 from models.mlflow_server import MlflowServer  # noqa: F401
+from models.job import Job  # noqa: F401
+from models.gate import Gate, GatePool, GateUserRole  # noqa: F401
+from models.build_cache import BuildCache  # noqa: F401
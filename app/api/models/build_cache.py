@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime
+
+from models.base_class import Base
+
+
+class BuildCache(Base):
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    fingerprint = Column(String(64), nullable=False, unique=True, index=True)
+    image_tag = Column(String(255), nullable=False)
+    image_digest = Column(String(255), nullable=False)
+    hits = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    last_used_at = Column(DateTime, nullable=False)
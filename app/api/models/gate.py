@@ -28,7 +28,7 @@ class Gate(Base):
         "User", foreign_keys="Gate.updated_by", backref="updated_gates"
     )
 
-    pools = relationship("GatePool", back_populates="gate")
+    pools = relationship("GatePool", back_populates="gate", lazy="raise")
 
     users_roles = relationship("GateUserRole", back_populates="gate")
 
@@ -0,0 +1,40 @@
+import enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON
+from sqlalchemy.orm import relationship
+
+from models.base_class import Base
+
+
+class JobKind(str, enum.Enum):
+    BUILD = "build"
+    DEPLOY = "deploy"
+    DEACTIVATE = "deactivate"
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class Job(Base):
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(Enum(JobKind), nullable=False)
+    status = Column(Enum(JobStatus), nullable=False)
+    model_id = Column(Integer, ForeignKey("model.id", ondelete="SET NULL"))
+    payload = Column(JSON)
+    result = Column(JSON)
+    attempts = Column(Integer, nullable=False)
+    max_attempts = Column(Integer, nullable=False)
+    run_after = Column(DateTime, nullable=False)
+    lease_owner = Column(String(255))
+    lease_expires_at = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime, nullable=False)
+    created_by = Column(Integer, ForeignKey("user.id"))
+    updated_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    creator = relationship("User", foreign_keys="Job.created_by", backref="jobs")
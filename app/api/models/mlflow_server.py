@@ -6,7 +6,7 @@ from models.base_class import Base
 
 class MlflowServer(Base):
     id = Column(Integer, primary_key=True)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
     tracking_uri = Column(String, nullable=False)
     created_at = Column(DateTime, nullable=False)
     created_by = Column(Integer, ForeignKey("user.id"))
@@ -23,16 +23,75 @@ class ModelStatus(str, enum.Enum):
     DEACTIVATING = "deactivating"
     DEACTIVATION_FAILED = "deactivation_failed"
 
+    def can_change_to(self, status: "ModelStatus") -> bool:
+        """
+        Checks if a model in this status may change to the given status
+
+        :param status: the next status
+        :return: True if the transition is valid, False otherwise
+        """
+        return status in MODEL_STATUS_TRANSITIONS[self]
+
+    @classmethod
+    def sources(cls, status: "ModelStatus") -> list["ModelStatus"]:
+        """
+        Returns the statuses which may change to the given status
+
+        :param status: the next status
+        :return: list of the valid previous statuses
+        """
+        return [source for source in cls if source.can_change_to(status)]
+
+
+# Valid transitions of the model status. Every pipeline may be restarted
+# from its own intermediate and failed statuses, e.g. when a job is retried
+# after its worker crashed.
+MODEL_STATUS_TRANSITIONS: dict[ModelStatus, frozenset[ModelStatus]] = {
+    ModelStatus.INACTIVE: frozenset({ModelStatus.BUILDING, ModelStatus.DEPLOYING}),
+    ModelStatus.BUILDING: frozenset(
+        {ModelStatus.BUILDING, ModelStatus.BUILT, ModelStatus.BUILD_FAILED}
+    ),
+    ModelStatus.BUILT: frozenset({ModelStatus.BUILDING, ModelStatus.PUSHING}),
+    ModelStatus.BUILD_FAILED: frozenset({ModelStatus.BUILDING}),
+    ModelStatus.PUSHING: frozenset(
+        {
+            ModelStatus.BUILDING,
+            ModelStatus.PUSHING,
+            ModelStatus.PUSHED,
+            ModelStatus.PUSH_FAILED,
+        }
+    ),
+    ModelStatus.PUSHED: frozenset({ModelStatus.BUILDING, ModelStatus.DEPLOYING}),
+    ModelStatus.PUSH_FAILED: frozenset({ModelStatus.BUILDING, ModelStatus.PUSHING}),
+    ModelStatus.DEPLOYING: frozenset(
+        {ModelStatus.DEPLOYING, ModelStatus.DEPLOYED, ModelStatus.DEPLOY_FAILED}
+    ),
+    ModelStatus.DEPLOYED: frozenset({ModelStatus.DEPLOYING, ModelStatus.DEACTIVATING}),
+    ModelStatus.DEPLOY_FAILED: frozenset(
+        {ModelStatus.BUILDING, ModelStatus.DEPLOYING, ModelStatus.DEACTIVATING}
+    ),
+    ModelStatus.DEACTIVATING: frozenset(
+        {
+            ModelStatus.DEACTIVATING,
+            ModelStatus.INACTIVE,
+            ModelStatus.DEACTIVATION_FAILED,
+        }
+    ),
+    ModelStatus.DEACTIVATION_FAILED: frozenset({ModelStatus.DEACTIVATING}),
+}
+
 
 class Model(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
-    name = Column(String(255), nullable=False)
+    name = Column(String(255), nullable=False, unique=True, index=True)
     description = Column(String(255), nullable=False)
     created_at = Column(DateTime, nullable=False)
     created_by = Column(Integer, ForeignKey("user.id"))
     updated_at = Column(DateTime, nullable=False)
     updated_by = Column(Integer, ForeignKey("user.id"))
-    status = Column(Enum(ModelStatus), nullable=False)
+    status = Column(Enum(ModelStatus), nullable=False, index=True)
+    # Set while the model has a live deployment, including its redeploys
+    deployed_at = Column(DateTime)
 
     creator = relationship(
         "User", foreign_keys="Model.created_by", back_populates="created_models"
@@ -11,10 +11,11 @@ from models.base_class import Base
 
 class ModelDetails(Base):
     id = Column(Integer, primary_key=True)
-    model_id = Column(Integer, ForeignKey("model.id"))
+    model_id = Column(Integer, ForeignKey("model.id"), unique=True, index=True)
     mlflow_server_id = Column(Integer, ForeignKey("mlflow_server.id"))
     artifact_uri = Column(String(255))
-    image_tag = Column(String(255))
+    image_tag = Column(String(255), index=True)
+    image_digest = Column(String(255))
     min_replicas = Column(Integer)
     max_replicas = Column(Integer)
     cpu_request = Column(String(255))
@@ -35,4 +36,5 @@ class ModelDetails(Base):
         "MlflowServer",
         foreign_keys="ModelDetails.mlflow_server_id",
         uselist=False,
+        lazy="raise",
     )
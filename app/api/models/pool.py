@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 
 from models import Base
@@ -12,7 +12,7 @@ class PoolModelMode(enum.Enum):
 
 class Pool(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
-    name = Column(String(255), nullable=False)
+    name = Column(String(255), nullable=False, index=True)
     description = Column(String(255), nullable=False)
     created_at = Column(DateTime, nullable=False)
     created_by = Column(Integer, ForeignKey("user.id"), nullable=False)
@@ -30,15 +30,20 @@ class Pool(Base):
 
     users_roles = relationship("PoolUserRole", back_populates="pool")
 
-    gates = relationship("GatePool", back_populates="pool")
+    gates = relationship("GatePool", back_populates="pool", lazy="raise")
 
 
 class PoolModel(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     pool_id = Column(Integer, ForeignKey("pool.id"))
-    model_id = Column(Integer, ForeignKey("model.id"))
+    model_id = Column(Integer, ForeignKey("model.id"), index=True)
     mode = Column(Enum(PoolModelMode), nullable=False)
     weight = Column(Integer, nullable=False)
 
-    model = relationship("Model", back_populates="pools")
+    model = relationship("Model", back_populates="pools", lazy="raise")
     pool = relationship("Pool", back_populates="models")
+    __table_args__ = (
+        Index(
+            "ix_core_pool_model_pool_id_model_id", "pool_id", "model_id", unique=True
+        ),
+    )
@@ -5,7 +5,7 @@ from models.base_class import Base
 
 class Test(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
-    name = Column(String(255), nullable=False)
+    name = Column(String(255), nullable=False, index=True)
     description = Column(String(255), nullable=False)
     created_at = Column(DateTime, nullable=False)
     created_by = Column(Integer, ForeignKey("user.id"))
@@ -16,7 +16,7 @@ class User(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(255), nullable=False)
     surname = Column(String(255), nullable=False)
-    email = Column(String(255), nullable=False)
+    email = Column(String(255), nullable=False, index=True)
 
     created_models = relationship(
         "Model", foreign_keys="Model.created_by", back_populates="creator"
@@ -0,0 +1,25 @@
+"""
+This module contains the API routes and their corresponding
+functions for inspecting the state of the service.
+"""
+
+from fastapi import APIRouter, Depends
+
+from schemas import admin as admin_schemas
+from auth.jwt_bearer import JWTBearer
+from db.session import engine
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(JWTBearer())])
+
+
+@router.get("/db-pool", response_model=admin_schemas.DbPoolStatus, status_code=200)
+async def get_db_pool():
+    """
+    Retrieves the state of the database connection pool together with checkout
+    wait times of the recent checkouts.
+
+    :return: pool size, idle, checked out and overflow connections and wait times
+    """
+    pool = engine.pool
+    return {**pool.status_dict(), **pool.stats.summary()}
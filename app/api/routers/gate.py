@@ -3,22 +3,35 @@ This module contains the API routes and their corresponding
 functions for handling gate-related requests.
 """
 
-from fastapi import APIRouter, Query, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Query, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+import httpx
+import logging
+import time
 
 from schemas import gate as gate_schemas
 from services import get_db, GateService
 from routers.gate_pool import router as gate_pool_router
 from auth.jwt_bearer import JWTBearer
 from auth.jwt_handler import decode_jwt_token
+from models.job import JobKind
+from schemas import model as model_schemas
+from services import JobService, ModelService
+from utils.exception import InvalidCursor, JobQueueFull
+from utils.inference_proxy import FORWARDED_RESPONSE_HEADERS, InferenceProxy
+from utils.routing import routing_tables
+from utils.shadow import shadow_mirror
+from utils.pagination import decode_cursor, next_cursor
 
 
+_logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/gate", tags=["gate"], dependencies=[Depends(JWTBearer())])
 router.include_router(gate_pool_router)
 
 
 @router.get("/{gate_id}", response_model=gate_schemas.Gate, status_code=200)
-async def get_gate(gate_id: int, db: Session = Depends(get_db)):
+async def get_gate(gate_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieves the information of a specific gate by ID.
 
@@ -30,7 +43,7 @@ async def get_gate(gate_id: int, db: Session = Depends(get_db)):
 
     :return: the gate data corresponding to the given ID
     """
-    gate = GateService.get_gate_by_id(db=db, id=gate_id)
+    gate = await GateService.get_gate_by_id(db=db, id=gate_id)
     if not gate:
         raise HTTPException(status_code=404, detail="Gate not found!")
     return gate
@@ -38,9 +51,11 @@ async def get_gate(gate_id: int, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=list[gate_schemas.Gate], status_code=200)
 async def get_gates(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=0),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Retrieves a list of gates with pagination options (skip, limit).
@@ -48,20 +63,32 @@ async def get_gates(
     :param db: Database session
     :param skip: (optional) the number of records to skip (default: 0)
     :param limit: (optional) the maximum number of records to retrieve (default: 100)
+    :param cursor: (optional) the cursor of the next page from the X-Next-Cursor
+    header of the previous response, replaces skip
 
     :raise HTTPException: 404 status code with "Gates not found!" message
     if the specified range of gate ID's does not exist in the database.
+    :raise HTTPException: 400 status code with "Invalid cursor!" message
+    if the cursor is malformed.
 
     :return: a list of gate data, where skip < gate_id < limit
     """
-    gates = GateService.get_gates(skip=skip, limit=limit, db=db)
+    try:
+        after_id = decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor!")
+    gates = await GateService.get_gates(
+        skip=skip, limit=limit, after_id=after_id, db=db
+    )
+    if next_page := next_cursor(gates, limit):
+        response.headers["X-Next-Cursor"] = next_page
     return gates
 
 
 @router.put("/", response_model=gate_schemas.Gate, status_code=201)
 async def put_gate(
     gate_data: gate_schemas.GatePut,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     credentials: str = Depends(JWTBearer()),
 ):
     """
@@ -76,18 +103,18 @@ async def put_gate(
 
     :return: the newly-inserted gate record
     """
-    if GateService.get_gate_by_name(db=db, name=gate_data.name):
+    if await GateService.get_gate_by_name(db=db, name=gate_data.name):
         raise HTTPException(status_code=409, detail="Name already registered")
     payload = decode_jwt_token(credentials)
     user_id = payload.get("user_id")
-    return GateService.put_gate(db=db, gate_data=gate_data, user_id=user_id)
+    return await GateService.put_gate(db=db, gate_data=gate_data, user_id=user_id)
 
 
 @router.patch("/{gate_id}", response_model=gate_schemas.Gate, status_code=200)
 async def patch_gate(
     gate_id: int,
     gate_data: gate_schemas.GatePatch,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     credentials: str = Depends(JWTBearer()),
 ):
     """
@@ -106,20 +133,20 @@ async def patch_gate(
 
     :return: the updated gate record
     """
-    gate = GateService.get_gate_by_id(db=db, id=gate_id)
+    gate = await GateService.get_gate_by_id(db=db, id=gate_id)
     if not gate:
         raise HTTPException(status_code=404, detail="Gate not found!")
-    if GateService.get_gate_by_name(db=db, name=gate_data.name):
+    if await GateService.get_gate_by_name(db=db, name=gate_data.name):
         raise HTTPException(status_code=409, detail="Name already registered")
     payload = decode_jwt_token(credentials)
     user_id = payload.get("user_id")
-    return GateService.patch_gate(
+    return await GateService.patch_gate(
         db=db, gate_id=gate_id, gate_data=gate_data, user_id=user_id
     )
 
 
 @router.delete("/{gate_id}", status_code=200)
-async def delete_gate(gate_id: int, db: Session = Depends(get_db)):
+async def delete_gate(gate_id: int, db: AsyncSession = Depends(get_db)):
     """
     Deletes the gate with the specified email.
 
@@ -131,6 +158,140 @@ async def delete_gate(gate_id: int, db: Session = Depends(get_db)):
 
     :return: the updated gate record
     """
-    if not GateService.get_gate_by_id(db=db, id=gate_id):
+    if not await GateService.get_gate_by_id(db=db, id=gate_id):
+        raise HTTPException(status_code=404, detail="Gate not found!")
+    return await GateService.delete_gate(db=db, id=gate_id)
+
+
+@router.post(
+    "/{gate_id}/deploy",
+    response_model=model_schemas.ModelBatchJobResult,
+    status_code=200,
+)
+async def deploy_gate(
+    gate_id: int,
+    db: AsyncSession = Depends(get_db),
+    credentials: str = Depends(JWTBearer()),
+):
+    """
+    Queues a single job which deploys all models of the pools of the gate.
+    Models which cannot be deployed are skipped with a reason.
+
+    :param gate_id: gate ID
+    :param db: Database session
+    :param credentials: JWT token
+
+    :raise HTTPException: 404 status code with "Gate not found!" message
+    if the specified gate ID does not exist in the database.
+    :raise HTTPException: 429 status code with "Job queue is full!"
+
+    :return: the job ID, the IDs of the queued models and the reasons of the
+    skipped models
+    """
+    if not await GateService.get_gate_by_id(db=db, id=gate_id):
         raise HTTPException(status_code=404, detail="Gate not found!")
-    return GateService.delete_gate(db=db, id=gate_id)
+    models = await ModelService.get_member_models_with_details(db=db, gate_id=gate_id)
+    user_id = decode_jwt_token(credentials).get("user_id")
+    try:
+        return await JobService.enqueue_model_batch(
+            db=db, kind=JobKind.DEPLOY, models=models, user_id=user_id
+        )
+    except JobQueueFull:
+        raise HTTPException(status_code=429, detail="Job queue is full!")
+
+
+@router.post(
+    "/{gate_id}/deactivate",
+    response_model=model_schemas.ModelBatchJobResult,
+    status_code=200,
+)
+async def deactivate_gate(
+    gate_id: int,
+    db: AsyncSession = Depends(get_db),
+    credentials: str = Depends(JWTBearer()),
+):
+    """
+    Queues a single job which deactivates all models of the pools of the gate.
+    Models which cannot be deactivated are skipped with a reason.
+
+    :param gate_id: gate ID
+    :param db: Database session
+    :param credentials: JWT token
+
+    :raise HTTPException: 404 status code with "Gate not found!" message
+    if the specified gate ID does not exist in the database.
+    :raise HTTPException: 429 status code with "Job queue is full!"
+
+    :return: the job ID, the IDs of the queued models and the reasons of the
+    skipped models
+    """
+    if not await GateService.get_gate_by_id(db=db, id=gate_id):
+        raise HTTPException(status_code=404, detail="Gate not found!")
+    models = await ModelService.get_member_models_with_details(db=db, gate_id=gate_id)
+    user_id = decode_jwt_token(credentials).get("user_id")
+    try:
+        return await JobService.enqueue_model_batch(
+            db=db, kind=JobKind.DEACTIVATE, models=models, user_id=user_id
+        )
+    except JobQueueFull:
+        raise HTTPException(status_code=429, detail="Job queue is full!")
+
+
+@router.post("/{name}/invocations", status_code=200)
+async def invoke_gate(name: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Forwards an inference request to one of the deployed production models of
+    the pools of the gate, picked by weight. The response of the model is
+    returned as is, with the name of the model in the "X-Tyro-Model" header.
+    A configured fraction of the requests is copied to the deployed staging
+    models of the gate afterwards, without waiting for them.
+
+    :param name: gate name
+    :param request: the inference request
+    :param db: Database session
+
+    :raise HTTPException: 404 status code with "Gate not found!"
+    :raise HTTPException: 503 status code with "No deployed models in gate!"
+    :raise HTTPException: 502 status code with "Model is unreachable!"
+    :raise HTTPException: 504 status code with "Model timed out!"
+
+    :return: the response of the model
+    """
+    table = await routing_tables.get(lambda: GateService.get_routes(db=db))
+    routes = table.get(name)
+    if routes is None:
+        raise HTTPException(status_code=404, detail="Gate not found!")
+    if not routes:
+        raise HTTPException(status_code=503, detail="No deployed models in gate!")
+    # The connection of a compilation is not held while the model answers
+    await db.close()
+
+    model_name = routes.pick()
+    body = await request.body()
+    start = time.perf_counter()
+    try:
+        response = await InferenceProxy.forward(model_name, body, request.headers)
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="Model timed out!")
+    except httpx.HTTPError as e:
+        _logger.warning(f"Forwarding to model {model_name} failed with error: {e}")
+        raise HTTPException(status_code=502, detail="Model is unreachable!")
+    if routes.staging and shadow_mirror.sample():
+        shadow_mirror.mirror(
+            routes.staging,
+            model_name,
+            body,
+            request.headers,
+            response,
+            time.perf_counter() - start,
+        )
+    headers = {
+        name: response.headers[name]
+        for name in FORWARDED_RESPONSE_HEADERS
+        if name in response.headers
+    }
+    return Response(
+        content=response.content,
+        status_code=response.status_code,
+        headers={**headers, "X-Tyro-Model": model_name},
+    )
@@ -3,12 +3,14 @@ This module contains the API routes and their corresponding
 functions for handling gate-model-related requests.
 """
 
-from fastapi import APIRouter, Query, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Query, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from schemas import gate_pool as gate_pool_schemas
 from auth.jwt_bearer import JWTBearer
 from services import get_db, GateService, GatePoolService, PoolService
+from utils.exception import InvalidCursor
+from utils.pagination import decode_cursor, next_cursor
 
 
 router = APIRouter(
@@ -18,10 +20,12 @@ router = APIRouter(
 
 @router.get("/", response_model=list[gate_pool_schemas.GatePool], status_code=200)
 async def get_gate_pools(
+    response: Response,
     gate_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=0),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Retrieves a list of gates with pagination options (skip, limit).
@@ -30,17 +34,27 @@ async def get_gate_pools(
     :param db: Database session
     :param skip: (optional) the number of records to skip (default: 0)
     :param limit: (optional) the maximum number of records to retrieve (default: 100)
+    :param cursor: (optional) the cursor of the next page from the X-Next-Cursor
+    header of the previous response, replaces skip
 
     :raise HTTPException: 404 status code with "Pools not found!" message
     if gate has no pools.
+    :raise HTTPException: 400 status code with "Invalid cursor!" message
+    if the cursor is malformed.
 
     :return: a list of gate pools data, where skip < number of pools < limit
     """
-    if not GateService.get_gate_by_id(db=db, id=gate_id):
+    if not await GateService.get_gate_by_id(db=db, id=gate_id):
         raise HTTPException(status_code=404, detail="Gate not found!")
-    pools = GatePoolService.get_gate_pools(
-        db=db, gate_id=gate_id, skip=skip, limit=limit
+    try:
+        after_id = decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor!")
+    pools = await GatePoolService.get_gate_pools(
+        db=db, gate_id=gate_id, skip=skip, limit=limit, after_id=after_id
     )
+    if next_page := next_cursor(pools, limit):
+        response.headers["X-Next-Cursor"] = next_page
     return pools
 
 
@@ -48,7 +62,7 @@ async def get_gate_pools(
 async def put_pool_gate(
     gate_id: int,
     pool_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Adds existing pool to gate.
@@ -67,20 +81,22 @@ async def put_pool_gate(
     :return: JSON response with status code 201
     """
 
-    if not GateService.get_gate_by_id(db=db, id=gate_id):
+    if not await GateService.get_gate_by_id(db=db, id=gate_id):
         raise HTTPException(status_code=404, detail="Gate not found!")
-    if not PoolService.get_pool_by_id(db=db, id=pool_id):
+    if not await PoolService.get_pool_by_id(db=db, id=pool_id):
         raise HTTPException(status_code=404, detail="Pool not found!")
-    if GatePoolService.get_gate_pool_by_pool_id(
+    if await GatePoolService.get_gate_pool_by_pool_id(
         db=db, gate_id=gate_id, pool_id=pool_id
     ):
         raise HTTPException(status_code=409, detail="Pool already in gate!")
 
-    return GatePoolService.put_pool_gate(db=db, gate_id=gate_id, pool_id=pool_id)
+    return await GatePoolService.put_pool_gate(db=db, gate_id=gate_id, pool_id=pool_id)
 
 
 @router.delete("/{pool_id}", status_code=200)
-async def delete_pool_gate(gate_id: int, pool_id: int, db: Session = Depends(get_db)):
+async def delete_pool_gate(
+    gate_id: int, pool_id: int, db: AsyncSession = Depends(get_db)
+):
     """
     Deletes pool from gate.
 
@@ -95,13 +111,15 @@ async def delete_pool_gate(gate_id: int, pool_id: int, db: Session = Depends(get
 
     :return: JSON response with status code 200
     """
-    if not GateService.get_gate_by_id(db=db, id=gate_id):
+    if not await GateService.get_gate_by_id(db=db, id=gate_id):
         raise HTTPException(status_code=404, detail="Gate not found!")
-    if not PoolService.get_pool_by_id(db=db, id=pool_id):
+    if not await PoolService.get_pool_by_id(db=db, id=pool_id):
         raise HTTPException(status_code=404, detail="Pool not found!")
-    if not GatePoolService.get_gate_pool_by_pool_id(
+    if not await GatePoolService.get_gate_pool_by_pool_id(
         db=db, gate_id=gate_id, pool_id=pool_id
     ):
         raise HTTPException(status_code=404, detail="Pool is not in the gate!")
 
-    return GatePoolService.delete_pool_gate(db=db, gate_id=gate_id, pool_id=pool_id)
+    return await GatePoolService.delete_pool_gate(
+        db=db, gate_id=gate_id, pool_id=pool_id
+    )
@@ -0,0 +1,59 @@
+"""
+This module contains the API routes and their corresponding
+functions for liveness and readiness probes.
+"""
+
+from fastapi import APIRouter, HTTPException
+
+from schemas import health as health_schemas
+from db.session import ping_db
+from utils.warmup import database_warmup, base_image_warmup
+
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live", status_code=200)
+async def live():
+    """
+    Reports whether the process is alive. Fails only if the database warm-up
+    failed, so that the process is restarted.
+
+    :raise HTTPException: 503 status code with "Database warm-up failed!"
+    message if the database could not be prepared.
+
+    :return: JSON with status ok
+    """
+    if database_warmup.failed:
+        raise HTTPException(status_code=503, detail="Database warm-up failed!")
+    return {"status": "ok"}
+
+
+@router.get("/ready", status_code=200)
+async def ready():
+    """
+    Reports whether the service can serve requests, i.e. the database is
+    migrated and reachable.
+
+    :raise HTTPException: 503 status code with "Database not ready!" message
+    if the database warm-up is not finished.
+    :raise HTTPException: 503 status code with "Database not reachable!" message
+    if the database does not answer.
+
+    :return: JSON with status ok
+    """
+    if not database_warmup.ready:
+        raise HTTPException(status_code=503, detail="Database not ready!")
+    if not await ping_db():
+        raise HTTPException(status_code=503, detail="Database not reachable!")
+    return {"status": "ok"}
+
+
+@router.get("/warmup", response_model=list[health_schemas.Warmup], status_code=200)
+async def get_warmups():
+    """
+    Retrieves the state of the background warm-up tasks.
+
+    :return: a list of warm-up tasks with their status
+    """
+    return [database_warmup.summary(), base_image_warmup.summary()]
@@ -0,0 +1,33 @@
+"""
+This module contains the API routes and their corresponding
+functions for handling job-related requests.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from schemas import job as job_schemas
+from services import JobService, get_db
+from auth.jwt_bearer import JWTBearer
+
+
+router = APIRouter(prefix="/job", tags=["job"], dependencies=[Depends(JWTBearer())])
+
+
+@router.get("/{job_id}", response_model=job_schemas.Job, status_code=200)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Retrieves the state of a specific background job by ID.
+
+    :param job_id: the job ID to retrieve
+    :param db: Database session
+
+    :raise HTTPException: 404 status code with "Job not found!" message
+    if the specified job ID does not exist in the database.
+
+    :return: the job data corresponding to the given ID
+    """
+    job = await JobService.get_job_by_id(db=db, job_id=job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found!")
+    return job
@@ -2,7 +2,7 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException, Request
 from authlib.integrations.starlette_client import OAuth
 from auth.jwt_handler import create_jwt_token
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from config.config import settings
@@ -26,11 +26,11 @@ oauth.register(
 )
 
 
-def user_login(token: dict, db: Session):
+async def user_login(token: dict, db: AsyncSession):
     user_email = token.get("userinfo").get("email")
-    user = UserService.get_user_by_email(db, user_email)
+    user = await UserService.get_user_by_email(db, user_email)
     if not user:
-        user = UserService.put_user(
+        user = await UserService.put_user(
             db,
             UserPut(
                 name=token.get("userinfo").get("given_name"),
@@ -46,11 +46,11 @@ def user_login(token: dict, db: Session):
 
 
 @router.get("/auth")
-async def auth(request: Request, db: Session = Depends(get_db)):
+async def auth(request: Request, db: AsyncSession = Depends(get_db)):
     token = await oauth.google.authorize_access_token(request)
     user = token.get("userinfo")
     if user:
-        return user_login(token, db)
+        return await user_login(token, db)
     raise HTTPException(status_code=400, detail="User not authenticated")
 
 
@@ -3,13 +3,15 @@ This module contains the API routes and their corresponding
 functions for handling mlflow-server-related requests.
 """
 
-from fastapi import APIRouter, Query, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Query, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from schemas import mlflow_server as mlflow_server_schemas
 from services import get_db, MlflowServerService
 from auth.jwt_bearer import JWTBearer
 from auth.jwt_handler import decode_jwt_token
+from utils.exception import InvalidCursor
+from utils.pagination import decode_cursor, next_cursor
 
 
 router = APIRouter(
@@ -22,7 +24,7 @@ router = APIRouter(
     response_model=mlflow_server_schemas.MlflowServer,
     status_code=200,
 )
-async def get_mlflow_server(mlflow_server_id: int, db: Session = Depends(get_db)):
+async def get_mlflow_server(mlflow_server_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieves the information of a specific mlflow server by ID.
 
@@ -34,7 +36,7 @@ async def get_mlflow_server(mlflow_server_id: int, db: Session = Depends(get_db)
 
     :return: the mlflow server data corresponding to the given ID
     """
-    mlflow_server = MlflowServerService.get_mlflow_server_by_id(
+    mlflow_server = await MlflowServerService.get_mlflow_server_by_id(
         db=db, id=mlflow_server_id
     )
     if not mlflow_server:
@@ -46,9 +48,11 @@ async def get_mlflow_server(mlflow_server_id: int, db: Session = Depends(get_db)
     "/", response_model=list[mlflow_server_schemas.MlflowServer], status_code=200
 )
 async def get_mlflow_servers(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=0),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Retrieves a list of mlflow server with pagination options (skip, limit).
@@ -56,22 +60,32 @@ async def get_mlflow_servers(
     :param db: Database session
     :param skip: (optional) the number of records to skip (default: 0)
     :param limit: (optional) the maximum number of records to retrieve (default: 100)
+    :param cursor: (optional) the cursor of the next page from the X-Next-Cursor
+    header of the previous response, replaces skip
 
     :raise HTTPException: 404 status code with "Mlflow server not found!" message
     if the specified range of gate ID's does not exist in the database.
+    :raise HTTPException: 400 status code with "Invalid cursor!" message
+    if the cursor is malformed.
 
     :return: a list of mlflow server data, where skip < mlflow_server_id < limit
     """
-    mlflow_servers = MlflowServerService.get_mlflow_servers(
-        skip=skip, limit=limit, db=db
+    try:
+        after_id = decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor!")
+    mlflow_servers = await MlflowServerService.get_mlflow_servers(
+        skip=skip, limit=limit, after_id=after_id, db=db
     )
+    if next_page := next_cursor(mlflow_servers, limit):
+        response.headers["X-Next-Cursor"] = next_page
     return mlflow_servers
 
 
 @router.put("/", response_model=mlflow_server_schemas.MlflowServer, status_code=201)
 async def put_mlflow_server(
     mlflow_server_data: mlflow_server_schemas.MlflowServerPut,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     credentials: str = Depends(JWTBearer()),
 ):
     """
@@ -86,13 +100,13 @@ async def put_mlflow_server(
 
     :return: the newly-inserted mlflow server record
     """
-    if MlflowServerService.get_mlflow_server_by_name(
+    if await MlflowServerService.get_mlflow_server_by_name(
         db=db, name=mlflow_server_data.name
     ):
         raise HTTPException(status_code=409, detail="Name already registered")
     payload = decode_jwt_token(credentials)
     user_id = payload.get("user_id")
-    return MlflowServerService.put_mlflow_server(
+    return await MlflowServerService.put_mlflow_server(
         db=db, mlflow_server_data=mlflow_server_data, user_id=user_id
     )
 
@@ -105,7 +119,7 @@ async def put_mlflow_server(
 async def patch_mlflow_server(
     mlflow_server_id: int,
     mlflow_server_data: mlflow_server_schemas.MlflowServerPatch,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     credentials: str = Depends(JWTBearer()),
 ):
     """
@@ -123,16 +137,16 @@ async def patch_mlflow_server(
 
     :return: the updated mlflow server record
     """
-    gate = MlflowServerService.get_mlflow_server_by_id(db=db, id=mlflow_server_id)
+    gate = await MlflowServerService.get_mlflow_server_by_id(db=db, id=mlflow_server_id)
     if not gate:
         raise HTTPException(status_code=404, detail="Mlflow server not found!")
-    if MlflowServerService.get_mlflow_server_by_name(
+    if await MlflowServerService.get_mlflow_server_by_name(
         db=db, name=mlflow_server_data.name
     ):
         raise HTTPException(status_code=409, detail="Name already registered")
     payload = decode_jwt_token(credentials)
     user_id = payload.get("user_id")
-    return MlflowServerService.patch_mlflow_server(
+    return await MlflowServerService.patch_mlflow_server(
         db=db,
         mlflow_server_id=mlflow_server_id,
         mlflow_server_data=mlflow_server_data,
@@ -141,7 +155,9 @@ async def patch_mlflow_server(
 
 
 @router.delete("/{mlflow_server_id}", status_code=200)
-async def delete_mlflow_server(mlflow_server_id: int, db: Session = Depends(get_db)):
+async def delete_mlflow_server(
+    mlflow_server_id: int, db: AsyncSession = Depends(get_db)
+):
     """
     Deletes the mlflow server with the specified email.
 
@@ -153,6 +169,8 @@ async def delete_mlflow_server(mlflow_server_id: int, db: Session = Depends(get_
 
     :return: the updated mlflow server record
     """
-    if not MlflowServerService.get_mlflow_server_by_id(db=db, id=mlflow_server_id):
+    if not await MlflowServerService.get_mlflow_server_by_id(
+        db=db, id=mlflow_server_id
+    ):
         raise HTTPException(status_code=404, detail="Mlflow server not found!")
-    return MlflowServerService.delete_mlflow_server(db=db, id=mlflow_server_id)
+    return await MlflowServerService.delete_mlflow_server(db=db, id=mlflow_server_id)
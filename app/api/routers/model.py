@@ -2,18 +2,28 @@
 This module contains the API routes and their corresponding
 functions for handling model-related requests.
 """
-from fastapi import APIRouter, Query, Depends, HTTPException
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-import logging
+from fastapi import APIRouter, Query, Depends, HTTPException, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 import asyncio
+import logging
 
 from schemas import model as model_schemas
 from models.model import ModelStatus
-from services import ModelService, ModelDetailsService, get_db
+from models.job import JobKind
+from services import ModelService, ModelDetailsService, JobService, get_db
 from routers.model_details import router as model_details_router
 from auth.jwt_bearer import JWTBearer
 from auth.jwt_handler import decode_jwt_token
+from utils.build_scheduler import BuildScheduler
+from config.config import settings
+from utils.constants import Constants
+from utils.events import EventBus, to_sse
+from utils.registry import RegistryClient
+from utils import ModelDeployment
+from utils.exception import InvalidCursor, JobAlreadyPending, JobQueueFull
+from utils.pagination import decode_cursor, next_cursor
+from utils.shadow import shadow_mirror
 
 
 router = APIRouter(prefix="/model", tags=["model"], dependencies=[Depends(JWTBearer())])
@@ -23,7 +33,7 @@ _logger = logging.getLogger(__name__)
 
 
 @router.get("/{model_id}", response_model=model_schemas.Model, status_code=200)
-async def get_model(model_id: int, db: Session = Depends(get_db)):
+async def get_model(model_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieves the information of a specific model by ID.
 
@@ -35,7 +45,7 @@ async def get_model(model_id: int, db: Session = Depends(get_db)):
 
     :return: the model data corresponding to the given ID
     """
-    model = ModelService.get_model_by_id(db=db, model_id=model_id)
+    model = await ModelService.get_model_by_id(db=db, model_id=model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model not found!")
     return model
@@ -43,9 +53,11 @@ async def get_model(model_id: int, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=list[model_schemas.Model], status_code=200)
 async def get_models(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=0),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Retrieves a list of models with pagination options (skip, limit).
@@ -53,20 +65,32 @@ async def get_models(
     :param db: Database session
     :param skip: (optional) the number of records to skip (default: 0)
     :param limit: (optional) the maximum number of records to retrieve (default: 100)
+    :param cursor: (optional) the cursor of the next page from the X-Next-Cursor
+    header of the previous response, replaces skip
 
     :raise HTTPException: 404 status code with "Model not found!" message
     if the specified range of model ID's does not exist in the database.
+    :raise HTTPException: 400 status code with "Invalid cursor!" message
+    if the cursor is malformed.
 
     :return: a list of model data, where skip < model_id < limit
     """
-    models = ModelService.get_models(db=db, skip=skip, limit=limit)
+    try:
+        after_id = decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor!")
+    models = await ModelService.get_models(
+        db=db, skip=skip, limit=limit, after_id=after_id
+    )
+    if next_page := next_cursor(models, limit):
+        response.headers["X-Next-Cursor"] = next_page
     return models
 
 
 @router.put("/", response_model=model_schemas.Model, status_code=201)
 async def put_model(
     model_data: model_schemas.ModelPut,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     credentials=Depends(JWTBearer()),
 ):
     """
@@ -82,93 +106,102 @@ async def put_model(
     """
     payload = decode_jwt_token(credentials)
     user_id = payload.get("user_id")
-    if ModelService.get_model_by_name(db=db, name=model_data.name):
+    if await ModelService.get_model_by_name(db=db, name=model_data.name):
         raise HTTPException(status_code=409, detail="Name already registered")
-    result = ModelService.put_model(db=db, model=model_data, user_id=user_id)
-    ModelDetailsService.put_model_details(db, result.id)
+    result = await ModelService.put_model(db=db, model=model_data, user_id=user_id)
+    await ModelDetailsService.put_model_details(db, result.id)
     return result
 
 
 @router.post("/{model_id}/deploy", status_code=200)
 async def deploy_model(
     model_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    credentials: str = Depends(JWTBearer()),
 ):
     """
-    Activates the model with the given ID.
+    Queues activation of the model with the given ID.
 
     :param model_id: model ID
     :param db: Database session
+    :param credentials: JWT token
 
     :raise HTTPException: 404 status code with "Model not found!"
+    :raise HTTPException: 409 status code with "Model cannot be deployed in its status!"
     :raise HTTPException: 404 status code with "Model details not found!"
     :raise HTTPException: 406 status code with "Model details are not complete!"
+    :raise HTTPException: 409 status code with "Model already has a pending job!"
+    :raise HTTPException: 429 status code with "Job queue is full!"
 
-    :return: a json with a "detail" key indicating success
+    :return: a json with a "detail" key indicating success and the "job_id"
     """
-    db_model = ModelService.get_model_by_id(db=db, model_id=model_id)
+    db_model = await ModelService.get_model_by_id(db=db, model_id=model_id)
     if not db_model:
         raise HTTPException(status_code=404, detail="Model not found!")
-
-    db_model_details = ModelDetailsService.get_model_details_by_model_id(db, model_id)
-    if not db_model_details:
-        raise HTTPException(status_code=404, detail="Model details not found!")
-
-    for item in db_model_details.__dict__.items():
-        if item[0] in ["cpu_utilization", "memory_utilization", "max_replicas"]:
-            continue
-        if item[1] is None:
-            raise HTTPException(
-                status_code=406, detail="Model details are not complete!"
-            )
-    if (
-        db_model_details.cpu_utilization or db_model_details.memory_utilization
-    ) and not db_model_details.max_replicas:
-        raise HTTPException(status_code=406, detail="Model details are not complete!")
-
-    asyncio.create_task(
-        ModelService.deploy_model(
-            db=db,
-            name=db_model.name,
-            model_details=db_model_details,
-        )
+    db_model_details = await ModelDetailsService.get_model_details_by_model_id(
+        db, model_id
     )
-    return JSONResponse({"detail": "Deploy started!"})
+    error = ModelService.check_deployable(db_model, db_model_details)
+    if error is not None:
+        raise HTTPException(status_code=error[0], detail=error[1])
+
+    user_id = decode_jwt_token(credentials).get("user_id")
+    try:
+        job = await JobService.enqueue_job(
+            db=db, kind=JobKind.DEPLOY, model_id=model_id, user_id=user_id
+        )
+    except JobAlreadyPending:
+        raise HTTPException(status_code=409, detail="Model already has a pending job!")
+    except JobQueueFull:
+        raise HTTPException(status_code=429, detail="Job queue is full!")
+    return JSONResponse({"detail": "Deploy started!", "job_id": job.id})
 
 
 @router.post("/{model_id}/deactivate", status_code=200)
-async def deactivate_model(model_id: int, db: Session = Depends(get_db)):
+async def deactivate_model(
+    model_id: int,
+    db: AsyncSession = Depends(get_db),
+    credentials: str = Depends(JWTBearer()),
+):
     """
-    Deactivates the model with the given ID.
+    Queues deactivation of the model with the given ID.
 
     :param model_id: model ID
     :param db: Database session
+    :param credentials: JWT token
 
     :raise HTTPException: 404 status code with "Model not found!" message
     :raise HTTPException: 409 status code with "Model already inactive!" message
     :raise HTTPException: 409 status code with "Model is not deployed!" message
+    :raise HTTPException: 409 status code with "Model already has a pending job!"
+    :raise HTTPException: 429 status code with "Job queue is full!"
 
-    :return: a json with a "detail" key indicating success
+    :return: a json with a "detail" key indicating success and the "job_id"
     """
-    model = ModelService.get_model_by_id(db=db, model_id=model_id)
+    model = await ModelService.get_model_by_id(db=db, model_id=model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model not found!")
-    if model.status == ModelStatus.INACTIVE:
-        raise HTTPException(status_code=409, detail="Model already inactive!")
-    if model.status != ModelStatus.DEPLOYED:
-        raise HTTPException(status_code=409, detail="Model is not deployed!")
-
-    asyncio.create_task(
-        ModelService.deactivate_model(db=db, model_id=model_id, name=model.name)
-    )
-    return JSONResponse({"detail": "Deactivation started!"})
+    error = ModelService.check_deactivatable(model)
+    if error is not None:
+        raise HTTPException(status_code=error[0], detail=error[1])
+
+    user_id = decode_jwt_token(credentials).get("user_id")
+    try:
+        job = await JobService.enqueue_job(
+            db=db, kind=JobKind.DEACTIVATE, model_id=model_id, user_id=user_id
+        )
+    except JobAlreadyPending:
+        raise HTTPException(status_code=409, detail="Model already has a pending job!")
+    except JobQueueFull:
+        raise HTTPException(status_code=429, detail="Job queue is full!")
+    return JSONResponse({"detail": "Deactivation started!", "job_id": job.id})
 
 
 @router.patch("/{model_id}", response_model=model_schemas.Model, status_code=200)
 async def patch_model(
     model_id: int,
     model_data: model_schemas.ModelPatch,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     credentials: str = Depends(JWTBearer()),
 ):
     """
@@ -189,17 +222,17 @@ async def patch_model(
     """
     payload = decode_jwt_token(credentials)
     user_id = payload.get("user_id")
-    if not ModelService.get_model_by_id(db, model_id):
+    if not await ModelService.get_model_by_id(db, model_id):
         raise HTTPException(status_code=404, detail="Model not found!")
-    if ModelService.get_model_by_name(db=db, name=model_data.name):
+    if await ModelService.get_model_by_name(db=db, name=model_data.name):
         raise HTTPException(status_code=409, detail="Name already registered")
-    return ModelService.patch_model(
+    return await ModelService.patch_model(
         db=db, model_id=model_id, model=model_data, user_id=user_id
     )
 
 
 @router.delete("/{model_id}", status_code=200)
-async def delete_model(model_id: int, db: Session = Depends(get_db)):
+async def delete_model(model_id: int, db: AsyncSession = Depends(get_db)):
     """
     Deletes the model with the given ID.
 
@@ -211,45 +244,255 @@ async def delete_model(model_id: int, db: Session = Depends(get_db)):
 
     :return: a json with a "detail" key indicating success
     """
-    if not ModelService.get_model_by_id(db=db, model_id=model_id):
+    if not await ModelService.get_model_by_id(db=db, model_id=model_id):
         raise HTTPException(status_code=404, detail="Model not found!")
-    ModelDetailsService.delete_model_details(db, model_id)
-    return ModelService.delete_model(db=db, model_id=model_id)
+    await ModelDetailsService.delete_model_details(db, model_id)
+    return await ModelService.delete_model(db=db, model_id=model_id)
 
 
 @router.post("/{model_id}/build", status_code=200)
-async def build_model(model_id: int, db: Session = Depends(get_db)):
+async def build_model(
+    model_id: int,
+    db: AsyncSession = Depends(get_db),
+    credentials: str = Depends(JWTBearer()),
+):
     """
-    Builds container of the model with the given ID.
+    Queues a build of the container of the model with the given ID.
 
     :param model_id: model ID
     :param db: Database session
+    :param credentials: JWT token
 
     :raise HTTPException: 404 status code with "Model not found!"
     :raise HTTPException: 409 status code with "Model is not inactive!"
     :raise HTTPException: 404 status code with "Model details not found!"
     :raise HTTPException: 406 status code with "Model details are not complete!"
+    :raise HTTPException: 409 status code with "Model already has a pending job!"
+    :raise HTTPException: 429 status code with "Job queue is full!"
 
-    :return: a json with a "detail" key indicating success
+    :return: a json with a "detail" key indicating success and the "job_id"
     """
-    db_model = ModelService.get_model_by_id(db=db, model_id=model_id)
+    db_model = await ModelService.get_model_by_id(db=db, model_id=model_id)
     if not db_model:
         raise HTTPException(status_code=404, detail="Model not found!")
     if db_model.status != ModelStatus.INACTIVE:
         raise HTTPException(status_code=409, detail="Model is not inactive!")
 
-    db_model_details = ModelDetailsService.get_model_details_by_model_id(db, model_id)
+    db_model_details = await ModelDetailsService.get_model_details_by_model_id(
+        db, model_id
+    )
     if not db_model_details:
         raise HTTPException(status_code=404, detail="Model details not found!")
 
     if db_model_details.artifact_uri is None:
         raise HTTPException(status_code=406, detail="No artifact URI specified!")
 
-    asyncio.create_task(
-        ModelService.build_model(
-            db=db,
-            name=db_model.name,
-            model_details=db_model_details,
+    user_id = decode_jwt_token(credentials).get("user_id")
+    try:
+        job = await JobService.enqueue_job(
+            db=db, kind=JobKind.BUILD, model_id=model_id, user_id=user_id
         )
+    except JobAlreadyPending:
+        raise HTTPException(status_code=409, detail="Model already has a pending job!")
+    except JobQueueFull:
+        raise HTTPException(status_code=429, detail="Job queue is full!")
+    return JSONResponse({"detail": "Build started!", "job_id": job.id})
+
+
+@router.get(
+    "/{model_id}/push",
+    response_model=model_schemas.ModelPushProgress,
+    status_code=200,
+)
+async def get_push_progress(model_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Reports the progress of the latest image push of the model with the given
+    ID. Pushes are tracked by the replica which runs them.
+
+    :param model_id: model ID
+    :param db: Database session
+
+    :raise HTTPException: 404 status code with "Model not found!"
+    :raise HTTPException: 404 status code with "No recent push of the model!"
+
+    :return: the status, layer and byte counts and throughput of the push
+    """
+    db_model = await ModelService.get_model_by_id(db=db, model_id=model_id)
+    if not db_model:
+        raise HTTPException(status_code=404, detail="Model not found!")
+    progress = RegistryClient.get_progress(Constants.K8S_MODEL_PREFIX + db_model.name)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="No recent push of the model!")
+    return progress.summary()
+
+
+@router.get(
+    "/{model_id}/rollout",
+    response_model=model_schemas.ModelRollout,
+    status_code=200,
+)
+async def get_rollout(model_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Reports the kubernetes resources of the model with the given ID, read
+    from the local cache of the cluster.
+
+    :param model_id: model ID
+    :param db: Database session
+
+    :raise HTTPException: 404 status code with "Model not found!"
+    :raise HTTPException: 503 status code with "Cluster cache is not synced!"
+
+    :return: the resources, the replicas and the phases of the pods
+    """
+    db_model = await ModelService.get_model_by_id(db=db, model_id=model_id)
+    if not db_model:
+        raise HTTPException(status_code=404, detail="Model not found!")
+    rollout = ModelDeployment.rollout(Constants.K8S_MODEL_PREFIX + db_model.name)
+    if rollout is None:
+        raise HTTPException(status_code=503, detail="Cluster cache is not synced!")
+    return rollout
+
+
+@router.get(
+    "/{model_id}/shadow",
+    response_model=model_schemas.ModelShadowStats,
+    status_code=200,
+)
+async def get_shadow_stats(model_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Reports the requests of production models mirrored to the model with the
+    given ID as a staging model, as seen by this replica.
+
+    :param model_id: model ID
+    :param db: Database session
+
+    :raise HTTPException: 404 status code with "Model not found!"
+
+    :return: the counters, the mean latencies of the model and of production,
+    and the recent responses which differed from production
+    """
+    db_model = await ModelService.get_model_by_id(db=db, model_id=model_id)
+    if not db_model:
+        raise HTTPException(status_code=404, detail="Model not found!")
+    return shadow_mirror.stats(db_model.name)
+
+
+@router.get("/{model_id}/events", status_code=200)
+async def get_model_events(model_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Streams the progress of the model with the given ID as server-sent events.
+    The stream starts with the current status, followed by "status"
+    transitions of all replicas, and by "log" lines of image builds, "push"
+    progress and "rollout" changes of deployments as they happen on this
+    replica. A comment is sent when nothing happened for a while, to keep the
+    connection open.
+
+    :param model_id: model ID
+    :param db: Database session
+
+    :raise HTTPException: 404 status code with "Model not found!"
+
+    :return: stream of events in the text/event-stream format
+    """
+    db_model = await ModelService.get_model_by_id(db=db, model_id=model_id)
+    if not db_model:
+        raise HTTPException(status_code=404, detail="Model not found!")
+    topic = Constants.K8S_MODEL_PREFIX + db_model.name
+    status = db_model.status
+    # The stream may stay open for hours, it must not hold a connection
+    await db.close()
+
+    async def stream():
+        with EventBus.subscribe(topic) as events:
+            yield to_sse({"type": "status", "status": status.value})
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        events.get(), timeout=settings.EVENT_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield to_sse(event)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return JSONResponse({"detail": "Build started!"})
+
+
+@router.post(
+    "/build", response_model=model_schemas.ModelBuildBatchResult, status_code=200
+)
+async def build_models(
+    batch: model_schemas.ModelBuildBatch,
+    db: AsyncSession = Depends(get_db),
+    credentials: str = Depends(JWTBearer()),
+):
+    """
+    Queues builds of the containers of several models at once. Duplicate IDs
+    are built once, models which cannot be built are skipped with a reason.
+    The builds run in parallel on the build slots of all nodes.
+
+    :param batch: IDs of the models to build
+    :param db: Database session
+    :param credentials: JWT token
+
+    :raise HTTPException: 429 status code with "Job queue is full!"
+
+    :return: the job IDs of the queued models and the reasons of skipped ones
+    """
+    model_ids = list(dict.fromkeys(batch.model_ids))
+    skipped = {model_id: "Model not found!" for model_id in model_ids}
+    buildable = []
+    for db_model, db_model_details in await ModelService.get_models_with_details(
+        db=db, model_ids=model_ids
+    ):
+        if db_model.status != ModelStatus.INACTIVE:
+            skipped[db_model.id] = "Model is not inactive!"
+        elif not db_model_details:
+            skipped[db_model.id] = "Model details not found!"
+        elif db_model_details.artifact_uri is None:
+            skipped[db_model.id] = "No artifact URI specified!"
+        else:
+            del skipped[db_model.id]
+            buildable.append(db_model.id)
+
+    user_id = decode_jwt_token(credentials).get("user_id")
+    try:
+        jobs, busy = await JobService.enqueue_jobs(
+            db=db, kind=JobKind.BUILD, model_ids=buildable, user_id=user_id
+        )
+    except JobQueueFull:
+        raise HTTPException(status_code=429, detail="Job queue is full!")
+    skipped.update({model_id: "Model already has a pending job!" for model_id in busy})
+    return {
+        "detail": "Builds started!" if jobs else "No builds started!",
+        "jobs": {job.model_id: job.id for job in jobs},
+        "skipped": skipped,
+    }
+
+
+@router.get(
+    "/build/queue", response_model=model_schemas.ModelBuildQueue, status_code=200
+)
+async def get_build_queue(db: AsyncSession = Depends(get_db)):
+    """
+    Reports the depth of the build queue and estimates when it is drained.
+
+    :param db: Database session
+
+    :return: the queued and running builds, the build capacity and the ETA
+    """
+    stats = await JobService.get_queue_stats(db=db, kind=JobKind.BUILD)
+    return {
+        "queued": stats["queued"],
+        "running": stats["running"],
+        "nodes": stats["workers"],
+        "capacity": BuildScheduler.capacity(),
+        "avg_build_seconds": stats["avg_seconds"],
+        "eta_seconds": BuildScheduler.eta(
+            stats["queued"], stats["running"], stats["avg_seconds"], stats["workers"]
+        ),
+    }
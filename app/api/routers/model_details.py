@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from schemas.model_details import ModelDetails, ModelDetailsPatch
 from services import ModelDetailsService, get_db, MlflowServerService
@@ -13,7 +13,7 @@ router = APIRouter(
 
 
 @router.get("/", response_model=ModelDetails, status_code=200)
-async def get_model_details_by_id(model_id: int, db: Session = Depends(get_db)):
+async def get_model_details_by_id(model_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieves the information of a specific model_details by ID.
 
@@ -25,7 +25,7 @@ async def get_model_details_by_id(model_id: int, db: Session = Depends(get_db)):
 
     :return: the model_details data corresponding to the given ID
     """
-    model_details = ModelDetailsService.get_model_details_by_model_id(
+    model_details = await ModelDetailsService.get_model_details_by_model_id(
         db=db, model_id=model_id
     )
     if not model_details:
@@ -37,7 +37,7 @@ async def get_model_details_by_id(model_id: int, db: Session = Depends(get_db)):
 async def patch_model_details(
     model_id: int,
     model_details_data: ModelDetailsPatch,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Updates the information of an existing model_details
@@ -52,14 +52,14 @@ async def patch_model_details(
 
     :return: the model_details data corresponding to the given ID
     """
-    model_details = ModelDetailsService.get_model_details_by_model_id(
+    model_details = await ModelDetailsService.get_model_details_by_model_id(
         db=db, model_id=model_id
     )
     if not model_details:
         raise HTTPException(status_code=404, detail="ModelDetails not found!")
 
     if model_details_data.image_tag:
-        model_details = ModelDetailsService.get_model_details_by_image_tag(
+        model_details = await ModelDetailsService.get_model_details_by_image_tag(
             db=db, image_tag=model_details_data.image_tag
         )
         if model_details:
@@ -67,7 +67,7 @@ async def patch_model_details(
                 status_code=400, detail="ModelDetails with the same tag already exists!"
             )
     if model_details_data.mlflow_server_id is not None:
-        ml_flow_server = MlflowServerService.get_mlflow_server_by_id(
+        ml_flow_server = await MlflowServerService.get_mlflow_server_by_id(
             db, model_details_data.mlflow_server_id
         )
         if ml_flow_server is None:
@@ -75,7 +75,7 @@ async def patch_model_details(
                 status_code=400,
                 detail="Mlflow server with the given ID does not exist!",
             )
-    model_details = ModelDetailsService.patch_model_details(
+    model_details = await ModelDetailsService.patch_model_details(
         db=db, model_id=model_id, model_details=model_details_data
     )
     return model_details
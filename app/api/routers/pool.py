@@ -3,14 +3,19 @@ This module contains the API routes and their corresponding
 functions for handling pool-related requests.
 """
 
-from fastapi import APIRouter, Query, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Query, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from schemas import pool as pool_schemas
 from services import PoolService, get_db
 from routers.pool_model import router as pool_model_router
 from auth.jwt_bearer import JWTBearer
 from auth.jwt_handler import decode_jwt_token
+from models.job import JobKind
+from schemas import model as model_schemas
+from services import JobService, ModelService
+from utils.exception import InvalidCursor, JobQueueFull
+from utils.pagination import decode_cursor, next_cursor
 
 
 router = APIRouter(prefix="/pool", tags=["pool"], dependencies=[Depends(JWTBearer())])
@@ -18,7 +23,7 @@ router.include_router(pool_model_router)
 
 
 @router.get("/{pool_id}", response_model=pool_schemas.Pool, status_code=200)
-async def get_pool(pool_id: int, db: Session = Depends(get_db)):
+async def get_pool(pool_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieves the information of a specific pool by ID.
 
@@ -30,7 +35,7 @@ async def get_pool(pool_id: int, db: Session = Depends(get_db)):
 
     :return: the pool data corresponding to the given ID
     """
-    pool = PoolService.get_pool_by_id(db=db, id=pool_id)
+    pool = await PoolService.get_pool_by_id(db=db, id=pool_id)
     if not pool:
         raise HTTPException(status_code=404, detail="Pool not found!")
     return pool
@@ -38,9 +43,11 @@ async def get_pool(pool_id: int, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=list[pool_schemas.Pool], status_code=200)
 async def get_pools(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=0),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Retrieves a list of pools with pagination options (skip, limit).
@@ -48,20 +55,32 @@ async def get_pools(
     :param db: Database session
     :param skip: (optional) the number of records to skip (default: 0)
     :param limit: (optional) the maximum number of records to retrieve (default: 100)
+    :param cursor: (optional) the cursor of the next page from the X-Next-Cursor
+    header of the previous response, replaces skip
 
     :raise HTTPException: 404 status code with "Model not found!" message
     if the specified range of pool ID's does not exist in the database.
+    :raise HTTPException: 400 status code with "Invalid cursor!" message
+    if the cursor is malformed.
 
     :return: a list of pool data, where skip < pool_id < limit
     """
-    pools = PoolService.get_pools(skip=skip, limit=limit, db=db)
+    try:
+        after_id = decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor!")
+    pools = await PoolService.get_pools(
+        skip=skip, limit=limit, after_id=after_id, db=db
+    )
+    if next_page := next_cursor(pools, limit):
+        response.headers["X-Next-Cursor"] = next_page
     return pools
 
 
 @router.put("/", response_model=pool_schemas.Pool, status_code=201)
 async def put_pool(
     pool_data: pool_schemas.PoolPut,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     credentials: str = Depends(JWTBearer()),
 ):
     """
@@ -73,18 +92,18 @@ async def put_pool(
 
     :return: the newly-inserted pool record
     """
-    if PoolService.get_pool_by_name(db=db, name=pool_data.name):
+    if await PoolService.get_pool_by_name(db=db, name=pool_data.name):
         raise HTTPException(status_code=409, detail="Name already registered")
     payload = decode_jwt_token(credentials)
     user_id = payload.get("user_id")
-    return PoolService.put_pool(db=db, pool_data=pool_data, user_id=user_id)
+    return await PoolService.put_pool(db=db, pool_data=pool_data, user_id=user_id)
 
 
 @router.patch("/{pool_id}", response_model=pool_schemas.Pool, status_code=200)
 async def patch_pool(
     pool_id: int,
     pool_data: pool_schemas.PoolPatch,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     credentials: str = Depends(JWTBearer()),
 ):
     """
@@ -101,19 +120,19 @@ async def patch_pool(
 
     :return: the updated pool record
     """
-    if not PoolService.get_pool_by_id(db=db, id=pool_id):
+    if not await PoolService.get_pool_by_id(db=db, id=pool_id):
         raise HTTPException(status_code=404, detail="Pool not found!")
-    if PoolService.get_pool_by_name(db=db, name=pool_data.name):
+    if await PoolService.get_pool_by_name(db=db, name=pool_data.name):
         raise HTTPException(status_code=409, detail="Name already registered")
     payload = decode_jwt_token(credentials)
     user_id = payload.get("user_id")
-    return PoolService.patch_pool(
+    return await PoolService.patch_pool(
         db=db, id=pool_id, pool_data=pool_data, user_id=user_id
     )
 
 
 @router.delete("/{pool_id}", status_code=200)
-async def delete_pool(pool_id: str, db: Session = Depends(get_db)):
+async def delete_pool(pool_id: str, db: AsyncSession = Depends(get_db)):
     """
     Deletes the pool with the given ID.
 
@@ -125,6 +144,80 @@ async def delete_pool(pool_id: str, db: Session = Depends(get_db)):
 
     :return: a json with a "detail" key indicating success
     """
-    if not PoolService.get_pool_by_id(db=db, id=pool_id):
+    if not await PoolService.get_pool_by_id(db=db, id=pool_id):
+        raise HTTPException(status_code=404, detail="Pool not found!")
+    return await PoolService.delete_pool(db=db, id=pool_id)
+
+
+@router.post(
+    "/{pool_id}/deploy",
+    response_model=model_schemas.ModelBatchJobResult,
+    status_code=200,
+)
+async def deploy_pool(
+    pool_id: int,
+    db: AsyncSession = Depends(get_db),
+    credentials: str = Depends(JWTBearer()),
+):
+    """
+    Queues a single job which deploys all models of the pool.
+    Models which cannot be deployed are skipped with a reason.
+
+    :param pool_id: pool ID
+    :param db: Database session
+    :param credentials: JWT token
+
+    :raise HTTPException: 404 status code with "Pool not found!" message
+    if the specified pool ID does not exist in the database.
+    :raise HTTPException: 429 status code with "Job queue is full!"
+
+    :return: the job ID, the IDs of the queued models and the reasons of the
+    skipped models
+    """
+    if not await PoolService.get_pool_by_id(db=db, id=pool_id):
+        raise HTTPException(status_code=404, detail="Pool not found!")
+    models = await ModelService.get_member_models_with_details(db=db, pool_id=pool_id)
+    user_id = decode_jwt_token(credentials).get("user_id")
+    try:
+        return await JobService.enqueue_model_batch(
+            db=db, kind=JobKind.DEPLOY, models=models, user_id=user_id
+        )
+    except JobQueueFull:
+        raise HTTPException(status_code=429, detail="Job queue is full!")
+
+
+@router.post(
+    "/{pool_id}/deactivate",
+    response_model=model_schemas.ModelBatchJobResult,
+    status_code=200,
+)
+async def deactivate_pool(
+    pool_id: int,
+    db: AsyncSession = Depends(get_db),
+    credentials: str = Depends(JWTBearer()),
+):
+    """
+    Queues a single job which deactivates all models of the pool.
+    Models which cannot be deactivated are skipped with a reason.
+
+    :param pool_id: pool ID
+    :param db: Database session
+    :param credentials: JWT token
+
+    :raise HTTPException: 404 status code with "Pool not found!" message
+    if the specified pool ID does not exist in the database.
+    :raise HTTPException: 429 status code with "Job queue is full!"
+
+    :return: the job ID, the IDs of the queued models and the reasons of the
+    skipped models
+    """
+    if not await PoolService.get_pool_by_id(db=db, id=pool_id):
         raise HTTPException(status_code=404, detail="Pool not found!")
-    return PoolService.delete_pool(db=db, id=pool_id)
+    models = await ModelService.get_member_models_with_details(db=db, pool_id=pool_id)
+    user_id = decode_jwt_token(credentials).get("user_id")
+    try:
+        return await JobService.enqueue_model_batch(
+            db=db, kind=JobKind.DEACTIVATE, models=models, user_id=user_id
+        )
+    except JobQueueFull:
+        raise HTTPException(status_code=429, detail="Job queue is full!")
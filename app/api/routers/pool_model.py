@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from schemas import pool_model as pool_model_schemas
 from services import PoolService, ModelService, PoolModelService, get_db
@@ -15,7 +15,7 @@ router = APIRouter(
     response_model=list[pool_model_schemas.PoolModelDetailed],
     status_code=200,
 )
-async def get_pool_models(pool_id: int, db: Session = Depends(get_db)):
+async def get_pool_models(pool_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieves a list of models in a pool.
 
@@ -27,9 +27,9 @@ async def get_pool_models(pool_id: int, db: Session = Depends(get_db)):
 
     :return: a list of models in the pool
     """
-    if not PoolService.get_pool_by_id(db=db, id=pool_id):
+    if not await PoolService.get_pool_by_id(db=db, id=pool_id):
         raise HTTPException(status_code=404, detail="Pool not found!")
-    return PoolModelService.get_pool_models(db=db, pool_id=pool_id)
+    return await PoolModelService.get_pool_models(db=db, pool_id=pool_id)
 
 
 @router.put(
@@ -41,7 +41,7 @@ async def put_pool_model(
     pool_id: int,
     model_id: int,
     pool_model_data: pool_model_schemas.PoolPutModel,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Inserts a model into a given pool.
@@ -60,15 +60,15 @@ async def put_pool_model(
 
     :return: the newly-inserted pool record
     """
-    if not PoolService.get_pool_by_id(db=db, id=pool_id):
+    if not await PoolService.get_pool_by_id(db=db, id=pool_id):
         raise HTTPException(status_code=404, detail="Pool not found!")
-    if not ModelService.get_model_by_id(db=db, model_id=model_id):
+    if not await ModelService.get_model_by_id(db=db, model_id=model_id):
         raise HTTPException(status_code=404, detail="Model not found!")
-    if PoolModelService.get_pool_model_by_model_id(db=db, id=model_id):
+    if await PoolModelService.get_pool_model_by_model_id(db=db, id=model_id):
         raise HTTPException(
             status_code=404, detail="Model already registered in the pool!"
         )
-    return PoolModelService.put_pool_model(
+    return await PoolModelService.put_pool_model(
         db=db, pool_id=pool_id, model_id=model_id, data=pool_model_data
     )
 
@@ -82,7 +82,7 @@ async def patch_pool_model(
     pool_id: int,
     model_id: int,
     pool_model_data: pool_model_schemas.PoolPatchModel,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Updates the information of an existing pool with the provided data and
@@ -102,19 +102,21 @@ async def patch_pool_model(
 
     :return: the updated pool record
     """
-    if not PoolService.get_pool_by_id(db=db, id=pool_id):
+    if not await PoolService.get_pool_by_id(db=db, id=pool_id):
         raise HTTPException(status_code=404, detail="Pool not found!")
-    if not ModelService.get_model_by_id(db=db, model_id=model_id):
+    if not await ModelService.get_model_by_id(db=db, model_id=model_id):
         raise HTTPException(status_code=404, detail="Model not found!")
-    if not PoolModelService.get_pool_model_by_model_id(db=db, id=model_id):
+    if not await PoolModelService.get_pool_model_by_model_id(db=db, id=model_id):
         raise HTTPException(status_code=404, detail="Model not found in the pool!")
-    return PoolModelService.patch_pool_model(
+    return await PoolModelService.patch_pool_model(
         db=db, pool_id=pool_id, model_id=model_id, data=pool_model_data
     )
 
 
 @router.delete("/{model_id}", status_code=200)
-async def delete_pool_model(pool_id: int, model_id: int, db: Session = Depends(get_db)):
+async def delete_pool_model(
+    pool_id: int, model_id: int, db: AsyncSession = Depends(get_db)
+):
     """
     Deletes the pool with the given ID.
 
@@ -132,10 +134,12 @@ async def delete_pool_model(pool_id: int, model_id: int, db: Session = Depends(g
 
     :return: a json with a "detail" key indicating success
     """
-    if not PoolService.get_pool_by_id(db=db, id=pool_id):
+    if not await PoolService.get_pool_by_id(db=db, id=pool_id):
         raise HTTPException(status_code=404, detail="Pool not found!")
-    if not ModelService.get_model_by_id(db=db, model_id=model_id):
+    if not await ModelService.get_model_by_id(db=db, model_id=model_id):
         raise HTTPException(status_code=404, detail="Model not found!")
-    if not PoolModelService.get_pool_model_by_model_id(db=db, id=model_id):
+    if not await PoolModelService.get_pool_model_by_model_id(db=db, id=model_id):
         raise HTTPException(status_code=404, detail="Model not found in the pool!")
-    return PoolModelService.delete_pool_model(db=db, model_id=model_id, pool_id=pool_id)
+    return await PoolModelService.delete_pool_model(
+        db=db, model_id=model_id, pool_id=pool_id
+    )
@@ -3,20 +3,22 @@ This module contains the API routes and their corresponding
 functions for handling test-related requests.
 """
 
-from fastapi import APIRouter, Query, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Query, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from schemas import test as test_schema
 from services import TestService, get_db
 from auth.jwt_bearer import JWTBearer
 from auth.jwt_handler import decode_jwt_token
+from utils.exception import InvalidCursor
+from utils.pagination import decode_cursor, next_cursor
 
 
 router = APIRouter(prefix="/test", tags=["test"], dependencies=[Depends(JWTBearer())])
 
 
 @router.get("/{test_id}", response_model=test_schema.Test, status_code=200)
-async def get_test(test_id: int, db: Session = Depends(get_db)):
+async def get_test(test_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieves the information of a specific test by ID.
 
@@ -28,7 +30,7 @@ async def get_test(test_id: int, db: Session = Depends(get_db)):
 
     :return: the test data corresponding to the given ID
     """
-    test = TestService.get_test_by_id(db=db, id=test_id)
+    test = await TestService.get_test_by_id(db=db, id=test_id)
     if not test:
         raise HTTPException(status_code=404, detail="Test not found!")
     return test
@@ -36,9 +38,11 @@ async def get_test(test_id: int, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=list[test_schema.Test], status_code=200)
 async def get_tests(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=0),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Retrieves a list of tests with pagination options (skip, limit).
@@ -46,20 +50,32 @@ async def get_tests(
     :param db: Database session
     :param skip: (optional) the number of records to skip (default: 0)
     :param limit: (optional) the maximum number of records to retrieve (default: 100)
+    :param cursor: (optional) the cursor of the next page from the X-Next-Cursor
+    header of the previous response, replaces skip
 
     :raise HTTPException: 404 status code with "Test not found!" message
     if the specified range of test ID's does not exist in the database.
+    :raise HTTPException: 400 status code with "Invalid cursor!" message
+    if the cursor is malformed.
 
     :return: a list of user data, where skip < test_id < limit
     """
-    tests = TestService.get_tests(db=db, skip=skip, limit=limit)
+    try:
+        after_id = decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor!")
+    tests = await TestService.get_tests(
+        db=db, skip=skip, limit=limit, after_id=after_id
+    )
+    if next_page := next_cursor(tests, limit):
+        response.headers["X-Next-Cursor"] = next_page
     return tests
 
 
 @router.put("/", response_model=test_schema.Test, status_code=201)
 async def put_test(
     test_data: test_schema.TestPut,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     credentials: str = Depends(JWTBearer()),
 ):
     """
@@ -74,18 +90,18 @@ async def put_test(
 
     :return: the newly-inserted test record
     """
-    if TestService.get_test_by_name(db=db, name=test_data.name):
+    if await TestService.get_test_by_name(db=db, name=test_data.name):
         raise HTTPException(status_code=409, detail="Name already registered")
     payload = decode_jwt_token(credentials)
     user_id = payload.get("user_id")
-    return TestService.put_test(db=db, test_data=test_data, user_id=user_id)
+    return await TestService.put_test(db=db, test_data=test_data, user_id=user_id)
 
 
 @router.patch("/{test_id}", response_model=test_schema.Test, status_code=200)
 async def patch_test(
     test_id: int,
     test_data: test_schema.TestPatch,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     credentials: str = Depends(JWTBearer()),
 ):
     """
@@ -102,19 +118,19 @@ async def patch_test(
 
     :return: the updated test record
     """
-    if not TestService.get_test_by_id(db=db, id=test_id):
+    if not await TestService.get_test_by_id(db=db, id=test_id):
         raise HTTPException(status_code=404, detail="Test not found!")
-    if TestService.get_test_by_name(db=db, name=test_data.name):
+    if await TestService.get_test_by_name(db=db, name=test_data.name):
         raise HTTPException(status_code=409, detail="Name already registered")
     payload = decode_jwt_token(credentials)
     user_id = payload.get("user_id")
-    return TestService.patch_test(
+    return await TestService.patch_test(
         db=db, id=test_id, test_data=test_data, user_id=user_id
     )
 
 
 @router.delete("/{test_id}", status_code=200)
-async def delete_test(test_id: int, db: Session = Depends(get_db)):
+async def delete_test(test_id: int, db: AsyncSession = Depends(get_db)):
     """
     Deletes a test with the given ID and returns the test information.
 
@@ -126,7 +142,7 @@ async def delete_test(test_id: int, db: Session = Depends(get_db)):
 
     :return: the deleted test record
     """
-    test = TestService.get_test_by_id(db=db, id=test_id)
+    test = await TestService.get_test_by_id(db=db, id=test_id)
     if not test:
         raise HTTPException(status_code=404, detail="Test not found!")
-    return TestService.delete_test(db=db, id=test_id)
+    return await TestService.delete_test(db=db, id=test_id)
@@ -3,19 +3,21 @@ This module contains the API routes and their corresponding
 functions for handling user-related requests.
 """
 
-from fastapi import APIRouter, Query, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Query, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from schemas import user as user_schemas
 from services import UserService, get_db
 from auth.jwt_bearer import JWTBearer
+from utils.exception import InvalidCursor
+from utils.pagination import decode_cursor, next_cursor
 
 
 router = APIRouter(prefix="/user", tags=["user"], dependencies=[Depends(JWTBearer())])
 
 
 @router.get("/{user_id}", response_model=user_schemas.User, status_code=200)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieves the information of a specific user by ID.
 
@@ -27,7 +29,7 @@ async def get_user(user_id: int, db: Session = Depends(get_db)):
 
     :return: the user data corresponding to the given ID
     """
-    user = UserService.get_user_by_id(db=db, id=user_id)
+    user = await UserService.get_user_by_id(db=db, id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found!")
     return user
@@ -35,9 +37,11 @@ async def get_user(user_id: int, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=list[user_schemas.User], status_code=200)
 async def get_users(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=0),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Retrieves a list of users with pagination options (skip, limit).
@@ -45,18 +49,30 @@ async def get_users(
     :param db: Database session
     :param skip: (optional) the number of records to skip (default: 0)
     :param limit: (optional) the maximum number of records to retrieve (default: 100)
+    :param cursor: (optional) the cursor of the next page from the X-Next-Cursor
+    header of the previous response, replaces skip
 
     :raise HTTPException: 404 status code with "User not found!" message
     if the specified range of user ID's does not exist in the database.
+    :raise HTTPException: 400 status code with "Invalid cursor!" message
+    if the cursor is malformed.
 
     :return: a list of user data, where skip < user_id < limit
     """
-    users = UserService.get_users(skip=skip, limit=limit, db=db)
+    try:
+        after_id = decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor!")
+    users = await UserService.get_users(
+        skip=skip, limit=limit, after_id=after_id, db=db
+    )
+    if next_page := next_cursor(users, limit):
+        response.headers["X-Next-Cursor"] = next_page
     return users
 
 
 @router.put("/", response_model=user_schemas.User, status_code=201)
-async def put_user(user_data: user_schemas.UserPut, db: Session = Depends(get_db)):
+async def put_user(user_data: user_schemas.UserPut, db: AsyncSession = Depends(get_db)):
     """
     Creates a new user with the given information and returns the user information.
 
@@ -68,14 +84,14 @@ async def put_user(user_data: user_schemas.UserPut, db: Session = Depends(get_db
 
     :return: the newly-inserted user record
     """
-    if UserService.get_user_by_email(db=db, email=user_data.email):
+    if await UserService.get_user_by_email(db=db, email=user_data.email):
         raise HTTPException(status_code=409, detail="Email already registered")
-    return UserService.put_user(db=db, user_data=user_data)
+    return await UserService.put_user(db=db, user_data=user_data)
 
 
 @router.patch("/{user_id}", response_model=user_schemas.User, status_code=200)
 async def patch_user(
-    user_id: int, user_data: user_schemas.UserPatch, db: Session = Depends(get_db)
+    user_id: int, user_data: user_schemas.UserPatch, db: AsyncSession = Depends(get_db)
 ):
     """
     Updates the information of an existing user with the provided data and
@@ -92,15 +108,15 @@ async def patch_user(
 
     :return: the updated user record
     """
-    if not UserService.get_user_by_id(db=db, id=user_id):
+    if not await UserService.get_user_by_id(db=db, id=user_id):
         raise HTTPException(status_code=404, detail="User not found!")
-    if UserService.get_user_by_email(db=db, email=user_data.email):
+    if await UserService.get_user_by_email(db=db, email=user_data.email):
         raise HTTPException(status_code=409, detail="Email already registered")
-    return UserService.patch_user(db=db, user_id=user_id, user_data=user_data)
+    return await UserService.patch_user(db=db, user_id=user_id, user_data=user_data)
 
 
 @router.delete("/{user_id}", status_code=200)
-async def delete_user(user_id: int, db: Session = Depends(get_db)):
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
     """
     Deletes the user with the specified email.
 
@@ -112,6 +128,6 @@ async def delete_user(user_id: int, db: Session = Depends(get_db)):
 
     :return: the updated user record
     """
-    if not UserService.get_user_by_id(db=db, id=user_id):
+    if not await UserService.get_user_by_id(db=db, id=user_id):
         raise HTTPException(status_code=404, detail="User not found!")
-    return UserService.delete_user(db=db, id=user_id)
+    return await UserService.delete_user(db=db, id=user_id)
@@ -0,0 +1,19 @@
+from typing import Annotated
+from pydantic import BaseModel, Field
+
+
+class DbPoolStatus(BaseModel):
+    size: Annotated[int, Field(description="Number of persistent connections")]
+    max_overflow: Annotated[int, Field(description="Max connections above size")]
+    timeout: Annotated[float, Field(description="Seconds to wait for a connection")]
+    recycle: Annotated[int, Field(description="Max connection age in seconds")]
+    pre_ping: Annotated[bool, Field(description="Ping connections on checkout")]
+    idle: Annotated[int, Field(description="Connections idle in the pool")]
+    checked_out: Annotated[int, Field(description="Connections in use")]
+    overflow: Annotated[int, Field(description="Connections above size in use")]
+    checkouts: Annotated[int, Field(description="Total checkouts")]
+    timeouts: Annotated[int, Field(description="Checkouts which timed out")]
+    connections_created: Annotated[int, Field(description="Opened connections")]
+    wait_avg_ms: Annotated[float, Field(description="Average checkout wait")]
+    wait_p95_ms: Annotated[float, Field(description="95th percentile checkout wait")]
+    wait_max_ms: Annotated[float, Field(description="Max checkout wait")]
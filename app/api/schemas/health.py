@@ -0,0 +1,13 @@
+from typing import Annotated
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+from utils.warmup import WarmupStatus
+
+
+class Warmup(BaseModel):
+    name: Annotated[str, Field(description="Warm-up task name")]
+    status: Annotated[WarmupStatus, Field(description="Warm-up task status")]
+    error: Annotated[str | None, Field(description="Error of a failed warm-up")]
+    started_at: Annotated[datetime | None, Field(description="Start date")]
+    finished_at: Annotated[datetime | None, Field(description="Finish date")]
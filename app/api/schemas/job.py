@@ -0,0 +1,25 @@
+from typing import Annotated, Any
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+from models.job import JobKind, JobStatus
+
+
+class Job(BaseModel):
+    id: Annotated[int, Field(description="Job ID")]
+    kind: Annotated[JobKind, Field(description="Job kind")]
+    status: Annotated[JobStatus, Field(description="Job status")]
+    model_id: Annotated[int | None, Field(description="Model ID")]
+    result: Annotated[Any | None, Field(description="Job result")] = None
+    attempts: Annotated[int, Field(description="Number of started attempts")]
+    max_attempts: Annotated[int, Field(description="Max number of attempts")]
+    run_after: Annotated[datetime, Field(description="Earliest start of next attempt")]
+    last_error: Annotated[str | None, Field(description="Error of last attempt")]
+    created_by: Annotated[int | None, Field(description="User ID of the creator")]
+    created_at: Annotated[datetime, Field(description="Creation date")]
+    updated_at: Annotated[datetime, Field(description="Last update date")]
+    started_at: Annotated[datetime | None, Field(description="Last start date")]
+    finished_at: Annotated[datetime | None, Field(description="Finish date")]
+
+    class Config:
+        orm_mode = True
@@ -31,6 +31,100 @@ class Model(ModelBase):
         orm_mode = True
 
 
+class ModelBuildBatch(BaseModel):
+    model_ids: Annotated[
+        list[int], Field(description="IDs of the models to build", min_items=1)
+    ]
+
+
+class ModelBuildBatchResult(BaseModel):
+    detail: Annotated[str, Field(description="Result message")]
+    jobs: Annotated[dict[int, int], Field(description="Job ID by model ID")]
+    skipped: Annotated[dict[int, str], Field(description="Reason by model ID")]
+
+
+class ModelBuildQueue(BaseModel):
+    queued: Annotated[int, Field(description="Builds waiting for a slot")]
+    running: Annotated[int, Field(description="Builds in progress")]
+    nodes: Annotated[int, Field(description="Nodes running builds")]
+    capacity: Annotated[int, Field(description="Build slots of a node")]
+    avg_build_seconds: Annotated[
+        float | None, Field(description="Average duration of recent builds")
+    ]
+    eta_seconds: Annotated[
+        float | None, Field(description="Estimated seconds until the queue is done")
+    ]
+
+
+class ModelPushProgress(BaseModel):
+    image_tag: Annotated[str, Field(description="Registry tag of the image")]
+    status: Annotated[str, Field(description="pushing, pushed, skipped or failed")]
+    layers: Annotated[int, Field(description="Number of layers")]
+    layers_pushed: Annotated[int, Field(description="Layers uploaded")]
+    layers_existing: Annotated[int, Field(description="Layers already in registry")]
+    bytes_pushed: Annotated[int, Field(description="Bytes uploaded so far")]
+    bytes_total: Annotated[int, Field(description="Bytes of the uploaded layers")]
+    throughput_bps: Annotated[float, Field(description="Upload bytes per second")]
+    elapsed_seconds: Annotated[float, Field(description="Duration of the push")]
+    digest: Annotated[str | None, Field(description="Digest of the pushed image")]
+    error: Annotated[str | None, Field(description="Error of a failed push")]
+
+
+class ModelBatchJobResult(BaseModel):
+    detail: Annotated[str, Field(description="Outcome of the request")]
+    job_id: Annotated[int | None, Field(description="Job working on the models")]
+    model_ids: Annotated[list[int], Field(description="IDs of the queued models")]
+    skipped: Annotated[
+        dict[int, str], Field(description="Reasons of skipped models by model ID")
+    ]
+
+
+class ModelRollout(BaseModel):
+    deployment: Annotated[bool, Field(description="Deployment exists")]
+    service: Annotated[bool, Field(description="Service exists")]
+    autoscaler: Annotated[bool, Field(description="Autoscaler exists")]
+    replicas: Annotated[int, Field(description="Desired replicas")]
+    ready_replicas: Annotated[int, Field(description="Ready replicas")]
+    pods: Annotated[
+        dict[str, str | None], Field(description="Phases of the pods by name")
+    ]
+
+
+class ModelShadowDiff(BaseModel):
+    time: Annotated[datetime, Field(description="Time of the response")]
+    production_model: Annotated[str, Field(description="Production model name")]
+    status_code: Annotated[int, Field(description="Status code")]
+    production_status_code: Annotated[
+        int, Field(description="Status code of the production model")
+    ]
+    body: Annotated[str, Field(description="Beginning of the body")]
+    production_body: Annotated[
+        str, Field(description="Beginning of the body of the production model")
+    ]
+    latency_ms: Annotated[float, Field(description="Latency in milliseconds")]
+    production_latency_ms: Annotated[
+        float, Field(description="Latency of the production model in milliseconds")
+    ]
+
+
+class ModelShadowStats(BaseModel):
+    mirrored: Annotated[int, Field(description="Mirrored requests")]
+    dropped: Annotated[int, Field(description="Requests dropped, queue was full")]
+    failed: Annotated[int, Field(description="Requests without response")]
+    mismatched: Annotated[int, Field(description="Responses differing from production")]
+    latency_ms: Annotated[
+        float | None, Field(description="Mean latency in milliseconds")
+    ]
+    production_latency_ms: Annotated[
+        float | None,
+        Field(description="Mean latency of production in milliseconds"),
+    ]
+    diffs: Annotated[
+        list[ModelShadowDiff],
+        Field(description="Recent responses differing from production"),
+    ]
+
+
 class ModelTest(BaseModel):
     id: Annotated[int, Field(description="ModelTest ID")]
     model_id: Annotated[int, Field(description="Model id")]
@@ -31,6 +31,9 @@ class ModelDetailsPatch(ModelDetailsBase):
 class ModelDetails(ModelDetailsBase):
     id: Annotated[int, Field(description="ModelDetails ID")]
     model_id: Annotated[int, Field(description="Model ID")]
+    image_digest: Annotated[
+        str | None, Field(description="Digest of the pushed image")
+    ] = None
 
     class Config:
         orm_mode = True
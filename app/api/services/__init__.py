@@ -8,3 +8,6 @@ from services.model_details import ModelDetailsService  # noqa: F401
 from services.gate_pool import GatePoolService  # noqa: F401
 from services.pool_model import PoolModelService  # noqa: F401
 from services.mlflow_server import MlflowServerService  # noqa: F401
+from services.build_cache import BuildCacheService  # noqa: F401
+from services.job import JobService  # noqa: F401
+from services.job_worker import JobWorker  # noqa: F401
@@ -0,0 +1,87 @@
+"""
+This module provides services which are used to manage the content-addressed
+build cache. Images are looked up by the fingerprint of the model artifact.
+"""
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+
+from models.build_cache import BuildCache
+
+
+class BuildCacheService:
+    """
+    Contains methods for interacting with the build_cache table.
+    """
+
+    @classmethod
+    async def get_build_cache_by_fingerprint(
+        cls, db: AsyncSession, fingerprint: str
+    ) -> BuildCache | None:
+        """
+        Returns the cached image found by artifact fingerprint
+
+        :param db: Database session
+        :param fingerprint: the artifact fingerprint
+
+        :return: the cached image or None if the artifact was not built yet
+        """
+        return await db.scalar(
+            select(BuildCache).where(BuildCache.fingerprint == fingerprint)
+        )
+
+    @classmethod
+    async def put_build_cache(
+        cls, db: AsyncSession, fingerprint: str, image_tag: str, image_digest: str
+    ) -> BuildCache:
+        """
+        Records the image built from an artifact. An existing entry of the
+        fingerprint is replaced.
+
+        :param db: Database session
+        :param fingerprint: the artifact fingerprint
+        :param image_tag: registry tag of the pushed image
+        :param image_digest: digest of the pushed image
+
+        :return: the cache entry
+        """
+        now = datetime.utcnow()
+        db_build_cache = await cls.get_build_cache_by_fingerprint(db, fingerprint)
+        if db_build_cache is None:
+            db_build_cache = BuildCache(fingerprint=fingerprint, hits=0, created_at=now)
+        db_build_cache.image_tag = image_tag
+        db_build_cache.image_digest = image_digest
+        db_build_cache.last_used_at = now
+        db.add(db_build_cache)
+        await db.commit()
+        await db.refresh(db_build_cache)
+        return db_build_cache
+
+    @classmethod
+    async def hit_build_cache(cls, db: AsyncSession, id: int) -> None:
+        """
+        Counts a reuse of a cached image
+
+        :param db: Database session
+        :param id: the cache entry ID
+        """
+        await db.execute(
+            update(BuildCache)
+            .where(BuildCache.id == id)
+            .values(hits=BuildCache.hits + 1, last_used_at=datetime.utcnow())
+        )
+        await db.commit()
+
+    @classmethod
+    async def delete_build_cache(cls, db: AsyncSession, id: int) -> None:
+        """
+        Removes a cache entry whose image can no longer be used
+
+        :param db: Database session
+        :param id: the cache entry ID
+        """
+        db_build_cache = await db.get(BuildCache, id)
+        if db_build_cache is not None:
+            await db.delete(db_build_cache)
+            await db.commit()
@@ -3,20 +3,17 @@ This module provides functions for implementing Dependency Injection for API.
 """
 
 from db.session import SessionLocal
-from typing import Generator
+from typing import AsyncGenerator
 
 
-def get_db() -> Generator:
+async def get_db() -> AsyncGenerator:
     """
-    This function creates a database session using the SessionLocal() method from
-    SQLAlchemy, and yields it as a generator object.
+    This function creates an asynchronous database session using the
+    SessionLocal() method from SQLAlchemy, and yields it as a generator object.
 
     After lifetime of generator object ends, database session will be closed
 
     :return: Generator object containing the database session.
     """
-    try:
-        db = SessionLocal()
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -3,17 +3,23 @@ This module provides services which are used
 to send requests directly to the database
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
 from datetime import datetime
 
 from schemas import gate as gate_schemas
 from models import gate as gate_models
+from models.model import Model
+from models.pool import PoolModel, PoolModelMode
+from db.notify import ROUTING_CHANNEL, notify
+from utils.routing import routing_tables
+from utils.pagination import paginate
 
 
 class GateService:
     @classmethod
-    def get_gate_by_id(cls, db: Session, id: int) -> gate_models.Gate | None:
+    async def get_gate_by_id(cls, db: AsyncSession, id: int) -> gate_models.Gate | None:
         """
         Returns the gate data found by gate id
 
@@ -22,10 +28,14 @@ class GateService:
 
         :return: the gate data corresponding to the given ID or None if not found
         """
-        return db.query(gate_models.Gate).filter(gate_models.Gate.id == id).first()
+        return await db.scalar(
+            select(gate_models.Gate).where(gate_models.Gate.id == id)
+        )
 
     @classmethod
-    def get_gate_by_name(cls, db: Session, name: str) -> gate_models.Gate | None:
+    async def get_gate_by_name(
+        cls, db: AsyncSession, name: str
+    ) -> gate_models.Gate | None:
         """
         Returns the gate data found by gate name
 
@@ -34,11 +44,63 @@ class GateService:
 
         :return: the gate data corresponding to the given name or None if not found
         """
-        return db.query(gate_models.Gate).filter(gate_models.Gate.name == name).first()
+        return await db.scalar(
+            select(gate_models.Gate).where(gate_models.Gate.name == name)
+        )
 
     @classmethod
-    def get_gates(
-        cls, db: Session, skip: int = 0, limit: int = 100
+    async def get_routes(
+        cls, db: AsyncSession
+    ) -> list[tuple[str, PoolModelMode | None, str | None, int | None]]:
+        """
+        Returns the deployed models of the pools of every gate with their
+        modes and weights. Weights of a model in several pools of a gate in
+        the same mode are added up. Models being redeployed, or whose redeploy
+        failed, still serve with their previous replicas and are included.
+
+        :param db: Database session
+
+        :return: list of gate names, modes, model names and weights, with a
+        single row without model for gates without deployed models
+        """
+        return (
+            await db.execute(
+                select(
+                    gate_models.Gate.name,
+                    PoolModel.mode,
+                    Model.name,
+                    func.sum(PoolModel.weight),
+                )
+                .select_from(gate_models.Gate)
+                .outerjoin(
+                    gate_models.GatePool,
+                    gate_models.GatePool.gate_id == gate_models.Gate.id,
+                )
+                .outerjoin(
+                    PoolModel,
+                    (PoolModel.pool_id == gate_models.GatePool.pool_id)
+                    # Staging models only receive copies, their weight is unused
+                    & (
+                        (PoolModel.mode == PoolModelMode.STAGING)
+                        | (PoolModel.weight > 0)
+                    ),
+                )
+                .outerjoin(
+                    Model,
+                    (Model.id == PoolModel.model_id) & Model.deployed_at.is_not(None),
+                )
+                .group_by(gate_models.Gate.name, PoolModel.mode, Model.name)
+                .order_by(gate_models.Gate.name, Model.name)
+            )
+        ).all()
+
+    @classmethod
+    async def get_gates(
+        cls,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: int | None = None,
     ) -> list[gate_models.Gate]:
         """
         Returns a list of gate data, with optional pagination
@@ -47,15 +109,23 @@ class GateService:
         :param skip: (optional) the number of records to skip (default: 0)
         :param limit: (optional) the maximum number of records to retrieve
         (default: 100)
+        :param after_id: (optional) ID of the last record of the previous page,
+        replaces skip
 
         :return: a list of gate data, where skip < gate_id < limit
         """
-        models = db.query(gate_models.Gate).offset(skip).limit(limit).all()
+        models = (
+            await db.scalars(
+                paginate(
+                    select(gate_models.Gate), gate_models.Gate.id, skip, limit, after_id
+                )
+            )
+        ).all()
         return models
 
     @classmethod
-    def put_gate(
-        cls, db: Session, gate_data: gate_schemas.GatePut, user_id: int
+    async def put_gate(
+        cls, db: AsyncSession, gate_data: gate_schemas.GatePut, user_id: int
     ) -> gate_models.Gate:
         """
         Inserts a new gate record into the database
@@ -73,13 +143,19 @@ class GateService:
         db_gate.created_at = creation_time
         db_gate.updated_at = creation_time
         db.add(db_gate)
-        db.commit()
-        db.refresh(db_gate)
+        await notify(db, ROUTING_CHANNEL, {})
+        await db.commit()
+        routing_tables.invalidate()
+        await db.refresh(db_gate)
         return db_gate
 
     @classmethod
-    def patch_gate(
-        cls, db: Session, gate_id: int, gate_data: gate_schemas.GatePatch, user_id: int
+    async def patch_gate(
+        cls,
+        db: AsyncSession,
+        gate_id: int,
+        gate_data: gate_schemas.GatePatch,
+        user_id: int,
     ) -> gate_models.Gate:
         """
         Updates an existing gate record in the database
@@ -91,18 +167,20 @@ class GateService:
 
         :return: the updated gate record
         """
-        db_gate = GateService.get_gate_by_id(db=db, id=gate_id)
+        db_gate = await GateService.get_gate_by_id(db=db, id=gate_id)
         for key, value in gate_data.dict(exclude_none=True).items():
             setattr(db_gate, key, value)
         db_gate.updated_at = datetime.utcnow()
         db_gate.updated_by = user_id
         db.add(db_gate)
-        db.commit()
-        db.refresh(db_gate)
+        await notify(db, ROUTING_CHANNEL, {})
+        await db.commit()
+        routing_tables.invalidate()
+        await db.refresh(db_gate)
         return db_gate
 
     @classmethod
-    def delete_gate(cls, db: Session, id: str) -> JSONResponse:
+    async def delete_gate(cls, db: AsyncSession, id: str) -> JSONResponse:
         """
         Deletes a gate record from the database
 
@@ -111,6 +189,8 @@ class GateService:
 
         :return: a json with a "detail" key indicating success
         """
-        db.query(gate_models.Gate).filter(gate_models.Gate.id == id).delete()
-        db.commit()
+        await db.execute(delete(gate_models.Gate).where(gate_models.Gate.id == id))
+        await notify(db, ROUTING_CHANNEL, {})
+        await db.commit()
+        routing_tables.invalidate()
         return JSONResponse({"detail": "Gate deleted successfully!"})
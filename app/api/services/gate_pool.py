@@ -1,7 +1,11 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
 
 from models import gate as gate_pool_models
+from db.notify import ROUTING_CHANNEL, notify
+from utils.routing import routing_tables
+from utils.pagination import paginate
 
 
 class GatePoolService:
@@ -10,8 +14,8 @@ class GatePoolService:
     """
 
     @classmethod
-    def get_gate_pool_by_pool_id(
-        cls, db: Session, gate_id: int, pool_id: int
+    async def get_gate_pool_by_pool_id(
+        cls, db: AsyncSession, gate_id: int, pool_id: int
     ) -> gate_pool_models.GatePool:
         """
         Returns the pool in the given gate pool data found by pool ID
@@ -21,15 +25,16 @@ class GatePoolService:
 
         :return: the gate pool data corresponding to the given IDs or None if not found
         """
-        return (
-            db.query(gate_pool_models.GatePool)
-            .filter(gate_pool_models.GatePool.gate_id == gate_id)
-            .filter(gate_pool_models.GatePool.pool_id == pool_id)
-            .first()
+        return await db.scalar(
+            select(gate_pool_models.GatePool)
+            .where(gate_pool_models.GatePool.gate_id == gate_id)
+            .where(gate_pool_models.GatePool.pool_id == pool_id)
         )
 
     @classmethod
-    def get_gate_pool_by_id(cls, db: Session, id: int) -> gate_pool_models.GatePool:
+    async def get_gate_pool_by_id(
+        cls, db: AsyncSession, id: int
+    ) -> gate_pool_models.GatePool:
         """
         Returns the gate pool data found by ID
 
@@ -37,15 +42,20 @@ class GatePoolService:
 
         :return: the gate pool data corresponding to the given ID or None if not found
         """
-        return (
-            db.query(gate_pool_models.GatePool)
-            .filter(gate_pool_models.GatePool.gate_id == id)
-            .first()
+        return await db.scalar(
+            select(gate_pool_models.GatePool).where(
+                gate_pool_models.GatePool.gate_id == id
+            )
         )
 
     @classmethod
-    def get_gate_pools(
-        cls, db: Session, gate_id: int, skip: int, limit: int
+    async def get_gate_pools(
+        cls,
+        db: AsyncSession,
+        gate_id: int,
+        skip: int,
+        limit: int,
+        after_id: int | None = None,
     ) -> list[gate_pool_models.GatePool]:
         """
         Returns a list of gate pools, with optional pagination
@@ -55,22 +65,30 @@ class GatePoolService:
         :param skip: (optional) the number of records to skip (default: 0)
         :param limit: (optional) the maximum number of records to retrieve
         (default: 100)
+        :param after_id: (optional) ID of the last record of the previous page,
+        replaces skip
 
         :return: a list of gate pools, where skip < GatePool.id < limit
         """
         gate_pools = (
-            db.query(gate_pool_models.GatePool)
-            .filter(gate_pool_models.GatePool.gate_id == gate_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+            await db.scalars(
+                paginate(
+                    select(gate_pool_models.GatePool).where(
+                        gate_pool_models.GatePool.gate_id == gate_id
+                    ),
+                    gate_pool_models.GatePool.id,
+                    skip,
+                    limit,
+                    after_id,
+                )
+            )
+        ).all()
 
         return gate_pools
 
     @classmethod
-    def put_pool_gate(
-        cls, db: Session, gate_id: int, pool_id: int
+    async def put_pool_gate(
+        cls, db: AsyncSession, gate_id: int, pool_id: int
     ) -> gate_pool_models.GatePool:
         """
         Inserts a new gate pool record into the database
@@ -83,14 +101,16 @@ class GatePoolService:
         """
         db_gate_pool = gate_pool_models.GatePool(pool_id=pool_id, gate_id=gate_id)
         db.add(db_gate_pool)
-        db.commit()
-        db.refresh(db_gate_pool)
+        await notify(db, ROUTING_CHANNEL, {})
+        await db.commit()
+        routing_tables.invalidate()
+        await db.refresh(db_gate_pool)
         return db_gate_pool
 
     @classmethod
-    def delete_pool_gate(
+    async def delete_pool_gate(
         cls,
-        db: Session,
+        db: AsyncSession,
         gate_id: int,
         pool_id: int,
     ) -> JSONResponse:
@@ -103,8 +123,12 @@ class GatePoolService:
 
         :return: JSONResponse with a "detail" key indicating success
         """
-        db.query(gate_pool_models.GatePool).filter(
-            gate_pool_models.GatePool.gate_id == gate_id
-        ).filter(gate_pool_models.GatePool.pool_id == pool_id).delete()
-        db.commit()
+        await db.execute(
+            delete(gate_pool_models.GatePool)
+            .where(gate_pool_models.GatePool.gate_id == gate_id)
+            .where(gate_pool_models.GatePool.pool_id == pool_id)
+        )
+        await notify(db, ROUTING_CHANNEL, {})
+        await db.commit()
+        routing_tables.invalidate()
         return JSONResponse(content={"detail": "success"})
@@ -0,0 +1,555 @@
+"""
+This module provides services which are used to manage the background job queue.
+
+Jobs are leased by workers for a limited time. A worker keeps the lease alive with
+heartbeats, so a job of a crashed worker is picked up again by another one.
+"""
+
+from sqlalchemy import select, update, func, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+
+from config.config import settings
+from models.job import Job, JobKind, JobStatus
+from models.model import Model
+from models.model_details import ModelDetails
+from utils.exception import JobAlreadyPending, JobQueueFull
+from .model import ModelService
+
+
+class JobService:
+    """
+    Contains methods for interacting with the job table.
+    """
+
+    @classmethod
+    async def get_job_by_id(cls, db: AsyncSession, job_id: int) -> Job | None:
+        """
+        Returns the job found by job id
+
+        :param db: Database session
+        :param job_id: the job ID to retrieve
+
+        :return: the job corresponding to the given ID or None if not found
+        """
+        return await db.scalar(select(Job).where(Job.id == job_id))
+
+    @classmethod
+    async def get_active_job(cls, db: AsyncSession, model_id: int) -> Job | None:
+        """
+        Returns a queued or running job of a model
+
+        :param db: Database session
+        :param model_id: the model ID
+
+        :return: the active job of the model or None if there is none
+        """
+        jobs = await JobService.get_active_jobs(db=db, model_ids=[model_id])
+        return jobs[0] if jobs else None
+
+    @classmethod
+    async def get_active_jobs(cls, db: AsyncSession, model_ids: list[int]) -> list[Job]:
+        """
+        Returns the queued or running jobs of several models, including batch
+        jobs working on any of them
+
+        :param db: Database session
+        :param model_ids: the model IDs
+
+        :return: list of active jobs of the models
+        """
+        jobs = (
+            await db.scalars(
+                select(Job)
+                .where(or_(Job.model_id.in_(model_ids), Job.model_id.is_(None)))
+                .where(Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+            )
+        ).all()
+        return [
+            job
+            for job in jobs
+            if not set(model_ids).isdisjoint(JobService.get_job_model_ids(job))
+        ]
+
+    @staticmethod
+    def is_batch_job(job: Job) -> bool:
+        """
+        Checks whether a job works on several models. The model of a single
+        job is not a marker, it is unset when the model is deleted.
+
+        :param job: the job
+        :return: True if the payload of the job lists its models
+        """
+        return "model_ids" in (job.payload or {})
+
+    @staticmethod
+    def get_job_model_ids(job: Job) -> list[int]:
+        """
+        Returns the models a job works on
+
+        :param job: the job
+        :return: the model IDs of a batch job or the model ID of the job, none
+        if its model was deleted
+        """
+        if JobService.is_batch_job(job):
+            return job.payload["model_ids"]
+        return [job.model_id] if job.model_id is not None else []
+
+    @classmethod
+    async def count_queued_jobs(cls, db: AsyncSession) -> int:
+        """
+        Returns the number of jobs waiting for a worker
+
+        :param db: Database session
+
+        :return: number of queued jobs
+        """
+        return await db.scalar(
+            select(func.count()).select_from(Job).where(Job.status == JobStatus.QUEUED)
+        )
+
+    @classmethod
+    async def put_job(
+        cls,
+        db: AsyncSession,
+        kind: JobKind,
+        model_id: int | None,
+        user_id: int | None,
+        payload: dict | None = None,
+    ) -> Job:
+        """
+        Inserts a new queued job into the database
+
+        :param db: Database session
+        :param kind: kind of the job
+        :param model_id: the model ID the job works on
+        :param user_id: the user ID of the user creating the job
+        :param payload: (optional) additional arguments of the job
+
+        :return: the newly-inserted job
+        """
+        creation_time = datetime.utcnow()
+        db_job = Job(
+            kind=kind,
+            status=JobStatus.QUEUED,
+            model_id=model_id,
+            payload=payload,
+            attempts=0,
+            max_attempts=settings.JOB_MAX_ATTEMPTS,
+            run_after=creation_time,
+            created_by=user_id,
+            created_at=creation_time,
+            updated_at=creation_time,
+        )
+        db.add(db_job)
+        await db.commit()
+        await db.refresh(db_job)
+        return db_job
+
+    @classmethod
+    async def put_jobs(
+        cls,
+        db: AsyncSession,
+        kind: JobKind,
+        model_ids: list[int],
+        user_id: int | None,
+    ) -> list[Job]:
+        """
+        Inserts a queued job for each of the models in a single transaction
+
+        :param db: Database session
+        :param kind: kind of the jobs
+        :param model_ids: the model IDs the jobs work on
+        :param user_id: the user ID of the user creating the jobs
+
+        :return: the newly-inserted jobs in the order of the model IDs
+        """
+        creation_time = datetime.utcnow()
+        db_jobs = [
+            Job(
+                kind=kind,
+                status=JobStatus.QUEUED,
+                model_id=model_id,
+                attempts=0,
+                max_attempts=settings.JOB_MAX_ATTEMPTS,
+                run_after=creation_time,
+                created_by=user_id,
+                created_at=creation_time,
+                updated_at=creation_time,
+            )
+            for model_id in model_ids
+        ]
+        db.add_all(db_jobs)
+        await db.commit()
+        return db_jobs
+
+    @classmethod
+    async def enqueue_job(
+        cls,
+        db: AsyncSession,
+        kind: JobKind,
+        model_id: int | None,
+        user_id: int | None,
+        payload: dict | None = None,
+    ) -> Job:
+        """
+        Queues a job for the background workers
+
+        :param db: Database session
+        :param kind: kind of the job
+        :param model_id: the model ID the job works on
+        :param user_id: the user ID of the user creating the job
+        :param payload: (optional) additional arguments of the job
+
+        :raise JobAlreadyPending: if a job of the model is queued or running
+        :raise JobQueueFull: if the number of queued jobs reached the limit
+
+        :return: the queued job
+        """
+        if model_id is not None and await cls.get_active_job(db=db, model_id=model_id):
+            raise JobAlreadyPending(model_id)
+        if await cls.count_queued_jobs(db=db) >= settings.JOB_QUEUE_LIMIT:
+            raise JobQueueFull()
+        return await cls.put_job(
+            db=db, kind=kind, model_id=model_id, user_id=user_id, payload=payload
+        )
+
+    @classmethod
+    async def enqueue_jobs(
+        cls,
+        db: AsyncSession,
+        kind: JobKind,
+        model_ids: list[int],
+        user_id: int | None,
+    ) -> tuple[list[Job], list[int]]:
+        """
+        Queues a job of the same kind for each of the models at once. Models
+        which already have a queued or running job are skipped.
+
+        :param db: Database session
+        :param kind: kind of the jobs
+        :param model_ids: the model IDs the jobs work on
+        :param user_id: the user ID of the user creating the jobs
+
+        :raise JobQueueFull: if the queue cannot take all of the jobs
+
+        :return: the queued jobs and the IDs of the skipped models
+        """
+        busy = await cls.__busy_model_ids(db, model_ids)
+        model_ids = [model_id for model_id in model_ids if model_id not in busy]
+        queued = await cls.count_queued_jobs(db=db)
+        if model_ids and queued + len(model_ids) > settings.JOB_QUEUE_LIMIT:
+            raise JobQueueFull()
+        jobs = await cls.put_jobs(
+            db=db, kind=kind, model_ids=model_ids, user_id=user_id
+        )
+        return jobs, sorted(busy)
+
+    @classmethod
+    async def enqueue_batch_job(
+        cls,
+        db: AsyncSession,
+        kind: JobKind,
+        model_ids: list[int],
+        user_id: int | None,
+    ) -> tuple[Job | None, list[int]]:
+        """
+        Queues a single job working on several models. Models which already
+        have a queued or running job are left out.
+
+        :param db: Database session
+        :param kind: kind of the job
+        :param model_ids: the model IDs the job works on
+        :param user_id: the user ID of the user creating the job
+
+        :raise JobQueueFull: if the number of queued jobs reached the limit
+
+        :return: the queued job or None if no model is left, and the IDs of the
+        skipped models
+        """
+        busy = await cls.__busy_model_ids(db, model_ids)
+        model_ids = [model_id for model_id in model_ids if model_id not in busy]
+        if not model_ids:
+            return None, sorted(busy)
+        if await cls.count_queued_jobs(db=db) >= settings.JOB_QUEUE_LIMIT:
+            raise JobQueueFull()
+        job = await cls.put_job(
+            db=db,
+            kind=kind,
+            model_id=None,
+            user_id=user_id,
+            payload={"model_ids": model_ids},
+        )
+        return job, sorted(busy)
+
+    @classmethod
+    async def enqueue_model_batch(
+        cls,
+        db: AsyncSession,
+        kind: JobKind,
+        models: list[tuple[Model, ModelDetails | None]],
+        user_id: int | None,
+    ) -> dict:
+        """
+        Validates the models of a pool or gate and queues a single job deploying
+        or deactivating all valid ones. Invalid models are skipped with a reason.
+
+        :param db: Database session
+        :param kind: JobKind.DEPLOY or JobKind.DEACTIVATE
+        :param models: the models with their details
+        :param user_id: the user ID of the user creating the job
+
+        :raise JobQueueFull: if the number of queued jobs reached the limit
+
+        :return: dict with the job ID, the IDs of the queued models and the
+        reasons of the skipped models
+        """
+        skipped = {}
+        for db_model, db_model_details in models:
+            if kind == JobKind.DEPLOY:
+                error = ModelService.check_deployable(db_model, db_model_details)
+            else:
+                error = ModelService.check_deactivatable(db_model)
+            if error is not None:
+                skipped[db_model.id] = error[1]
+        job, busy = await cls.enqueue_batch_job(
+            db=db,
+            kind=kind,
+            model_ids=[
+                db_model.id for db_model, _ in models if db_model.id not in skipped
+            ],
+            user_id=user_id,
+        )
+        skipped.update(
+            {model_id: "Model already has a pending job!" for model_id in busy}
+        )
+        return {
+            "detail": (
+                (
+                    "Deploy started!"
+                    if kind == JobKind.DEPLOY
+                    else "Deactivation started!"
+                )
+                if job
+                else "No models queued!"
+            ),
+            "job_id": job.id if job else None,
+            "model_ids": cls.get_job_model_ids(job) if job else [],
+            "skipped": skipped,
+        }
+
+    @classmethod
+    async def __busy_model_ids(cls, db: AsyncSession, model_ids: list[int]) -> set[int]:
+        """
+        Returns the models which have a queued or running job
+        """
+        return {
+            model_id
+            for job in await cls.get_active_jobs(db=db, model_ids=model_ids)
+            for model_id in cls.get_job_model_ids(job)
+        }.intersection(model_ids)
+
+    @classmethod
+    async def lease_job(
+        cls, db: AsyncSession, owner: str, kinds: list[JobKind] | None = None
+    ) -> Job | None:
+        """
+        Leases the oldest job which is due, or whose lease of a previous worker
+        expired. Rows locked by other workers are skipped. Expired jobs without
+        attempts left, e.g. jobs crashing or hanging their workers, are marked
+        as failed instead.
+
+        :param db: Database session
+        :param owner: identifier of the leasing worker
+        :param kinds: (optional) kinds of jobs to lease, all kinds by default
+
+        :return: the leased job or None if no job is due
+        """
+        now = datetime.utcnow()
+        expired = and_(Job.status == JobStatus.RUNNING, Job.lease_expires_at < now)
+        exhausted = (
+            update(Job)
+            .where(expired)
+            .where(Job.attempts >= Job.max_attempts)
+            .values(
+                status=JobStatus.FAILED,
+                last_error="Lease expired",
+                lease_owner=None,
+                lease_expires_at=None,
+                finished_at=now,
+                updated_at=now,
+            )
+        )
+        statement = select(Job).where(
+            or_(
+                and_(Job.status == JobStatus.QUEUED, Job.run_after <= now),
+                and_(expired, Job.attempts < Job.max_attempts),
+            )
+        )
+        if kinds is not None:
+            exhausted = exhausted.where(Job.kind.in_(kinds))
+            statement = statement.where(Job.kind.in_(kinds))
+        await db.execute(exhausted)
+        db_job = await db.scalar(
+            statement.order_by(Job.run_after, Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if db_job is None:
+            await db.commit()
+            return None
+        db_job.status = JobStatus.RUNNING
+        db_job.lease_owner = owner
+        db_job.lease_expires_at = now + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        db_job.attempts += 1
+        db_job.started_at = now
+        db_job.updated_at = now
+        await db.commit()
+        await db.refresh(db_job)
+        return db_job
+
+    @classmethod
+    async def heartbeat_job(cls, db: AsyncSession, job_id: int, owner: str) -> bool:
+        """
+        Extends the lease of a running job
+
+        :param db: Database session
+        :param job_id: the job ID
+        :param owner: identifier of the worker holding the lease
+
+        :return: True if the lease was extended, False if the worker lost it
+        """
+        now = datetime.utcnow()
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .where(Job.lease_owner == owner)
+            .where(Job.status == JobStatus.RUNNING)
+            .values(
+                lease_expires_at=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                updated_at=now,
+            )
+        )
+        await db.commit()
+        return result.rowcount > 0
+
+    @classmethod
+    async def complete_job(
+        cls, db: AsyncSession, job_id: int, owner: str, result: dict | None = None
+    ) -> bool:
+        """
+        Marks a leased job as succeeded
+
+        :param db: Database session
+        :param job_id: the job ID
+        :param owner: identifier of the worker holding the lease
+        :param result: (optional) result of the job
+
+        :return: True if the job succeeded, False if the worker lost the lease
+        """
+        now = datetime.utcnow()
+        completed = await db.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .where(Job.lease_owner == owner)
+            .where(Job.status == JobStatus.RUNNING)
+            .values(
+                status=JobStatus.SUCCEEDED,
+                result=result,
+                lease_owner=None,
+                lease_expires_at=None,
+                finished_at=now,
+                updated_at=now,
+            )
+        )
+        await db.commit()
+        return completed.rowcount > 0
+
+    @classmethod
+    async def fail_job(
+        cls, db: AsyncSession, job_id: int, owner: str, error: str
+    ) -> Job | None:
+        """
+        Marks an attempt of a leased job as failed. The job is queued again with
+        exponential backoff until it runs out of attempts.
+
+        :param db: Database session
+        :param job_id: the job ID
+        :param owner: identifier of the worker holding the lease
+        :param error: description of the error
+
+        :return: the updated job or None if the worker lost the lease
+        """
+        db_job = await db.scalar(
+            select(Job)
+            .where(Job.id == job_id)
+            .where(Job.lease_owner == owner)
+            .where(Job.status == JobStatus.RUNNING)
+        )
+        if db_job is None:
+            return None
+        now = datetime.utcnow()
+        if db_job.attempts < db_job.max_attempts:
+            backoff = min(
+                settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (db_job.attempts - 1),
+                settings.JOB_RETRY_BACKOFF_MAX_SECONDS,
+            )
+            db_job.status = JobStatus.QUEUED
+            db_job.run_after = now + timedelta(seconds=backoff)
+        else:
+            db_job.status = JobStatus.FAILED
+            db_job.finished_at = now
+        db_job.last_error = error
+        db_job.lease_owner = None
+        db_job.lease_expires_at = None
+        db_job.updated_at = now
+        await db.commit()
+        await db.refresh(db_job)
+        return db_job
+
+    @classmethod
+    async def get_queue_stats(cls, db: AsyncSession, kind: JobKind) -> dict:
+        """
+        Returns the depth of the queue of a job kind together with the average
+        duration of its recently succeeded jobs
+
+        :param db: Database session
+        :param kind: kind of the jobs
+
+        :return: dict with the numbers of queued and running jobs, the number
+        of workers running them and the average duration in seconds or None
+        """
+        counts = dict(
+            (
+                await db.execute(
+                    select(Job.status, func.count())
+                    .where(Job.kind == kind)
+                    .where(Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+                    .group_by(Job.status)
+                )
+            ).all()
+        )
+        workers = await db.scalar(
+            select(func.count(func.distinct(Job.lease_owner)))
+            .where(Job.kind == kind)
+            .where(Job.status == JobStatus.RUNNING)
+        )
+        finished = (
+            await db.execute(
+                select(Job.started_at, Job.finished_at)
+                .where(Job.kind == kind)
+                .where(Job.status == JobStatus.SUCCEEDED)
+                .order_by(Job.finished_at.desc())
+                .limit(settings.JOB_DURATION_SAMPLE_SIZE)
+            )
+        ).all()
+        durations = [
+            (finished_at - started_at).total_seconds()
+            for started_at, finished_at in finished
+        ]
+        return {
+            "queued": counts.get(JobStatus.QUEUED, 0),
+            "running": counts.get(JobStatus.RUNNING, 0),
+            "workers": workers,
+            "avg_seconds": sum(durations) / len(durations) if durations else None,
+        }
@@ -0,0 +1,200 @@
+"""
+This module provides the worker which drains the background job queue.
+
+The worker runs inside the API process. Every replica runs its own worker,
+the jobs are distributed between them by leasing rows of the job table.
+Builds are leased by dedicated loops, one per build slot of the node, so
+batches of builds fill the node without starving deployments.
+"""
+
+import asyncio
+import logging
+import socket
+import uuid
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.config import settings
+from db.session import SessionLocal
+from models.job import Job, JobKind
+from utils.build_scheduler import BuildScheduler
+from utils.exception import ModelNotFound
+from .job import JobService
+from .model import ModelService
+from .model_details import ModelDetailsService
+
+
+_logger = logging.getLogger(__name__)
+
+
+class JobWorker:
+    """
+    Leases jobs from the job table and runs them with bounded concurrency.
+
+    Example:
+    >>> worker = JobWorker()
+    >>> worker.start()
+    >>> await worker.stop()
+    """
+
+    def __init__(self) -> None:
+        self.owner: str = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.tasks: list[asyncio.Task] = []
+        self.handlers: dict[JobKind, Callable[[AsyncSession, Job], Awaitable]] = {
+            JobKind.BUILD: self.__build,
+            JobKind.DEPLOY: self.__deploy,
+            JobKind.DEACTIVATE: self.__deactivate,
+        }
+
+    def start(self) -> None:
+        """
+        Starts the worker loops on the running event loop.
+        """
+        other_kinds = [kind for kind in JobKind if kind != JobKind.BUILD]
+        _logger.info(
+            f"Starting job worker {self.owner} with "
+            f"{settings.JOB_WORKER_CONCURRENCY} loops and "
+            f"{BuildScheduler.capacity()} build loops..."
+        )
+        self.tasks = [
+            asyncio.create_task(self.__run_loop(other_kinds))
+            for _ in range(settings.JOB_WORKER_CONCURRENCY)
+        ] + [
+            asyncio.create_task(self.__run_loop([JobKind.BUILD]))
+            for _ in range(BuildScheduler.capacity())
+        ]
+
+    async def stop(self) -> None:
+        """
+        Stops the worker loops. Leases of interrupted jobs expire and the jobs
+        are picked up by another worker.
+        """
+        _logger.info(f"Stopping job worker {self.owner}...")
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def __run_loop(self, kinds: list[JobKind]) -> None:
+        while True:
+            try:
+                async with SessionLocal() as db:
+                    job = await JobService.lease_job(db, self.owner, kinds)
+            except Exception as e:
+                _logger.error(f"Leasing a job failed with error: {e}")
+                job = None
+
+            if job is None:
+                await asyncio.sleep(settings.JOB_POLL_SECONDS)
+                continue
+            await self.__execute(job)
+
+    async def __execute(self, job: Job) -> None:
+        _logger.info(
+            f"Running {job.kind.value} job {job.id} "
+            f"(attempt {job.attempts}/{job.max_attempts})..."
+        )
+        async with SessionLocal() as db:
+            handler = asyncio.create_task(self.handlers[job.kind](db, job))
+            # The heartbeat only finishes when the lease is lost
+            heartbeat = asyncio.create_task(self.__heartbeat(job.id, handler))
+            result, error = None, None
+            try:
+                result = await handler
+            except asyncio.CancelledError:
+                if not heartbeat.done():
+                    # The worker is stopping
+                    heartbeat.cancel()
+                    raise
+            except Exception as e:
+                error = e
+            lost = heartbeat.done()
+            heartbeat.cancel()
+            if lost:
+                # Another worker runs the job now, its outcome is not ours
+                _logger.warning(f"Job {job.id} abandoned, its lease was lost")
+                await db.rollback()
+            elif error is not None:
+                _logger.error(f"Job {job.id} failed with error: {error}")
+                await db.rollback()
+                await JobService.fail_job(db, job.id, self.owner, str(error))
+            else:
+                if await JobService.complete_job(db, job.id, self.owner, result):
+                    _logger.info(f"Job {job.id} finished")
+                else:
+                    _logger.warning(f"Job {job.id} finished after its lease was lost")
+
+    async def __heartbeat(self, job_id: int, handler: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
+            try:
+                async with SessionLocal() as db:
+                    if not await JobService.heartbeat_job(db, job_id, self.owner):
+                        _logger.warning(
+                            f"Job worker {self.owner} lost lease of {job_id}, "
+                            "cancelling it"
+                        )
+                        handler.cancel()
+                        return
+            except Exception as e:
+                _logger.error(f"Heartbeat of job {job_id} failed with error: {e}")
+
+    async def __build(self, db: AsyncSession, job: Job) -> None:
+        db_model = await ModelService.get_model_by_id(db, job.model_id)
+        if db_model is None:
+            raise ModelNotFound(job.model_id)
+        model_details = await ModelDetailsService.get_model_details_by_model_id(
+            db, job.model_id
+        )
+        await ModelService.build_model(
+            db=db, name=db_model.name, model_details=model_details
+        )
+
+    async def __deploy(self, db: AsyncSession, job: Job) -> dict | None:
+        if JobService.is_batch_job(job):
+            model_ids = JobService.get_job_model_ids(job)
+            models = await ModelService.get_models_with_details(db, model_ids)
+            return self.__batch_result(
+                model_ids, await ModelService.deploy_models(db, models)
+            )
+        db_model = await ModelService.get_model_by_id(db, job.model_id)
+        if db_model is None:
+            raise ModelNotFound(job.model_id)
+        model_details = await ModelDetailsService.get_model_details_by_model_id(
+            db, job.model_id
+        )
+        await ModelService.deploy_model(
+            db=db, name=db_model.name, model_details=model_details
+        )
+
+    async def __deactivate(self, db: AsyncSession, job: Job) -> dict | None:
+        if JobService.is_batch_job(job):
+            model_ids = JobService.get_job_model_ids(job)
+            models = [
+                db_model
+                for db_model, _ in await ModelService.get_models_with_details(
+                    db, model_ids
+                )
+            ]
+            return self.__batch_result(
+                model_ids, await ModelService.deactivate_models(db, models)
+            )
+        db_model = await ModelService.get_model_by_id(db, job.model_id)
+        if db_model is None:
+            raise ModelNotFound(job.model_id)
+        await ModelService.deactivate_model(
+            db=db, model_id=job.model_id, name=db_model.name
+        )
+
+    @staticmethod
+    def __batch_result(model_ids: list[int], result: dict) -> dict:
+        """
+        Adds the models of a batch job which were deleted in the meantime
+        to the skipped ones.
+        """
+        handled = {model_id for outcome in result.values() for model_id in outcome}
+        for model_id in model_ids:
+            if model_id not in handled:
+                result["skipped"][model_id] = "Model not found!"
+        return result
@@ -3,18 +3,20 @@ This module provides services which are used
 to send requests directly to the database
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
 from datetime import datetime
 
 from schemas import mlflow_server as mlflow_server_schemas
 from models import mlflow_server as mlflow_server_models
+from utils.pagination import paginate
 
 
 class MlflowServerService:
     @classmethod
-    def get_mlflow_server_by_id(
-        cls, db: Session, id: int
+    async def get_mlflow_server_by_id(
+        cls, db: AsyncSession, id: int
     ) -> mlflow_server_models.MlflowServer | None:
         """
         Returns the mlflow server data found by gate id
@@ -25,15 +27,15 @@ class MlflowServerService:
         :return: the mlflow server data corresponding to the given ID
         or None if not found
         """
-        return (
-            db.query(mlflow_server_models.MlflowServer)
-            .filter(mlflow_server_models.MlflowServer.id == id)
-            .first()
+        return await db.scalar(
+            select(mlflow_server_models.MlflowServer).where(
+                mlflow_server_models.MlflowServer.id == id
+            )
         )
 
     @classmethod
-    def get_mlflow_server_by_name(
-        cls, db: Session, name: str
+    async def get_mlflow_server_by_name(
+        cls, db: AsyncSession, name: str
     ) -> mlflow_server_models.MlflowServer | None:
         """
         Returns the mlflow server data found by gate name
@@ -44,15 +46,19 @@ class MlflowServerService:
         :return: the mlflow server data corresponding to the given name
         or None if not found
         """
-        return (
-            db.query(mlflow_server_models.MlflowServer)
-            .filter(mlflow_server_models.MlflowServer.name == name)
-            .first()
+        return await db.scalar(
+            select(mlflow_server_models.MlflowServer).where(
+                mlflow_server_models.MlflowServer.name == name
+            )
         )
 
     @classmethod
-    def get_mlflow_servers(
-        cls, db: Session, skip: int = 0, limit: int = 100
+    async def get_mlflow_servers(
+        cls,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: int | None = None,
     ) -> list[mlflow_server_models.MlflowServer]:
         """
         Returns a list of mlflow server data, with optional pagination
@@ -61,18 +67,28 @@ class MlflowServerService:
         :param skip: (optional) the number of records to skip (default: 0)
         :param limit: (optional) the maximum number of records to retrieve
         (default: 100)
+        :param after_id: (optional) ID of the last record of the previous page,
+        replaces skip
 
         :return: a list of mlflow server data, where skip < mlflow_server_id < limit
         """
         models = (
-            db.query(mlflow_server_models.MlflowServer).offset(skip).limit(limit).all()
-        )
+            await db.scalars(
+                paginate(
+                    select(mlflow_server_models.MlflowServer),
+                    mlflow_server_models.MlflowServer.id,
+                    skip,
+                    limit,
+                    after_id,
+                )
+            )
+        ).all()
         return models
 
     @classmethod
-    def put_mlflow_server(
+    async def put_mlflow_server(
         cls,
-        db: Session,
+        db: AsyncSession,
         mlflow_server_data: mlflow_server_schemas.MlflowServerPut,
         user_id: int,
     ) -> mlflow_server_models.MlflowServer:
@@ -93,14 +109,14 @@ class MlflowServerService:
         db_mlflow_server.created_at = creation_time
         db_mlflow_server.updated_at = creation_time
         db.add(db_mlflow_server)
-        db.commit()
-        db.refresh(db_mlflow_server)
+        await db.commit()
+        await db.refresh(db_mlflow_server)
         return db_mlflow_server
 
     @classmethod
-    def patch_mlflow_server(
+    async def patch_mlflow_server(
         cls,
-        db: Session,
+        db: AsyncSession,
         mlflow_server_id: int,
         mlflow_server_data: mlflow_server_schemas.MlflowServerPatch,
         user_id: int,
@@ -114,7 +130,7 @@ class MlflowServerService:
 
         :return: the updated mlflow server record
         """
-        db_mlflow_server = MlflowServerService.get_mlflow_server_by_id(
+        db_mlflow_server = await MlflowServerService.get_mlflow_server_by_id(
             db=db, id=mlflow_server_id
         )
         for key, value in mlflow_server_data.dict(exclude_none=True).items():
@@ -122,12 +138,12 @@ class MlflowServerService:
         db_mlflow_server.updated_by = user_id
         db_mlflow_server.updated_at = datetime.utcnow()
         db.add(db_mlflow_server)
-        db.commit()
-        db.refresh(db_mlflow_server)
+        await db.commit()
+        await db.refresh(db_mlflow_server)
         return db_mlflow_server
 
     @classmethod
-    def delete_mlflow_server(cls, db: Session, id: str) -> JSONResponse:
+    async def delete_mlflow_server(cls, db: AsyncSession, id: str) -> JSONResponse:
         """
         Deletes a mlflow server record from the database
 
@@ -136,8 +152,10 @@ class MlflowServerService:
 
         :return: a json with a "detail" key indicating success
         """
-        db.query(mlflow_server_models.MlflowServer).filter(
-            mlflow_server_models.MlflowServer.id == id
-        ).delete()
-        db.commit()
+        await db.execute(
+            delete(mlflow_server_models.MlflowServer).where(
+                mlflow_server_models.MlflowServer.id == id
+            )
+        )
+        await db.commit()
         return JSONResponse({"detail": "Mlflow server deleted successfully!"})
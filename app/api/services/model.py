@@ -1,23 +1,44 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
 from datetime import datetime
+import asyncio
 import logging
 
+from db.notify import MODEL_STATUS_CHANNEL, ORIGIN, notify, notify_many
 from models import model as model_models
 from models.model import ModelStatus
 from models.model_details import ModelDetails
+from models.pool import PoolModel
+from models.gate import GatePool
 from schemas import model as model_schemas
-from utils import ModelDeployment, ModelBuilder
-from .model_details import ModelDetailsService
+from utils import ModelDeployment, ModelBuilder, TaskExecutor, TaskKind
+from .mlflow_server import MlflowServerService
+from .build_cache import BuildCacheService
 from utils.constants import Constants
+from utils.events import EventBus
+from utils.exception import InvalidStatusTransition, ModelNotFound
+from utils.pagination import paginate
+from utils.routing import routing_tables
 
 
 _logger = logging.getLogger(__name__)
 
+# Statuses entered by models joining or leaving the routes of the gates.
+# Models keep serving with their old replicas while they are redeployed, and
+# after a failed redeploy, until they are deactivated.
+ROUTING_STATUSES = {
+    ModelStatus.DEPLOYED.value,
+    ModelStatus.DEACTIVATING.value,
+    ModelStatus.INACTIVE.value,
+}
+
 
 class ModelService:
     @classmethod
-    def get_model_by_id(cls, db: Session, model_id: int) -> model_models.Model | None:
+    async def get_model_by_id(
+        cls, db: AsyncSession, model_id: int
+    ) -> model_models.Model | None:
         """
         Retrieves a model from the database by it's designated id
 
@@ -25,14 +46,14 @@ class ModelService:
         :param model_id: id of model to get
         :return: model or None if model is not found
         """
-        return (
-            db.query(model_models.Model)
-            .filter(model_models.Model.id == model_id)
-            .first()
+        return await db.scalar(
+            select(model_models.Model).where(model_models.Model.id == model_id)
         )
 
     @classmethod
-    def get_model_by_name(cls, db: Session, name: str) -> model_models.Model | None:
+    async def get_model_by_name(
+        cls, db: AsyncSession, name: str
+    ) -> model_models.Model | None:
         """
         Retrieves a model from the database by it's designated id
 
@@ -40,13 +61,17 @@ class ModelService:
         :param name: name of model to get
         :return: model or None if model is not found
         """
-        return (
-            db.query(model_models.Model).filter(model_models.Model.name == name).first()
+        return await db.scalar(
+            select(model_models.Model).where(model_models.Model.name == name)
         )
 
     @classmethod
-    def get_models(
-        cls, db: Session, skip: int = 0, limit: int = 100
+    async def get_models(
+        cls,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: int | None = None,
     ) -> list[model_models.Model]:
         """
         Returns list of models with pagination
@@ -54,14 +79,126 @@ class ModelService:
         :param db: Database session
         :param skip: how many models to skip
         :param limit: how many models to retrieve
+        :param after_id: (optional) ID of the last record of the previous page,
+        replaces skip
         :return: list of retrieved models
         """
-        models = db.query(model_models.Model).offset(skip).limit(limit).all()
+        models = (
+            await db.scalars(
+                paginate(
+                    select(model_models.Model),
+                    model_models.Model.id,
+                    skip,
+                    limit,
+                    after_id,
+                )
+            )
+        ).all()
         return models
 
     @classmethod
-    def put_model(
-        cls, db: Session, model: model_schemas.ModelPut, user_id: int
+    async def get_models_with_details(
+        cls, db: AsyncSession, model_ids: list[int]
+    ) -> list[tuple[model_models.Model, ModelDetails | None]]:
+        """
+        Retrieves several models together with their details in a single query
+
+        :param db: Database session
+        :param model_ids: ids of models to get
+        :return: list of models and their details, missing models are left out
+        """
+        return (
+            await db.execute(
+                select(model_models.Model, ModelDetails)
+                .outerjoin(ModelDetails, ModelDetails.model_id == model_models.Model.id)
+                .where(model_models.Model.id.in_(model_ids))
+            )
+        ).all()
+
+    @classmethod
+    def check_deployable(
+        cls, db_model: model_models.Model, db_model_details: ModelDetails | None
+    ) -> tuple[int, str] | None:
+        """
+        Checks if a model can be deployed
+
+        :param db_model: the model
+        :param db_model_details: details of the model
+
+        :return: status code and detail of the error or None if the model can be
+        deployed
+        """
+        if not db_model.status.can_change_to(ModelStatus.DEPLOYING):
+            return 409, "Model cannot be deployed in its status!"
+        if not db_model_details:
+            return 404, "Model details not found!"
+        for item in db_model_details.__dict__.items():
+            # Images pushed before digests were recorded have none
+            if item[0] in [
+                "cpu_utilization",
+                "memory_utilization",
+                "max_replicas",
+                "image_digest",
+            ]:
+                continue
+            if item[1] is None:
+                return 406, "Model details are not complete!"
+        if (
+            db_model_details.cpu_utilization or db_model_details.memory_utilization
+        ) and not db_model_details.max_replicas:
+            return 406, "Model details are not complete!"
+        return None
+
+    @classmethod
+    def check_deactivatable(
+        cls, db_model: model_models.Model
+    ) -> tuple[int, str] | None:
+        """
+        Checks if a model can be deactivated
+
+        :param db_model: the model
+
+        :return: status code and detail of the error or None if the model can be
+        deactivated
+        """
+        if db_model.status == ModelStatus.INACTIVE:
+            return 409, "Model already inactive!"
+        if db_model.status != ModelStatus.DEPLOYED:
+            return 409, "Model is not deployed!"
+        return None
+
+    @classmethod
+    async def get_member_models_with_details(
+        cls, db: AsyncSession, pool_id: int | None = None, gate_id: int | None = None
+    ) -> list[tuple[model_models.Model, ModelDetails | None]]:
+        """
+        Retrieves the models of a pool, or of all pools of a gate, together
+        with their details in a single query
+
+        :param db: Database session
+        :param pool_id: id of the pool
+        :param gate_id: id of the gate, used if no pool is given
+        :return: list of the distinct models and their details
+        """
+        members = select(PoolModel.model_id)
+        if pool_id is not None:
+            members = members.where(PoolModel.pool_id == pool_id)
+        else:
+            members = members.join(
+                GatePool, GatePool.pool_id == PoolModel.pool_id
+            ).where(GatePool.gate_id == gate_id)
+        return (
+            await db.execute(
+                select(model_models.Model, ModelDetails)
+                .outerjoin(ModelDetails, ModelDetails.model_id == model_models.Model.id)
+                .where(model_models.Model.id.in_(members))
+                .order_by(model_models.Model.id)
+            )
+        ).all()
+
+    @classmethod
+    async def put_model(
+        cls, db: AsyncSession, model: model_schemas.ModelPut, user_id: int
     ) -> model_models.Model:
         """
         Creates a new model and adds it to the database
@@ -79,13 +216,17 @@ class ModelService:
         db_model.updated_at = creation_time
         db_model.status = ModelStatus.INACTIVE
         db.add(db_model)
-        db.commit()
-        db.refresh(db_model)
+        await db.commit()
+        await db.refresh(db_model)
         return db_model
 
     @classmethod
-    def patch_model(
-        cls, db: Session, model_id: int, model: model_schemas.ModelPatch, user_id: int
+    async def patch_model(
+        cls,
+        db: AsyncSession,
+        model_id: int,
+        model: model_schemas.ModelPatch,
+        user_id: int,
     ) -> model_models.Model:
         """
         Updates an existing model in the database
@@ -97,39 +238,142 @@ class ModelService:
         :return: updated model
         """
         update_data = model.dict(exclude_unset=True)
-        db_model = ModelService.get_model_by_id(db, model_id)
+        db_model = await ModelService.get_model_by_id(db, model_id)
         for key, val in update_data.items():
             setattr(db_model, key, val)
         db_model.updated_by = user_id
         db_model.updated_at = datetime.utcnow()
         db.add(db_model)
-        db.commit()
-        db.refresh(db_model)
+        await db.commit()
+        await db.refresh(db_model)
         return db_model
 
     @classmethod
-    def change_model_status(
-        cls, db: Session, model_id: int, status: ModelStatus
+    async def change_model_status(
+        cls, db: AsyncSession, model_id: int, *statuses: ModelStatus
     ) -> model_models.Model:
         """
-        Changes the status of a model in the database
+        Changes the status of a model in the database and publishes the
+        transitions to the subscribers of the model's events. Other replicas
+        are notified through the database when the change is committed.
+
+        Passing several statuses moves the model through all of them with a
+        single write, the intermediate ones are only published. The status is
+        written only if the current one may change to the first of them, so
+        a pipeline cannot overwrite the status set by another. Pending changes
+        of the session are committed together with the status.
 
         :param db: Database session
         :param model_id: id of a model to update
-        :param status: new status of a model
+        :param statuses: new statuses of a model, in the order of the pipeline
 
+        :raise ModelNotFound: if the model does not exist
+        :raise InvalidStatusTransition: if the model cannot change to the statuses
         :return: updated model
         """
-        db_model = ModelService.get_model_by_id(db, model_id)
-        db_model.status = status
-        db_model.updated_at = datetime.utcnow()
-        db.add(db_model)
-        db.commit()
-        db.refresh(db_model)
+        for current, status in zip(statuses, statuses[1:]):
+            if not current.can_change_to(status):
+                raise InvalidStatusTransition(model_id, current.value, status.value)
+
+        db_model = await db.scalar(
+            update(model_models.Model)
+            .where(model_models.Model.id == model_id)
+            .where(model_models.Model.status.in_(ModelStatus.sources(statuses[0])))
+            .values(**ModelService.__status_values(statuses))
+            .returning(model_models.Model)
+        )
+        if db_model is None:
+            current = await db.scalar(
+                select(model_models.Model.status).where(
+                    model_models.Model.id == model_id
+                )
+            )
+            if current is None:
+                raise ModelNotFound(model_id)
+            raise InvalidStatusTransition(model_id, current.value, statuses[0].value)
+
+        payload = ModelService.__status_payload(db_model, statuses)
+        await notify(db, MODEL_STATUS_CHANNEL, payload)
+        await db.commit()
+        ModelService.handle_status_notification(payload)
         return db_model
 
     @classmethod
-    def delete_model(cls, db: Session, model_id: int) -> JSONResponse:
+    async def change_models_status(
+        cls, db: AsyncSession, model_ids: list[int], status: ModelStatus
+    ) -> list[model_models.Model]:
+        """
+        Changes the status of several models with a single write. Models which
+        do not exist or cannot change to the status are left unchanged.
+
+        :param db: Database session
+        :param model_ids: ids of models to update
+        :param status: new status of the models
+
+        :return: updated models
+        """
+        if not model_ids:
+            return []
+        db_models = (
+            await db.scalars(
+                update(model_models.Model)
+                .where(model_models.Model.id.in_(model_ids))
+                .where(model_models.Model.status.in_(ModelStatus.sources(status)))
+                .values(**ModelService.__status_values((status,)))
+                .returning(model_models.Model)
+            )
+        ).all()
+        payloads = [
+            ModelService.__status_payload(db_model, (status,)) for db_model in db_models
+        ]
+        await notify_many(db, MODEL_STATUS_CHANNEL, payloads)
+        await db.commit()
+        for payload in payloads:
+            ModelService.handle_status_notification(payload)
+        return db_models
+
+    @classmethod
+    def handle_status_notification(cls, payload: dict) -> None:
+        """
+        Publishes status transitions to the subscribers of the model's events
+        and invalidates the routing table when a model joins or leaves the
+        routes. Notifications of this process are handled when they are
+        committed, so they are skipped when the database delivers them.
+
+        :param payload: notification with the topic and the new statuses
+        """
+        if payload.get("origin") == ORIGIN:
+            return
+        statuses = payload.get("statuses", [payload["status"]])
+        for status in statuses:
+            EventBus.publish(payload["topic"], "status", status=status)
+        if ROUTING_STATUSES.intersection(statuses):
+            routing_tables.invalidate()
+
+    @staticmethod
+    def __status_values(statuses: tuple[ModelStatus, ...]) -> dict:
+        now = datetime.utcnow()
+        values = {"status": statuses[-1], "updated_at": now}
+        for status in statuses:
+            if status == ModelStatus.DEPLOYED:
+                values["deployed_at"] = now
+            elif status in (ModelStatus.DEACTIVATING, ModelStatus.INACTIVE):
+                values["deployed_at"] = None
+        return values
+
+    @staticmethod
+    def __status_payload(
+        db_model: model_models.Model, statuses: tuple[ModelStatus, ...]
+    ) -> dict:
+        return {
+            "topic": Constants.K8S_MODEL_PREFIX + db_model.name,
+            "model_id": db_model.id,
+            "status": statuses[-1].value,
+            "statuses": [status.value for status in statuses],
+        }
+
+    @classmethod
+    async def delete_model(cls, db: AsyncSession, model_id: int) -> JSONResponse:
         """
         Deletes a model from the database
 
@@ -137,14 +381,16 @@ class ModelService:
         :param model_id: id of model to delete
         :return: JSON respose indicating succesful deletion
         """
-        db.query(model_models.Model).filter(model_models.Model.id == model_id).delete()
-        db.commit()
+        await db.execute(
+            delete(model_models.Model).where(model_models.Model.id == model_id)
+        )
+        await db.commit()
         return JSONResponse({"detail": "model deleted"})
 
     @classmethod
     async def deploy_model(
         cls,
-        db: Session,
+        db: AsyncSession,
         name: str,
         model_details: ModelDetails,
     ) -> JSONResponse:
@@ -154,6 +400,8 @@ class ModelService:
         :param name: name of model to deploy
         :param model_details: model details
 
+        :raise InvalidStatusTransition: if the model cannot be deployed
+        :raises: Any exception which may occur, after the model status is set
         :return: JSON respose indicating succesful activation
         """
 
@@ -162,27 +410,135 @@ class ModelService:
             model_details=model_details,
         )
 
+        await ModelService.change_model_status(
+            db, model_details.model_id, ModelStatus.DEPLOYING
+        )
         try:
-            ModelService.change_model_status(
-                db, model_details.model_id, ModelStatus.DEPLOYING
-            )
-            model_deployment.deploy()
-            ModelService.change_model_status(
+            await TaskExecutor.run(TaskKind.DEPLOY, model_deployment.deploy)
+            await ModelService.change_model_status(
                 db, model_details.model_id, ModelStatus.DEPLOYED
             )
         except Exception as e:
-            ModelService.change_model_status(
+            await ModelService.change_model_status(
                 db, model_details.model_id, ModelStatus.DEPLOY_FAILED
             )
             _logger.error(
                 f"Error while deploying model: {e}. "
                 f"Model_details id: {model_details.id}"
             )
+            raise e
+
+    @classmethod
+    async def deploy_models(
+        cls,
+        db: AsyncSession,
+        models: list[tuple[model_models.Model, ModelDetails]],
+    ) -> dict:
+        """
+        Deploys several models to a kubernetes cluster at once. Deployments run
+        in parallel on the deploy slots of the task executor and the statuses
+        of all models are written with one statement per outcome.
+
+        :param db: Database session
+        :param models: models to deploy with their details
+
+        :return: dict with the ids of the deployed models and the errors of
+        the failed and skipped models by id
+        """
+        members = {db_model.id: (db_model, details) for db_model, details in models}
+        started = sorted(
+            db_model.id
+            for db_model in await ModelService.change_models_status(
+                db, list(members), ModelStatus.DEPLOYING
+            )
+        )
+        outcomes = await asyncio.gather(
+            *(
+                TaskExecutor.run(
+                    TaskKind.DEPLOY,
+                    ModelDeployment(
+                        name=members[model_id][0].name,
+                        model_details=members[model_id][1],
+                    ).deploy,
+                )
+                for model_id in started
+            ),
+            return_exceptions=True,
+        )
+        failed = {
+            model_id: str(outcome)
+            for model_id, outcome in zip(started, outcomes)
+            if isinstance(outcome, BaseException)
+        }
+        deployed = [model_id for model_id in started if model_id not in failed]
+        await ModelService.change_models_status(db, deployed, ModelStatus.DEPLOYED)
+        await ModelService.change_models_status(
+            db, list(failed), ModelStatus.DEPLOY_FAILED
+        )
+        _logger.info(f"Deployed {len(deployed)} of {len(members)} models")
+        return {
+            "deployed": deployed,
+            "failed": failed,
+            "skipped": {
+                model_id: "Model cannot be deployed in its status!"
+                for model_id in members
+                if model_id not in started
+            },
+        }
+
+    @classmethod
+    async def deactivate_models(
+        cls, db: AsyncSession, models: list[model_models.Model]
+    ) -> dict:
+        """
+        Deactivates several models from a kubernetes cluster at once. Their
+        resources are deleted concurrently and the statuses of all models are
+        written with one statement per outcome.
+
+        :param db: Database session
+        :param models: models to deactivate
+
+        :return: dict with the ids of the deactivated models and the errors of
+        the failed and skipped models by id
+        """
+        started = await ModelService.change_models_status(
+            db, [db_model.id for db_model in models], ModelStatus.DEACTIVATING
+        )
+        names = {
+            db_model.id: Constants.K8S_MODEL_PREFIX + db_model.name
+            for db_model in started
+        }
+        try:
+            errors = await TaskExecutor.run(
+                TaskKind.DEACTIVATE, ModelDeployment.delete_many, list(names.values())
+            )
+        except Exception as e:
+            errors = {name: str(e) for name in names.values()}
+        failed = {
+            model_id: errors[name]
+            for model_id, name in names.items()
+            if errors[name] is not None
+        }
+        deactivated = sorted(model_id for model_id in names if model_id not in failed)
+        await ModelService.change_models_status(db, deactivated, ModelStatus.INACTIVE)
+        await ModelService.change_models_status(
+            db, list(failed), ModelStatus.DEACTIVATION_FAILED
+        )
+        _logger.info(f"Deactivated {len(deactivated)} of {len(models)} models")
+        return {
+            "deactivated": deactivated,
+            "failed": failed,
+            "skipped": {
+                db_model.id: "Model cannot be deactivated in its status!"
+                for db_model in models
+                if db_model.id not in names
+            },
+        }
 
     @classmethod
     async def deactivate_model(
         cls,
-        db: Session,
+        db: AsyncSession,
         model_id: int,
         name: str,
     ) -> JSONResponse:
@@ -191,76 +547,135 @@ class ModelService:
 
         :param name: name of model to deactivate
 
-
+        :raise InvalidStatusTransition: if the model cannot be deactivated
+        :raises: Any exception which may occur, after the model status is set
         :return: JSON respose indicating succesful deactivation
         """
 
+        await ModelService.change_model_status(db, model_id, ModelStatus.DEACTIVATING)
         try:
-            ModelService.change_model_status(db, model_id, ModelStatus.DEACTIVATING)
-            ModelDeployment.delete(Constants.K8S_MODEL_PREFIX + name)
-            ModelService.change_model_status(db, model_id, ModelStatus.INACTIVE)
+            await TaskExecutor.run(
+                TaskKind.DEACTIVATE,
+                ModelDeployment.delete,
+                Constants.K8S_MODEL_PREFIX + name,
+            )
+            await ModelService.change_model_status(db, model_id, ModelStatus.INACTIVE)
         except Exception as e:
-            ModelService.change_model_status(
+            await ModelService.change_model_status(
                 db, model_id, ModelStatus.DEACTIVATION_FAILED
             )
             _logger.error(f"Error while deactivating model: {e}.")
+            raise e
 
     @classmethod
     async def build_model(
         cls,
-        db: Session,
+        db: AsyncSession,
         name: str,
         model_details: ModelDetails,
     ) -> JSONResponse:
         """
         Builds a docker image for a model and pushes it to a docker registry.
+        If an identical artifact was built before, its image is reused. The
+        image tag is saved in the model details with the final status.
 
         :param name: name of model to build
         :param model_details: model details
 
+        :raise InvalidStatusTransition: if the model cannot be built
+        :raises: Any exception which may occur, after the model status is set
         :return: JSON respose indicating succesful build
         """
+        mlflow_server = await MlflowServerService.get_mlflow_server_by_id(
+            db, model_details.mlflow_server_id
+        )
         model_builder = ModelBuilder(
             name=name,
-            mlflow_tracking_uri=model_details.mlflow_server.tracking_uri,
+            mlflow_tracking_uri=mlflow_server.tracking_uri,
             artifact_uri=model_details.artifact_uri,
         )
 
+        image_tag = None
+        await ModelService.change_model_status(
+            db, model_details.model_id, ModelStatus.BUILDING
+        )
         try:
-            ModelService.change_model_status(
-                db, model_details.model_id, ModelStatus.BUILDING
-            )
-            model_builder.build()
-            ModelService.change_model_status(
-                db, model_details.model_id, ModelStatus.BUILT
+            model_builder = await TaskExecutor.run(
+                TaskKind.BUILD, model_builder.prepare
             )
+            image_tag = await ModelService.__reuse_cached_image(db, model_builder)
+            if image_tag is None:
+                model_builder = await TaskExecutor.run(
+                    TaskKind.BUILD, model_builder.build
+                )
         except Exception as e:
-            ModelService.change_model_status(
+            model_builder.cleanup()
+            await ModelService.change_model_status(
                 db, model_details.model_id, ModelStatus.BUILD_FAILED
             )
             _logger.error(f"Error while building model: {e}.")
+            raise e
 
         try:
-            ModelService.change_model_status(
-                db, model_details.model_id, ModelStatus.PUSHING
+            await ModelService.change_model_status(
+                db, model_details.model_id, ModelStatus.BUILT, ModelStatus.PUSHING
             )
-            image_tag = model_builder.push()
-            ModelService.change_model_status(
+            if image_tag is None:
+                image_tag = await TaskExecutor.run(TaskKind.PUSH, model_builder.push)
+                if model_builder.image_digest is not None:
+                    await BuildCacheService.put_build_cache(
+                        db,
+                        model_builder.fingerprint,
+                        image_tag,
+                        model_builder.image_digest,
+                    )
+            model_details.image_tag = image_tag
+            model_details.image_digest = model_builder.image_digest
+            model_details.updated_at = datetime.utcnow()
+            db.add(model_details)
+            await ModelService.change_model_status(
                 db, model_details.model_id, ModelStatus.PUSHED
             )
         except Exception as e:
-            ModelService.change_model_status(
+            await ModelService.change_model_status(
                 db, model_details.model_id, ModelStatus.PUSH_FAILED
             )
             _logger.error(f"Error while pushing model: {e}.")
-
-        db_model_details = ModelDetailsService.get_model_details_by_model_id(
-            db, model_details.model_id
-        )
-        db_model_details.image_tag = image_tag
-        db_model_details.updated_at = datetime.utcnow()
-        db.add(db_model_details)
-        db.commit()
-        db.refresh(db_model_details)
+            raise e
 
         _logger.info(f"Model {name} built and pushed successfully with tag {image_tag}")
+
+    @classmethod
+    async def __reuse_cached_image(
+        cls, db: AsyncSession, model_builder: ModelBuilder
+    ) -> str | None:
+        """
+        Retags the cached image of an identical artifact for the model
+
+        :param db: Database session
+        :param model_builder: builder of the model with a fingerprinted artifact
+
+        :return: tag of the pushed image or None if the artifact must be built
+        """
+        cached = await BuildCacheService.get_build_cache_by_fingerprint(
+            db, model_builder.fingerprint
+        )
+        if cached is None:
+            return None
+        try:
+            image_tag = await TaskExecutor.run(
+                TaskKind.PUSH,
+                model_builder.retag,
+                cached.image_tag,
+                cached.image_digest,
+            )
+        except Exception as e:
+            _logger.warning(
+                f"Cached image {cached.image_tag}@{cached.image_digest} is not "
+                f"usable, building the model instead: {e}"
+            )
+            await BuildCacheService.delete_build_cache(db, cached.id)
+            return None
+        model_builder.cleanup()
+        await BuildCacheService.hit_build_cache(db, cached.id)
+        return image_tag
@@ -1,4 +1,5 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
 
 from models import ModelDetails
@@ -7,8 +8,8 @@ from schemas.model_details import ModelDetailsPatch
 
 class ModelDetailsService:
     @classmethod
-    def get_model_details_by_id(
-        cls, db: Session, model_details_id: int
+    async def get_model_details_by_id(
+        cls, db: AsyncSession, model_details_id: int
     ) -> ModelDetails | None:
         """
         Retrieves a model_details from the database by it's designated id
@@ -17,13 +18,13 @@ class ModelDetailsService:
         :param model_details_id: id of model_details to get
         :return: model_details or None if model_details is not found
         """
-        return (
-            db.query(ModelDetails).filter(ModelDetails.id == model_details_id).first()
+        return await db.scalar(
+            select(ModelDetails).where(ModelDetails.id == model_details_id)
         )
 
     @classmethod
-    def get_model_details_by_model_id(
-        cls, db: Session, model_id: int
+    async def get_model_details_by_model_id(
+        cls, db: AsyncSession, model_id: int
     ) -> ModelDetails | None:
         """
         Retrieves a model_details from the database by it's designated id
@@ -32,11 +33,13 @@ class ModelDetailsService:
         :param model_id: id of model_details to get
         :return: model_details or None if model_details is not found
         """
-        return db.query(ModelDetails).filter(ModelDetails.model_id == model_id).first()
+        return await db.scalar(
+            select(ModelDetails).where(ModelDetails.model_id == model_id)
+        )
 
     @classmethod
-    def get_model_details_by_image_tag(
-        cls, db: Session, image_tag: str
+    async def get_model_details_by_image_tag(
+        cls, db: AsyncSession, image_tag: str
     ) -> ModelDetails | None:
         """
         Retrieves a model_details from the database by it's designated id
@@ -45,12 +48,12 @@ class ModelDetailsService:
         :param image_tag: image tag of model_details to get
         :return: model_details or None if model_details is not found
         """
-        return (
-            db.query(ModelDetails).filter(ModelDetails.image_tag == image_tag).first()
+        return await db.scalar(
+            select(ModelDetails).where(ModelDetails.image_tag == image_tag)
         )
 
     @classmethod
-    def put_model_details(cls, db: Session, model_id: int) -> ModelDetails:
+    async def put_model_details(cls, db: AsyncSession, model_id: int) -> ModelDetails:
         """
         Creates a new model_details with model_id and adds it to the database
 
@@ -60,13 +63,13 @@ class ModelDetailsService:
         """
         db_model_details = ModelDetails(model_id=model_id)
         db.add(db_model_details)
-        db.commit()
-        db.refresh(db_model_details)
+        await db.commit()
+        await db.refresh(db_model_details)
         return db_model_details
 
     @classmethod
-    def patch_model_details(
-        cls, db: Session, model_id: int, model_details: ModelDetailsPatch
+    async def patch_model_details(
+        cls, db: AsyncSession, model_id: int, model_details: ModelDetailsPatch
     ) -> ModelDetails | None:
         """
         Updates an existing model_details in the database
@@ -76,17 +79,23 @@ class ModelDetailsService:
         :param model_details: model_details data to update
         :return: updated model_details or None if model_details is not found
         """
-        db_model_details = cls.get_model_details_by_model_id(db, model_id)
+        db_model_details = await cls.get_model_details_by_model_id(db, model_id)
         if db_model_details is None:
             return None
-        for field, value in model_details.dict(exclude_none=True).items():
+        fields = model_details.dict(exclude_none=True)
+        if fields.get("image_tag") not in (None, db_model_details.image_tag):
+            # The digest belongs to the pushed image, not to the new tag
+            db_model_details.image_digest = None
+        for field, value in fields.items():
             setattr(db_model_details, field, value)
-        db.commit()
-        db.refresh(db_model_details)
+        await db.commit()
+        await db.refresh(db_model_details)
         return db_model_details
 
     @classmethod
-    def delete_model_details(cls, db: Session, model_id: int) -> JSONResponse:
+    async def delete_model_details(
+        cls, db: AsyncSession, model_id: int
+    ) -> JSONResponse:
         """
         Deletes a model_details from the database
 
@@ -94,14 +103,14 @@ class ModelDetailsService:
         :param model_id: model ID
         :return: JSON response with status code
         """
-        model_details = cls.get_model_details_by_model_id(db, model_id)
+        model_details = await cls.get_model_details_by_model_id(db, model_id)
         if model_details is None:
             return JSONResponse(
                 status_code=404,
                 content={"message": f"ModelDetails with model_id {model_id} not found"},
             )
-        db.delete(model_details)
-        db.commit()
+        await db.delete(model_details)
+        await db.commit()
         return JSONResponse(
             status_code=204,
             content={"message": f"ModelDetails with model_id {model_id} removed"},
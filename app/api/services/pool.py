@@ -4,11 +4,15 @@ to send requests directly to the database
 """
 
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
 
 from schemas import pool as pool_schemas
 from models import pool as pool_models
+from db.notify import ROUTING_CHANNEL, notify
+from utils.routing import routing_tables
+from utils.pagination import paginate
 
 
 class PoolService:
@@ -17,7 +21,7 @@ class PoolService:
     """
 
     @classmethod
-    def get_pool_by_id(cls, db: Session, id: int) -> pool_models.Pool:
+    async def get_pool_by_id(cls, db: AsyncSession, id: int) -> pool_models.Pool:
         """
         Returns the pool data found by pool id
 
@@ -25,10 +29,12 @@ class PoolService:
 
         :return: the pool data corresponding to the given ID or None if not found
         """
-        return db.query(pool_models.Pool).filter(pool_models.Pool.id == id).first()
+        return await db.scalar(
+            select(pool_models.Pool).where(pool_models.Pool.id == id)
+        )
 
     @classmethod
-    def get_pool_by_name(cls, db: Session, name: str) -> pool_models.Pool:
+    async def get_pool_by_name(cls, db: AsyncSession, name: str) -> pool_models.Pool:
         """
         Returns the pool data found by pool id
 
@@ -36,26 +42,40 @@ class PoolService:
 
         :return: the pool data corresponding to the given ID or None if not found
         """
-        return db.query(pool_models.Pool).filter(pool_models.Pool.name == name).first()
+        return await db.scalar(
+            select(pool_models.Pool).where(pool_models.Pool.name == name)
+        )
 
     @classmethod
-    def get_pools(
-        cls, db: Session, skip: int = 0, limit: int = 100
+    async def get_pools(
+        cls,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: int | None = None,
     ) -> list[pool_models.Pool]:
         """
         Returns a list of pool data, with optional pagination
 
         :param skip: (optional) the number of records to skip (default: 0)
         :param limit: (optional) the max number of records to retrieve (default: 100)
+        :param after_id: (optional) ID of the last record of the previous page,
+        replaces skip
 
         :return: a list of pool data, where skip < user_id <= limit
         """
-        pools = db.query(pool_models.Pool).offset(skip).limit(limit).all()
+        pools = (
+            await db.scalars(
+                paginate(
+                    select(pool_models.Pool), pool_models.Pool.id, skip, limit, after_id
+                )
+            )
+        ).all()
         return pools
 
     @classmethod
-    def put_pool(
-        cls, db: Session, pool_data: pool_schemas.PoolPut, user_id: int
+    async def put_pool(
+        cls, db: AsyncSession, pool_data: pool_schemas.PoolPut, user_id: int
     ) -> pool_models.Pool:
         """
         Inserts a new pool record into the database
@@ -73,13 +93,13 @@ class PoolService:
         db_pool.created_at = creation_time
         db_pool.updated_at = creation_time
         db.add(db_pool)
-        db.commit()
-        db.refresh(db_pool)
+        await db.commit()
+        await db.refresh(db_pool)
         return db_pool
 
     @classmethod
-    def patch_pool(
-        cls, db: Session, id: int, pool_data: pool_schemas.PoolPatch, user_id: int
+    async def patch_pool(
+        cls, db: AsyncSession, id: int, pool_data: pool_schemas.PoolPatch, user_id: int
     ) -> pool_models.Pool:
         """
         Updates an existing pool record in the database
@@ -90,18 +110,18 @@ class PoolService:
 
         :return: the updated pool record
         """
-        db_pool = PoolService.get_pool_by_id(db=db, id=id)
+        db_pool = await PoolService.get_pool_by_id(db=db, id=id)
         for key, value in pool_data.dict(exclude_none=True).items():
             setattr(db_pool, key, value)
         db_pool.updated_by = user_id
         db_pool.updated_at = datetime.utcnow()
         db.add(db_pool)
-        db.commit()
-        db.refresh(db_pool)
+        await db.commit()
+        await db.refresh(db_pool)
         return db_pool
 
     @classmethod
-    def delete_pool(cls, db: Session, id: int) -> JSONResponse:
+    async def delete_pool(cls, db: AsyncSession, id: int) -> JSONResponse:
         """
         Deletes a pool record from the database
 
@@ -109,6 +129,8 @@ class PoolService:
 
         :return: a json with a "detail" key indicating success
         """
-        db.query(pool_models.Pool).filter(pool_models.Pool.id == id).delete()
-        db.commit()
+        await db.execute(delete(pool_models.Pool).where(pool_models.Pool.id == id))
+        await notify(db, ROUTING_CHANNEL, {})
+        await db.commit()
+        routing_tables.invalidate()
         return JSONResponse({"detail": "success"})
@@ -1,14 +1,18 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
 
 from schemas import pool_model as pool_model_schemas
 from models import pool as pool_model_models
+from models.model import Model
+from db.notify import ROUTING_CHANNEL, notify
+from utils.routing import routing_tables
 
 
 class PoolModelService:
     @classmethod
-    def get_pool_model_by_model_id(
-        cls, db: Session, id: int
+    async def get_pool_model_by_model_id(
+        cls, db: AsyncSession, id: int
     ) -> pool_model_models.PoolModel:
         """
         Returns the pool data found by pool id
@@ -17,18 +21,19 @@ class PoolModelService:
 
         :return: the pool data corresponding to the given ID or None if not found
         """
-        return (
-            db.query(pool_model_models.PoolModel)
-            .filter(pool_model_models.PoolModel.model_id == id)
-            .first()
+        return await db.scalar(
+            select(pool_model_models.PoolModel).where(
+                pool_model_models.PoolModel.model_id == id
+            )
         )
 
     @classmethod
-    def get_pool_models(
-        cls, db: Session, pool_id: int
+    async def get_pool_models(
+        cls, db: AsyncSession, pool_id: int
     ) -> list[pool_model_schemas.PoolModelDetailed]:
         """
-        Returns a list of models from the given pool
+        Returns a list of models from the given pool. The model names and
+        descriptions are joined in the same query.
 
         :param pool_id: the pool ID to retrieve models from
 
@@ -36,29 +41,37 @@ class PoolModelService:
         """
 
         pool_data = (
-            db.query(pool_model_models.PoolModel)
-            .filter(pool_model_models.PoolModel.pool_id == pool_id)
-            .all()
-        )
+            await db.execute(
+                select(
+                    pool_model_models.PoolModel.model_id,
+                    pool_model_models.PoolModel.mode,
+                    pool_model_models.PoolModel.weight,
+                    Model.name,
+                    Model.description,
+                )
+                .join(pool_model_models.PoolModel.model)
+                .where(pool_model_models.PoolModel.pool_id == pool_id)
+            )
+        ).all()
 
         list_of_models = [
             pool_model_schemas.PoolModelDetailed(
-                model_id=pool_model.model_id,
+                model_id=row.model_id,
                 pool_id=pool_id,
-                name=pool_model.model.name,
-                description=pool_model.model.description,
-                mode=pool_model.mode,
-                weight=pool_model.weight,
+                name=row.name,
+                description=row.description,
+                mode=row.mode,
+                weight=row.weight,
             )
-            for pool_model in pool_data
+            for row in pool_data
         ]
 
         return list_of_models
 
     @classmethod
-    def put_pool_model(
+    async def put_pool_model(
         cls,
-        db: Session,
+        db: AsyncSession,
         pool_id: int,
         model_id: int,
         data: pool_model_schemas.PoolPutModel,
@@ -79,14 +92,16 @@ class PoolModelService:
         )
 
         db.add(db_pool)
-        db.commit()
-        db.refresh(db_pool)
+        await notify(db, ROUTING_CHANNEL, {})
+        await db.commit()
+        routing_tables.invalidate()
+        await db.refresh(db_pool)
         return db_pool
 
     @classmethod
-    def patch_pool_model(
+    async def patch_pool_model(
         cls,
-        db: Session,
+        db: AsyncSession,
         pool_id: int,
         model_id: int,
         data: pool_model_schemas.PoolPatchModel,
@@ -100,22 +115,23 @@ class PoolModelService:
 
         :return: a json with a "detail" key indicating success
         """
-        db_pool_model = (
-            db.query(pool_model_models.PoolModel)
-            .filter(pool_model_models.PoolModel.pool_id == pool_id)
-            .filter(pool_model_models.PoolModel.model_id == model_id)
-            .first()
+        db_pool_model = await db.scalar(
+            select(pool_model_models.PoolModel)
+            .where(pool_model_models.PoolModel.pool_id == pool_id)
+            .where(pool_model_models.PoolModel.model_id == model_id)
         )
         for key, value in data.dict(exclude_none=True).items():
             setattr(db_pool_model, key, value)
         db.add(db_pool_model)
-        db.commit()
-        db.refresh(db_pool_model)
+        await notify(db, ROUTING_CHANNEL, {})
+        await db.commit()
+        routing_tables.invalidate()
+        await db.refresh(db_pool_model)
         return db_pool_model
 
     @classmethod
-    def delete_pool_model(
-        cls, db: Session, model_id: int, pool_id: int
+    async def delete_pool_model(
+        cls, db: AsyncSession, model_id: int, pool_id: int
     ) -> JSONResponse:
         """
         Inserts a new model record into the pool in the database
@@ -125,8 +141,12 @@ class PoolModelService:
 
         :return: a json with a "detail" key indicating success
         """
-        db.query(pool_model_models.PoolModel).filter(
-            pool_model_models.PoolModel.pool_id == pool_id
-        ).filter(pool_model_models.PoolModel.model_id == model_id).delete()
-        db.commit()
+        await db.execute(
+            delete(pool_model_models.PoolModel)
+            .where(pool_model_models.PoolModel.pool_id == pool_id)
+            .where(pool_model_models.PoolModel.model_id == model_id)
+        )
+        await notify(db, ROUTING_CHANNEL, {})
+        await db.commit()
+        routing_tables.invalidate()
         return JSONResponse(content={"detail": "success"})
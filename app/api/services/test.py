@@ -4,16 +4,18 @@ to send requests directly to the database
 """
 
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
 
 from schemas import test as test_schemas
 from models import test as test_models
+from utils.pagination import paginate
 
 
 class TestService:
     @classmethod
-    def get_test_by_id(cls, db: Session, id: int) -> test_models.Test | None:
+    async def get_test_by_id(cls, db: AsyncSession, id: int) -> test_models.Test | None:
         """
         Returns the test data found by test id
 
@@ -21,10 +23,14 @@ class TestService:
 
         :return: the test data corresponding to the given ID or None if not found
         """
-        return db.query(test_models.Test).filter(test_models.Test.id == id).first()
+        return await db.scalar(
+            select(test_models.Test).where(test_models.Test.id == id)
+        )
 
     @classmethod
-    def get_test_by_name(cls, db: Session, name: str) -> test_models.Test | None:
+    async def get_test_by_name(
+        cls, db: AsyncSession, name: str
+    ) -> test_models.Test | None:
         """
         Returns the test data found by test id
 
@@ -32,26 +38,40 @@ class TestService:
 
         :return: the test data corresponding to the given ID or None if not found
         """
-        return db.query(test_models.Test).filter(test_models.Test.name == name).first()
+        return await db.scalar(
+            select(test_models.Test).where(test_models.Test.name == name)
+        )
 
     @classmethod
-    def get_tests(
-        cls, db: Session, skip: int = 0, limit: int = 100
+    async def get_tests(
+        cls,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: int | None = None,
     ) -> list[test_models.Test]:
         """
         Returns a list of test data, with optional pagination
 
         :param skip: (optional) the number of records to skip (default: 0)
         :param limit: (optional) the max number of records to retrieve (default: 100)
+        :param after_id: (optional) ID of the last record of the previous page,
+        replaces skip
 
         :return: a list of test data, where skip < test_id <= skip+limit
         """
-        tests = db.query(test_models.Test).offset(skip).limit(limit).all()
+        tests = (
+            await db.scalars(
+                paginate(
+                    select(test_models.Test), test_models.Test.id, skip, limit, after_id
+                )
+            )
+        ).all()
         return tests
 
     @classmethod
-    def put_test(
-        cls, db: Session, test_data: test_schemas.TestPut, user_id: int
+    async def put_test(
+        cls, db: AsyncSession, test_data: test_schemas.TestPut, user_id: int
     ) -> test_models.Test:
         """
         Inserts a new test record into the database
@@ -69,13 +89,13 @@ class TestService:
         db_test.created_at = creation_time
         db_test.updated_at = creation_time
         db.add(db_test)
-        db.commit()
-        db.refresh(db_test)
+        await db.commit()
+        await db.refresh(db_test)
         return db_test
 
     @classmethod
-    def patch_test(
-        cls, db: Session, id: int, test_data: test_schemas.TestPatch, user_id: int
+    async def patch_test(
+        cls, db: AsyncSession, id: int, test_data: test_schemas.TestPatch, user_id: int
     ) -> test_models.Test:
         """
         Updates an existing test record in the database
@@ -86,18 +106,18 @@ class TestService:
 
         :return: the updated test record
         """
-        db_test = TestService.get_test_by_id(db=db, id=id)
+        db_test = await TestService.get_test_by_id(db=db, id=id)
         for key, value in test_data.dict(exclude_none=True).items():
             setattr(db_test, key, value)
         db_test.updated_by = user_id
         db_test.updated_at = datetime.utcnow()
         db.add(db_test)
-        db.commit()
-        db.refresh(db_test)
+        await db.commit()
+        await db.refresh(db_test)
         return db_test
 
     @classmethod
-    def delete_test(cls, db: Session, id: int) -> JSONResponse:
+    async def delete_test(cls, db: AsyncSession, id: int) -> JSONResponse:
         """
         Deletes a test record from the database
 
@@ -105,6 +125,6 @@ class TestService:
 
         :return: a json with a "detail" key indicating success
         """
-        db.query(test_models.Test).filter(test_models.Test.id == id).delete()
-        db.commit()
+        await db.execute(delete(test_models.Test).where(test_models.Test.id == id))
+        await db.commit()
         return JSONResponse({"detail": "success"})
@@ -3,16 +3,18 @@ This module provides services which are used
 to send requests directly to the database
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
 
 from schemas import user as user_schemas
 from models import user as user_models
+from utils.pagination import paginate
 
 
 class UserService:
     @classmethod
-    def get_user_by_id(cls, db: Session, id: int) -> user_models.User | None:
+    async def get_user_by_id(cls, db: AsyncSession, id: int) -> user_models.User | None:
         """
         Returns the user data found by user id
 
@@ -21,10 +23,14 @@ class UserService:
 
         :return: the user data corresponding to the given ID or None if not found
         """
-        return db.query(user_models.User).filter(user_models.User.id == id).first()
+        return await db.scalar(
+            select(user_models.User).where(user_models.User.id == id)
+        )
 
     @classmethod
-    def get_user_by_email(cls, db: Session, email: str) -> user_models.User | None:
+    async def get_user_by_email(
+        cls, db: AsyncSession, email: str
+    ) -> user_models.User | None:
         """
         Returns the user data found by user email
 
@@ -33,13 +39,17 @@ class UserService:
 
         :return: the user data corresponding to the given email or None if not found
         """
-        return (
-            db.query(user_models.User).filter(user_models.User.email == email).first()
+        return await db.scalar(
+            select(user_models.User).where(user_models.User.email == email)
         )
 
     @classmethod
-    def get_users(
-        cls, db: Session, skip: int = 0, limit: int = 100
+    async def get_users(
+        cls,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: int | None = None,
     ) -> list[user_models.User]:
         """
         Returns a list of user data, with optional pagination
@@ -48,14 +58,24 @@ class UserService:
         :param skip: (optional) the number of records to skip (default: 0)
         :param limit: (optional) the maximum number of records to retrieve
         (default: 100)
+        :param after_id: (optional) ID of the last record of the previous page,
+        replaces skip
 
         :return: a list of user data, where skip < user_id < limit
         """
-        users = db.query(user_models.User).offset(skip).limit(limit).all()
+        users = (
+            await db.scalars(
+                paginate(
+                    select(user_models.User), user_models.User.id, skip, limit, after_id
+                )
+            )
+        ).all()
         return users
 
     @classmethod
-    def put_user(cls, db: Session, user_data: user_schemas.UserPut) -> user_models.User:
+    async def put_user(
+        cls, db: AsyncSession, user_data: user_schemas.UserPut
+    ) -> user_models.User:
         """
         Inserts a new user record into the database
 
@@ -66,13 +86,13 @@ class UserService:
         """
         db_user = user_models.User(**user_data.dict())
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         return db_user
 
     @classmethod
-    def patch_user(
-        cls, db: Session, user_id: int, user_data: user_schemas.UserPatch
+    async def patch_user(
+        cls, db: AsyncSession, user_id: int, user_data: user_schemas.UserPatch
     ) -> user_models.User:
         """
         Updates an existing user record in the database
@@ -83,16 +103,16 @@ class UserService:
 
         :return: the updated user record
         """
-        db_user = UserService.get_user_by_id(db=db, id=user_id)
+        db_user = await UserService.get_user_by_id(db=db, id=user_id)
         for key, value in user_data.dict(exclude_none=True).items():
             setattr(db_user, key, value)
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         return db_user
 
     @classmethod
-    def delete_user(cls, db: Session, id: str) -> JSONResponse:
+    async def delete_user(cls, db: AsyncSession, id: str) -> JSONResponse:
         """
         Deletes a user record from the database
 
@@ -101,6 +121,6 @@ class UserService:
 
         :return: a json with a "detail" key indicating success
         """
-        db.query(user_models.User).filter(user_models.User.id == id).delete()
-        db.commit()
+        await db.execute(delete(user_models.User).where(user_models.User.id == id))
+        await db.commit()
         return JSONResponse({"detail": "success"})
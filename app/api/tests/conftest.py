@@ -0,0 +1,122 @@
+"""
+Fixtures of the tests, which run against an in-memory SQLite database with
+the ``core`` schema attached.
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import models  # noqa: E402
+from models import Gate, GatePool, Model, ModelDetails, Pool, PoolModel  # noqa: E402
+from models.model import ModelStatus  # noqa: E402
+from models.pool import PoolModelMode  # noqa: E402
+
+
+async def create_engine() -> AsyncEngine:
+    """
+    Creates an in-memory database with all tables
+
+    :return: the engine, all sessions share its single connection
+    """
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def attach_core(dbapi_connection, connection_record):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS core")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    return engine
+
+
+@pytest.fixture
+def run_db() -> Callable:
+    """
+    Runs a test coroutine with a session of a new database
+
+    Example:
+    >>> def test_something(run_db):
+    >>>     async def scenario(db, engine):
+    >>>         ...
+    >>>     run_db(scenario)
+    """
+
+    def run(scenario: Callable[[AsyncSession, AsyncEngine], Awaitable]) -> None:
+        async def main():
+            engine = await create_engine()
+            try:
+                async with AsyncSession(engine, expire_on_commit=False) as db:
+                    await scenario(db, engine)
+            finally:
+                await engine.dispose()
+
+        asyncio.run(main())
+
+    return run
+
+
+@pytest.fixture
+def seed_topology() -> Callable[[AsyncSession], Awaitable[list[str]]]:
+    """
+    Seeds a gate with one pool of deployed production models
+
+    :return: coroutine function seeding a session and returning the names of
+    the models, whose IDs count from 1
+    """
+
+    async def seed(db: AsyncSession) -> list[str]:
+        now = datetime.utcnow()
+        audit = dict(created_at=now, created_by=1, updated_at=now, updated_by=1)
+        names = [f"model-{model_id}" for model_id in range(1, 6)]
+        db.add(Gate(id=1, name="gate", description="gate", **audit))
+        db.add(Pool(id=1, name="pool", description="pool", **audit))
+        for model_id, name in enumerate(names, 1):
+            db.add(
+                Model(
+                    id=model_id,
+                    name=name,
+                    description="model",
+                    created_at=now,
+                    updated_at=now,
+                    status=ModelStatus.DEPLOYED,
+                    deployed_at=now,
+                )
+            )
+        await db.flush()
+        for model_id in range(1, len(names) + 1):
+            db.add(
+                ModelDetails(
+                    model_id=model_id,
+                    mlflow_server_id=1,
+                    artifact_uri="s3://model",
+                    min_replicas=1,
+                    max_replicas=1,
+                    cpu_request="1",
+                    cpu_limit="1",
+                    memory_request="1Gi",
+                    memory_limit="1Gi",
+                )
+            )
+            db.add(
+                PoolModel(
+                    pool_id=1,
+                    model_id=model_id,
+                    mode=PoolModelMode.PRODUCTION,
+                    weight=1,
+                )
+            )
+        db.add(GatePool(gate_id=1, pool_id=1))
+        await db.commit()
+        return names
+
+    return seed
@@ -0,0 +1,54 @@
+"""
+Tests of the pools of blocking work.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from config.config import settings
+from utils.executor import TaskExecutor, TaskKind
+
+
+def test_shutdown_awaits_running_and_cancels_queued_tasks(monkeypatch):
+    monkeypatch.setattr(settings, "EXECUTOR_THREAD_WORKERS", 1)
+    monkeypatch.setattr(settings, "EXECUTOR_SHUTDOWN_TIMEOUT_SECONDS", 5.0)
+    started = threading.Event()
+    finished = []
+
+    def work(name: str) -> str:
+        started.set()
+        time.sleep(0.2)
+        finished.append(name)
+        return name
+
+    async def main():
+        running = asyncio.create_task(TaskExecutor.run(TaskKind.DEPLOY, work, "a"))
+        queued = asyncio.create_task(TaskExecutor.run(TaskKind.DEPLOY, work, "b"))
+        await asyncio.to_thread(started.wait, 5)
+        await TaskExecutor.shutdown()
+        assert finished == ["a"]
+        assert await running == "a"
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+
+    asyncio.run(main())
+
+
+def test_shutdown_abandons_tasks_after_timeout(monkeypatch):
+    monkeypatch.setattr(settings, "EXECUTOR_SHUTDOWN_TIMEOUT_SECONDS", 0.1)
+    release = threading.Event()
+
+    async def main():
+        task = asyncio.create_task(TaskExecutor.run(TaskKind.DEPLOY, release.wait, 5))
+        await asyncio.sleep(0.05)
+        start = time.monotonic()
+        await TaskExecutor.shutdown()
+        assert time.monotonic() - start < 1
+        assert not task.done()
+        release.set()
+        assert await task
+
+    asyncio.run(main())
@@ -0,0 +1,202 @@
+"""
+Tests of the inference proxy of the gates, which forwards to stub model
+servers behind an httpx.MockTransport.
+"""
+
+import asyncio
+import json
+import random
+from typing import Callable
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import select, update
+
+from config.config import settings
+from models import Model, PoolModel
+from models.pool import PoolModelMode
+from routers.gate import router
+from services import get_db
+from utils.inference_proxy import InferenceProxy
+from utils.routing import routing_tables
+from utils.shadow import shadow_mirror
+
+
+@pytest.fixture
+def invoke(monkeypatch) -> Callable:
+    """
+    Runs a test coroutine with a client of the gate routes, whose models are
+    served by a stub
+
+    Example:
+    >>> def test_something(run_db, seed_topology, invoke):
+    >>>     async def scenario(db, client, backend):
+    >>>         backend.handler = lambda request: httpx.Response(200)
+    >>>         await client.post("/gate/gate/invocations")
+    >>>     run_db(lambda db, engine: _seeded(db, seed_topology, invoke, scenario))
+    """
+    monkeypatch.setattr(settings, "PROXY_BACKEND_URL", "http://{service}")
+
+    class Backend:
+        def __init__(self) -> None:
+            self.requests: list[httpx.Request] = []
+            self.handler: Callable[[httpx.Request], httpx.Response] = self.echo
+
+        @staticmethod
+        def echo(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(
+                200,
+                content=request.content,
+                headers={"content-type": "application/json", "x-internal": "1"},
+            )
+
+        def __call__(self, request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            return self.handler(request)
+
+    async def run(db, scenario) -> None:
+        backend = Backend()
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[router.dependencies[0].dependency] = lambda: None
+        routing_tables.invalidate()
+        InferenceProxy._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(backend)
+        )
+        try:
+            async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+                await scenario(db, client, backend)
+        finally:
+            await InferenceProxy.close()
+            routing_tables.invalidate()
+
+    return run
+
+
+def test_picks_models_by_weight(run_db, seed_topology, invoke):
+    async def scenario(db, client, backend):
+        await db.execute(update(PoolModel).values(weight=0))
+        await db.execute(
+            update(PoolModel).where(PoolModel.model_id == 1).values(weight=1)
+        )
+        await db.execute(
+            update(PoolModel).where(PoolModel.model_id == 2).values(weight=3)
+        )
+        await db.commit()
+        random.seed(0)
+        counts = {}
+        for _ in range(400):
+            response = await client.post("/gate/gate/invocations", content=b"{}")
+            assert response.status_code == 200
+            model_name = response.headers["x-tyro-model"]
+            counts[model_name] = counts.get(model_name, 0) + 1
+        assert set(counts) == {"model-1", "model-2"}
+        assert 60 < counts["model-1"] < 140
+        assert {request.url.host for request in backend.requests} == {
+            "tyro-model-model-1",
+            "tyro-model-model-2",
+        }
+
+    run_db(lambda db, engine: _seeded(db, seed_topology, invoke, scenario))
+
+
+def test_forwards_body_and_headers(run_db, seed_topology, invoke):
+    async def scenario(db, client, backend):
+        response = await client.post(
+            "/gate/gate/invocations",
+            content=b'{"inputs": [1, 2]}',
+            headers={
+                "content-type": "application/json",
+                "accept": "application/json",
+                "authorization": "Bearer token",
+                "x-custom": "1",
+            },
+        )
+        assert response.status_code == 200
+        assert response.content == b'{"inputs": [1, 2]}'
+        assert response.headers["content-type"] == "application/json"
+        assert "x-internal" not in response.headers
+        (request,) = backend.requests
+        assert request.url.path == "/invocations"
+        assert request.headers["content-type"] == "application/json"
+        assert request.headers["accept"] == "application/json"
+        assert "authorization" not in request.headers
+        assert "x-custom" not in request.headers
+
+        backend.handler = lambda request: httpx.Response(422, json={"error": "x"})
+        response = await client.post("/gate/gate/invocations", content=b"{}")
+        assert response.status_code == 422
+        assert response.json() == {"error": "x"}
+
+    run_db(lambda db, engine: _seeded(db, seed_topology, invoke, scenario))
+
+
+@pytest.mark.parametrize(
+    "error, status_code",
+    [(httpx.ConnectError("refused"), 502), (httpx.ReadTimeout("slow"), 504)],
+)
+def test_maps_upstream_errors(run_db, seed_topology, invoke, error, status_code):
+    async def scenario(db, client, backend):
+        def fail(request):
+            raise error
+
+        backend.handler = fail
+        response = await client.post("/gate/gate/invocations", content=b"{}")
+        assert response.status_code == status_code
+
+    run_db(lambda db, engine: _seeded(db, seed_topology, invoke, scenario))
+
+
+def test_unknown_and_empty_gates(run_db, seed_topology, invoke):
+    async def scenario(db, client, backend):
+        response = await client.post("/gate/missing/invocations", content=b"{}")
+        assert response.status_code == 404
+        await db.execute(update(Model).values(deployed_at=None))
+        await db.commit()
+        routing_tables.invalidate()
+        response = await client.post("/gate/gate/invocations", content=b"{}")
+        assert response.status_code == 503
+        assert backend.requests == []
+
+    run_db(lambda db, engine: _seeded(db, seed_topology, invoke, scenario))
+
+
+def test_mirrors_to_staging_models(run_db, seed_topology, invoke, monkeypatch):
+    monkeypatch.setattr(settings, "SHADOW_FRACTION", 1.0)
+
+    async def scenario(db, client, backend):
+        pool_model = await db.scalar(select(PoolModel).where(PoolModel.model_id == 1))
+        pool_model.mode = PoolModelMode.STAGING
+        pool_model.weight = 0
+        await db.commit()
+
+        def answer(request):
+            if request.url.host == "tyro-model-model-1":
+                return httpx.Response(200, json={"outputs": [2]})
+            return httpx.Response(200, json={"outputs": [1]})
+
+        backend.handler = answer
+        shadow_mirror.models.clear()
+        shadow_mirror.start()
+        await shadow_mirror.client.aclose()
+        shadow_mirror.client = httpx.AsyncClient(transport=httpx.MockTransport(backend))
+        try:
+            for _ in range(3):
+                response = await client.post("/gate/gate/invocations", content=b"{}")
+                assert response.headers["x-tyro-model"] != "model-1"
+            await asyncio.wait_for(shadow_mirror.queue.join(), timeout=5)
+        finally:
+            await shadow_mirror.stop()
+        stats = shadow_mirror.stats("model-1")
+        assert stats["mirrored"] == 3
+        assert stats["mismatched"] == 3
+        assert json.loads(stats["diffs"][0]["body"]) == {"outputs": [2]}
+
+    run_db(lambda db, engine: _seeded(db, seed_topology, invoke, scenario))
+
+
+async def _seeded(db, seed_topology, invoke, scenario) -> None:
+    await seed_topology(db)
+    await invoke(db, scenario)
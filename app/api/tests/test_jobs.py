@@ -0,0 +1,172 @@
+"""
+Tests of the background job queue.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+
+from config.config import settings
+from models.job import JobKind, JobStatus
+from services import JobService
+from utils.exception import JobAlreadyPending, JobQueueFull
+
+
+def test_enqueue_skips_models_with_pending_jobs(run_db):
+    async def scenario(db, engine):
+        await JobService.enqueue_job(db, JobKind.BUILD, model_id=1, user_id=1)
+        with pytest.raises(JobAlreadyPending):
+            await JobService.enqueue_job(db, JobKind.DEPLOY, model_id=1, user_id=1)
+
+        jobs, busy = await JobService.enqueue_jobs(
+            db, JobKind.BUILD, model_ids=[1, 2, 3], user_id=1
+        )
+        assert [job.model_id for job in jobs] == [2, 3]
+        assert busy == [1]
+
+        job, busy = await JobService.enqueue_batch_job(
+            db, JobKind.DEPLOY, model_ids=[3, 4, 5], user_id=1
+        )
+        assert job.payload == {"model_ids": [4, 5]}
+        assert busy == [3]
+        with pytest.raises(JobAlreadyPending):
+            await JobService.enqueue_job(db, JobKind.DEPLOY, model_id=5, user_id=1)
+
+    run_db(scenario)
+
+
+def test_enqueue_respects_queue_limit(run_db, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_QUEUE_LIMIT", 2)
+
+    async def scenario(db, engine):
+        with pytest.raises(JobQueueFull):
+            await JobService.enqueue_jobs(
+                db, JobKind.BUILD, model_ids=[1, 2, 3], user_id=1
+            )
+        await JobService.enqueue_jobs(db, JobKind.BUILD, model_ids=[1, 2], user_id=1)
+        with pytest.raises(JobQueueFull):
+            await JobService.enqueue_job(db, JobKind.BUILD, model_id=3, user_id=1)
+        with pytest.raises(JobQueueFull):
+            await JobService.enqueue_batch_job(
+                db, JobKind.DEPLOY, model_ids=[3], user_id=1
+            )
+
+    run_db(scenario)
+
+
+def test_lease_skips_locked_and_leased_jobs(run_db):
+    async def scenario(db, engine):
+        statements = []
+        event.listen(
+            db.sync_session,
+            "do_orm_execute",
+            lambda state: statements.append(state.statement),
+        )
+        first = await JobService.put_job(db, JobKind.BUILD, 1, user_id=1)
+        second = await JobService.put_job(db, JobKind.BUILD, 2, user_id=1)
+
+        leased = await JobService.lease_job(db, "worker-1")
+        assert leased.id == first.id
+        assert leased.status == JobStatus.RUNNING
+        assert leased.lease_owner == "worker-1"
+        assert leased.attempts == 1
+        assert (await JobService.lease_job(db, "worker-2")).id == second.id
+        assert await JobService.lease_job(db, "worker-3") is None
+        assert any(
+            "FOR UPDATE SKIP LOCKED"
+            in str(statement.compile(dialect=postgresql.dialect()))
+            for statement in statements
+        )
+
+    run_db(scenario)
+
+
+def test_heartbeat_extends_only_own_lease(run_db):
+    async def scenario(db, engine):
+        job = await JobService.put_job(db, JobKind.BUILD, 1, user_id=1)
+        leased = await JobService.lease_job(db, "worker-1")
+        expires_at = leased.lease_expires_at
+        leased.lease_expires_at = expires_at - timedelta(seconds=30)
+        await db.commit()
+
+        assert await JobService.heartbeat_job(db, job.id, "worker-1")
+        await db.refresh(leased)
+        assert leased.lease_expires_at >= expires_at
+        assert not await JobService.heartbeat_job(db, job.id, "worker-2")
+
+    run_db(scenario)
+
+
+def test_expired_lease_is_reclaimed(run_db):
+    async def scenario(db, engine):
+        job = await JobService.put_job(db, JobKind.BUILD, 1, user_id=1)
+        leased = await JobService.lease_job(db, "worker-1")
+        leased.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        await db.commit()
+
+        reclaimed = await JobService.lease_job(db, "worker-2")
+        assert reclaimed.id == job.id
+        assert reclaimed.lease_owner == "worker-2"
+        assert reclaimed.attempts == 2
+        assert not await JobService.heartbeat_job(db, job.id, "worker-1")
+        assert not await JobService.complete_job(db, job.id, "worker-1")
+        assert await JobService.fail_job(db, job.id, "worker-1", "late") is None
+        await db.refresh(reclaimed)
+        assert reclaimed.status == JobStatus.RUNNING
+        assert reclaimed.lease_owner == "worker-2"
+
+    run_db(scenario)
+
+
+def test_expired_lease_without_attempts_fails(run_db, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 1)
+
+    async def scenario(db, engine):
+        job = await JobService.put_job(db, JobKind.BUILD, 1, user_id=1)
+        leased = await JobService.lease_job(db, "worker-1")
+        leased.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        await db.commit()
+
+        assert await JobService.lease_job(db, "worker-2") is None
+        failed = await JobService.get_job_by_id(db, job.id)
+        await db.refresh(failed)
+        assert failed.status == JobStatus.FAILED
+        assert failed.last_error == "Lease expired"
+        # A late worker does not overwrite the outcome
+        failed.lease_owner = "worker-1"
+        await db.commit()
+        assert not await JobService.complete_job(db, job.id, "worker-1")
+        await db.refresh(failed)
+        assert failed.status == JobStatus.FAILED
+
+    run_db(scenario)
+
+
+def test_failed_attempts_back_off_exponentially(run_db, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "JOB_RETRY_BACKOFF_SECONDS", 30)
+
+    async def scenario(db, engine):
+        job = await JobService.put_job(db, JobKind.BUILD, 1, user_id=1)
+        for attempt, backoff in [(1, 30), (2, 60)]:
+            leased = await JobService.lease_job(db, "worker-1")
+            assert leased.attempts == attempt
+            before = datetime.utcnow()
+            failed = await JobService.fail_job(db, job.id, "worker-1", "error")
+            assert failed.status == JobStatus.QUEUED
+            assert failed.last_error == "error"
+            delay = (failed.run_after - before).total_seconds()
+            assert backoff - 1 <= delay <= backoff + 1
+            # The job is not due before its backoff passed
+            assert await JobService.lease_job(db, "worker-1") is None
+            failed.run_after = datetime.utcnow() - timedelta(seconds=1)
+            await db.commit()
+
+        await JobService.lease_job(db, "worker-1")
+        failed = await JobService.fail_job(db, job.id, "worker-1", "error")
+        assert failed.status == JobStatus.FAILED
+        assert failed.finished_at is not None
+
+    run_db(scenario)
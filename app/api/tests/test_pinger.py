@@ -0,0 +1,189 @@
+"""
+Tests of the rollout checks of the pinger, which follow a fake informer.
+"""
+
+import threading
+
+from kubernetes.client import (
+    V1ContainerState,
+    V1ContainerStateWaiting,
+    V1ContainerStatus,
+    V1Deployment,
+    V1DeploymentCondition,
+    V1DeploymentSpec,
+    V1DeploymentStatus,
+    V1LabelSelector,
+    V1ObjectMeta,
+    V1OwnerReference,
+    V1Pod,
+    V1PodList,
+    V1PodStatus,
+    V1PodTemplateSpec,
+    V1ReplicaSet,
+)
+
+import utils.cluster_pingers
+from utils.cluster_pingers import Pinger
+
+
+NAME = "tyro-model-test"
+NAMESPACE = "models"
+REVISION = Pinger.REVISION_ANNOTATION
+
+
+class FakeInformer:
+    """
+    Informer holding fixed resources, the listeners are notified by the test.
+    """
+
+    def __init__(self, objects: dict[str, list]) -> None:
+        self.synced = True
+        self.namespace = NAMESPACE
+        self.objects = objects
+        self.listeners = []
+
+    def add_listener(self, listener) -> None:
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener) -> None:
+        self.listeners.remove(listener)
+
+    def get(self, kind: str, name: str):
+        return next(iter(self.objects.get(kind, [])), None)
+
+    def list_app(self, kind: str, app: str) -> list:
+        return list(self.objects.get(kind, []))
+
+
+def deployment(
+    generation: int,
+    observed_generation: int,
+    revision: str,
+    ready: bool = False,
+    conditions: list | None = None,
+) -> V1Deployment:
+    return V1Deployment(
+        metadata=V1ObjectMeta(
+            name=NAME,
+            uid="deployment-uid",
+            generation=generation,
+            annotations={REVISION: revision},
+        ),
+        spec=V1DeploymentSpec(
+            replicas=1,
+            selector=V1LabelSelector(match_labels={"app": NAME}),
+            template=V1PodTemplateSpec(),
+        ),
+        status=V1DeploymentStatus(
+            observed_generation=observed_generation,
+            replicas=1 if ready else 2,
+            updated_replicas=1,
+            ready_replicas=1 if ready else 0,
+            conditions=conditions,
+        ),
+    )
+
+
+def replica_set(revision: str, template_hash: str) -> V1ReplicaSet:
+    return V1ReplicaSet(
+        metadata=V1ObjectMeta(
+            name=f"{NAME}-{template_hash}",
+            labels={"app": NAME, "pod-template-hash": template_hash},
+            annotations={REVISION: revision},
+            owner_references=[
+                V1OwnerReference(
+                    api_version="apps/v1",
+                    kind="Deployment",
+                    name=NAME,
+                    uid="deployment-uid",
+                )
+            ],
+        )
+    )
+
+
+def pod(template_hash: str, phase: str, waiting: str | None = None) -> V1Pod:
+    container_statuses = None
+    if waiting is not None:
+        container_statuses = [
+            V1ContainerStatus(
+                name=NAME,
+                image="image",
+                image_id="",
+                ready=False,
+                restart_count=3,
+                state=V1ContainerState(waiting=V1ContainerStateWaiting(reason=waiting)),
+            )
+        ]
+    return V1Pod(
+        metadata=V1ObjectMeta(
+            name=f"{NAME}-{template_hash}-pod",
+            labels={"app": NAME, "pod-template-hash": template_hash},
+        ),
+        status=V1PodStatus(phase=phase, container_statuses=container_statuses),
+    )
+
+
+def test_old_failing_pod_does_not_fail_new_rollout(monkeypatch):
+    fake = FakeInformer(
+        {
+            "deployment": [deployment(2, 2, "2")],
+            "replicaset": [replica_set("1", "old"), replica_set("2", "new")],
+            "pod": [
+                pod("old", "Pending", waiting="CrashLoopBackOff"),
+                pod("new", "Pending"),
+            ],
+        }
+    )
+    monkeypatch.setattr(utils.cluster_pingers, "informer", fake)
+    failures = []
+
+    def become_ready() -> None:
+        (listener,) = fake.listeners
+        listener("pod", "MODIFIED", pod("new", "Running"))
+        listener("deployment", "MODIFIED", deployment(2, 2, "2", ready=True))
+
+    timer = threading.Timer(0.1, become_ready)
+    timer.start()
+    try:
+        ready = Pinger(
+            NAME,
+            NAMESPACE,
+            Pinger.deployment_predicate,
+            lambda **kwargs: failures.append(kwargs),
+            {},
+            timeout=5,
+            generation=2,
+        ).ping()
+    finally:
+        timer.cancel()
+    assert ready
+    assert not failures
+
+
+def test_conditions_of_previous_generation_are_ignored():
+    stale = deployment(
+        2,
+        1,
+        "1",
+        conditions=[
+            V1DeploymentCondition(type="Progressing", status="False"),
+            V1DeploymentCondition(type="ReplicaFailure", status="True"),
+        ],
+    )
+    assert not Pinger.deployment_failed(stale, V1PodList(items=[]), generation=2)
+    stale.status.observed_generation = 2
+    assert Pinger.deployment_failed(stale, V1PodList(items=[]), generation=2)
+
+
+def test_current_pods_wait_for_replica_set_of_revision():
+    replica_sets = {rs.metadata.name: rs for rs in [replica_set("1", "old")]}
+    pods = {p.metadata.name: p for p in [pod("old", "Running")]}
+    observed = deployment(2, 2, "2")
+    assert Pinger.current_pods(observed, replica_sets, pods, 2).items == []
+    new = replica_set("2", "new")
+    replica_sets[new.metadata.name] = new
+    new_pod = pod("new", "Pending")
+    pods[new_pod.metadata.name] = new_pod
+    assert Pinger.current_pods(observed, replica_sets, pods, 2).items == [new_pod]
+    assert Pinger.current_pods(deployment(2, 1, "1"), replica_sets, pods, 2).items == []
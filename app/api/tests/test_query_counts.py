@@ -0,0 +1,76 @@
+"""
+Guards the services against N+1 queries: each of them must run a fixed
+number of statements, whatever the number of rows.
+"""
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+
+from db.query_counter import QueryCounter
+from models import Gate, ModelDetails, Pool, PoolModel
+from models.model import ModelStatus
+from services import GateService, ModelService, PoolModelService
+
+
+def test_get_pool_models_joins_models(run_db, seed_topology):
+    async def scenario(db, engine):
+        names = await seed_topology(db)
+        with QueryCounter(engine, max_queries=1):
+            pool_models = await PoolModelService.get_pool_models(db, pool_id=1)
+        assert [pool_model.name for pool_model in pool_models] == names
+
+    run_db(scenario)
+
+
+def test_get_member_models_with_details(run_db, seed_topology):
+    async def scenario(db, engine):
+        names = await seed_topology(db)
+        with QueryCounter(engine, max_queries=1):
+            members = await ModelService.get_member_models_with_details(db, gate_id=1)
+        assert len(members) == len(names)
+        assert all(details is not None for _, details in members)
+
+    run_db(scenario)
+
+
+def test_get_routes(run_db, seed_topology):
+    async def scenario(db, engine):
+        names = await seed_topology(db)
+        with QueryCounter(engine, max_queries=1):
+            routes = await GateService.get_routes(db)
+        assert len(routes) == len(names)
+
+    run_db(scenario)
+
+
+def test_change_models_status(run_db, seed_topology):
+    async def scenario(db, engine):
+        names = await seed_topology(db)
+        with QueryCounter(engine, max_queries=1):
+            changed = await ModelService.change_models_status(
+                db, list(range(1, len(names) + 1)), ModelStatus.DEACTIVATING
+            )
+        assert len(changed) == len(names)
+
+    run_db(scenario)
+
+
+@pytest.mark.parametrize(
+    "entity, relationship",
+    [
+        (Gate, "pools"),
+        (Pool, "gates"),
+        (PoolModel, "model"),
+        (ModelDetails, "mlflow_server"),
+    ],
+)
+def test_lazy_loads_raise(run_db, seed_topology, entity, relationship):
+    async def scenario(db, engine):
+        await seed_topology(db)
+        db.expunge_all()
+        obj = await db.scalar(select(entity).limit(1))
+        with pytest.raises(InvalidRequestError):
+            getattr(obj, relationship)
+
+    run_db(scenario)
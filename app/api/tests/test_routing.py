@@ -0,0 +1,39 @@
+"""
+Tests of the routing tables of the gates.
+"""
+
+from sqlalchemy import select
+
+from models.pool import PoolModel, PoolModelMode
+from services import GateService
+from utils.routing import RoutingTable
+
+
+def test_compile_splits_production_and_staging_models():
+    table = RoutingTable.compile(
+        3,
+        [
+            ("gate", PoolModelMode.PRODUCTION, "a", 1),
+            ("gate", PoolModelMode.STAGING, "b", 0),
+            ("empty", None, None, None),
+        ],
+    )
+    assert table.version == 3
+    assert table.get("gate").names == ("a",)
+    assert table.get("gate").staging == ("b",)
+    assert table.get("gate").pick() == "a"
+    assert not table.get("empty")
+    assert table.get("missing") is None
+
+
+def test_get_routes_includes_staging_models_without_weight(run_db, seed_topology):
+    async def scenario(db, engine):
+        await seed_topology(db)
+        pool_model = await db.scalar(select(PoolModel).where(PoolModel.model_id == 1))
+        pool_model.mode = PoolModelMode.STAGING
+        pool_model.weight = 0
+        await db.commit()
+        routes = [tuple(row) for row in await GateService.get_routes(db)]
+        assert ("gate", PoolModelMode.STAGING, "model-1", 0) in routes
+
+    run_db(scenario)
@@ -1,3 +1,4 @@
 from utils.model_deployment import ModelDeployment  # noqa: F401
 from utils.model_builder import ModelBuilder  # noqa: F401
 from utils.cluster_pingers import Pinger  # noqa: F401
+from utils.executor import TaskExecutor, TaskKind  # noqa: F401
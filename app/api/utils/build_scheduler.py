@@ -0,0 +1,85 @@
+"""
+This module sizes the parallel image builds of a node.
+
+Every build runs its own docker build and mlflow environment, so the number
+of builds running side by side is bounded by the CPU and memory budget of
+the node and by the slots of the docker daemon, whichever is the smallest.
+"""
+
+import functools
+import logging
+import math
+import os
+
+from config.config import settings
+
+
+_logger = logging.getLogger(__name__)
+
+
+class BuildScheduler:
+    """
+    Computes the build capacity of the node and estimates when queued builds
+    are finished.
+
+    Example:
+    >>> BuildScheduler.capacity()
+    4
+    >>> BuildScheduler.eta(queued=100, running=4, build_seconds=120.0, nodes=2)
+    1560.0
+    """
+
+    @classmethod
+    @functools.cache
+    def capacity(cls) -> int:
+        """
+        Returns the number of builds which may run in parallel on this node
+
+        :return: the number of build slots, at least 1
+        """
+        limits = {"docker daemon slots": settings.MAX_CONCURRENT_BUILDS}
+        cpu_budget = settings.BUILD_CPU_BUDGET or cls.__host_cpus()
+        if cpu_budget:
+            limits["cpu budget"] = int(cpu_budget // settings.BUILD_CPU_PER_BUILD)
+        memory_budget = settings.BUILD_MEMORY_BUDGET_MB or cls.__host_memory_mb()
+        if memory_budget:
+            limits["memory budget"] = (
+                memory_budget // settings.BUILD_MEMORY_PER_BUILD_MB
+            )
+        bound = min(limits, key=limits.get)
+        capacity = max(limits[bound], 1)
+        _logger.info(f"Build capacity is {capacity}, bound by the {bound}")
+        return capacity
+
+    @classmethod
+    def eta(
+        cls, queued: int, running: int, build_seconds: float | None, nodes: int = 1
+    ) -> float | None:
+        """
+        Estimates the seconds until all queued and running builds are finished.
+        Builds are started in waves of the capacity of all building nodes.
+
+        :param queued: number of builds waiting for a slot
+        :param running: number of builds in progress
+        :param build_seconds: average duration of a build
+        :param nodes: number of nodes running builds
+
+        :return: estimated seconds or None if no build duration is known yet
+        """
+        if build_seconds is None:
+            return None
+        slots = cls.capacity() * max(nodes, 1)
+        return math.ceil((queued + running) / slots) * build_seconds
+
+    @staticmethod
+    def __host_cpus() -> int | None:
+        if hasattr(os, "sched_getaffinity"):
+            return len(os.sched_getaffinity(0))
+        return os.cpu_count()
+
+    @staticmethod
+    def __host_memory_mb() -> int | None:
+        try:
+            return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2**20
+        except (ValueError, OSError, AttributeError):
+            return None
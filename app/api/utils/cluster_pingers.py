@@ -1,10 +1,16 @@
 import logging
-from kubernetes import client, config
-from kubernetes.client import V1PodList
+import queue
+import threading
+from kubernetes import watch
+from kubernetes.client import V1Deployment, V1Pod, V1PodList, V1ReplicaSet
 import time
 from typing import Callable
 from enum import Enum
 
+from utils.events import EventBus
+from utils.k8s_client import K8sClient
+from utils.k8s_informer import informer
+
 _logger = logging.getLogger(__name__)
 
 
@@ -23,60 +29,277 @@ class PodPhase(str, Enum):
 
 class Pinger:
     """
-    Pings resource using kubernetes api.
+    Watches resources using kubernetes api.
+
+    Pods, replica sets and the deployment are streamed with a watch filtered
+    by the ``app`` label, so the rollout is reported as soon as it is ready or
+    has clearly failed instead of after a fixed polling interval. Every change
+    of the rollout is published as a "rollout" event of the resource.
+
+    Only the state of the awaited generation counts: the conditions of the
+    deployment are read once the controller has observed it, and only the pods
+    of the replica set of its revision are checked, so the failing pods of a
+    previous rollout do not fail the new one.
+
+    In the models namespace the changes are taken from the informer cache
+    once it is synced, so a rollout does not open watches of its own.
     """
 
+    # Annotation of the deployment and its replica sets holding the revision
+    REVISION_ANNOTATION = "deployment.kubernetes.io/revision"
+
+    # Container waiting reasons which will not resolve without a new rollout
+    CONTAINER_FAILURE_REASONS = frozenset(
+        {
+            "ImagePullBackOff",
+            "ErrImageNeverPull",
+            "InvalidImageName",
+            "CrashLoopBackOff",
+            "CreateContainerConfigError",
+            "CreateContainerError",
+        }
+    )
+
     def __init__(
         self,
-        ping_callback: Callable,
-        ping_callback_args: dict,
+        name: str,
+        namespace: str,
         predicate: Callable,
         error_callback: Callable,
         error_callback_args: dict,
-        ping_amount: int,
+        timeout: int,
+        generation: int | None = None,
     ) -> None:
-        config.load_incluster_config()
-
-        self.ping_callback = ping_callback
-        self.ping_callback_args = ping_callback_args
+        """
+        :param name: Name of the deployment, pods and replica sets are selected
+        by ``app=<name>``
+        :param namespace: Namespace of the deployment
+        :param predicate: Callable checking if the pods (V1PodList) are ready
+        :param error_callback: Callable run with the last V1PodList on failure
+        :param error_callback_args: Arguments passed to the error callback
+        :param timeout: Number of seconds to wait for the rollout
+        :param generation: Generation of the deployment to wait for, older
+        states of an updated deployment are ignored
+        """
+        self.name = name
+        self.namespace = namespace
         self.predicate = predicate
         self.error_callback = error_callback
         self.error_callback_args = error_callback_args
-        self.ping_amount = ping_amount
+        self.timeout = timeout
+        self.generation = generation
 
     def ping(self) -> bool:
         """
-        Pings a resource and logs every action.
-        Uses callback functions to ping and check if the resource is responding.
+        Watches a resource and logs every action.
+        Uses callback functions to check if the resource is responding.
         In case of failure or no response uses callback function to log the error
         and do something about it.
 
+        :raises: Any exception raised by the watch streams
         :return: True if the resource responds, false otherwise
         """
-        _logger.info("Pinging resource...")
-        for i in range(1, self.ping_amount + 1):
-            _logger.info(f"Pinging resource {i}/{self.ping_amount}...")
-            api_response = self.ping_callback(**self.ping_callback_args)
-            if self.predicate(api_response):
-                _logger.info("Resource responded!")
-                return True
-            _logger.info(f"Resource is not responding waiting for {5 * i} seconds...")
-            time.sleep(5 * i)
-        _logger.error("Resource didn't respond in given time!")
+        _logger.info(f"Watching resource {self.name}...")
+        events = queue.Queue()
+        if informer.synced and informer.namespace == self.namespace:
+            stops = [self.__follow_informer(events)]
+        else:
+            stops = [
+                self.__watch(
+                    events,
+                    K8sClient.core().list_namespaced_pod,
+                    label_selector=f"app={self.name}",
+                ).stop,
+                self.__watch(
+                    events,
+                    K8sClient.apps().list_namespaced_replica_set,
+                    label_selector=f"app={self.name}",
+                ).stop,
+                self.__watch(
+                    events,
+                    K8sClient.apps().list_namespaced_deployment,
+                    field_selector=f"metadata.name={self.name}",
+                ).stop,
+            ]
+        pods: dict[str, V1Pod] = {}
+        replica_sets: dict[str, V1ReplicaSet] = {}
+        deployment: V1Deployment | None = None
+        api_response = V1PodList(items=[])
+        deadline = time.monotonic() + self.timeout
+        try:
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    event = events.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if isinstance(event, Exception):
+                    raise event
+
+                obj = event["object"]
+                if isinstance(obj, (V1Pod, V1ReplicaSet)):
+                    objects = pods if isinstance(obj, V1Pod) else replica_sets
+                    if event["type"] == "DELETED":
+                        objects.pop(obj.metadata.name, None)
+                    else:
+                        objects[obj.metadata.name] = obj
+                elif (obj.metadata.generation or 0) < (self.generation or 0):
+                    continue
+                else:
+                    deployment = None if event["type"] == "DELETED" else obj
+                api_response = self.current_pods(
+                    deployment, replica_sets, pods, self.generation
+                )
+                self.__publish(deployment, pods)
+
+                if self.deployment_failed(deployment, api_response, self.generation):
+                    _logger.error("Resource failed!")
+                    self.__publish(deployment, pods, result="failed")
+                    break
+                if (
+                    api_response.items
+                    and self.deployment_ready(deployment)
+                    and self.predicate(api_response)
+                ):
+                    _logger.info("Resource responded!")
+                    self.__publish(deployment, pods, result="ready")
+                    return True
+            else:
+                _logger.error("Resource didn't respond in given time!")
+                self.__publish(deployment, pods, result="timeout")
+        finally:
+            for stop in stops:
+                stop()
         self.error_callback(**self.error_callback_args, api_response=api_response)
         return False
 
+    def __publish(
+        self,
+        deployment: V1Deployment | None,
+        pods: dict[str, V1Pod],
+        result: str | None = None,
+    ) -> None:
+        """
+        Publishes the phases of the pods and the ready replicas of the rollout.
+        """
+        status = deployment.status if deployment is not None else None
+        EventBus.publish(
+            self.name,
+            "rollout",
+            pods={
+                name: pod.status.phase if pod.status else None
+                for name, pod in pods.items()
+            },
+            ready_replicas=(status.ready_replicas or 0) if status else 0,
+            replicas=(deployment.spec.replicas or 0) if deployment else 0,
+            result=result,
+        )
+
+    def __watch(self, events: queue.Queue, func: Callable, **kwargs) -> watch.Watch:
+        """
+        Streams events of a list function into the queue from a daemon thread.
+        Exceptions are put into the queue so that they are raised by the caller.
+        """
+        stream_watch = watch.Watch()
+
+        def stream() -> None:
+            try:
+                for event in stream_watch.stream(
+                    func,
+                    namespace=self.namespace,
+                    timeout_seconds=self.timeout,
+                    **kwargs,
+                ):
+                    if event["type"] == "ERROR":
+                        raise Exception(f"Watch failed: {event['raw_object']}")
+                    events.put(event)
+            except Exception as e:
+                events.put(e)
+
+        threading.Thread(target=stream, daemon=True).start()
+        return stream_watch
+
+    def __follow_informer(self, events: queue.Queue) -> Callable[[], None]:
+        """
+        Puts the changes of the pods, the replica sets and the deployment cached
+        by the informer into the queue, starting with their current state.
+        Returns the callable which stops following.
+        """
+
+        def listener(kind: str, event_type: str, obj) -> None:
+            if kind in ("pod", "replicaset"):
+                if (obj.metadata.labels or {}).get("app") == self.name:
+                    events.put({"type": event_type, "object": obj})
+            elif kind == "deployment" and obj.metadata.name == self.name:
+                events.put({"type": event_type, "object": obj})
+
+        informer.add_listener(listener)
+        deployment = informer.get("deployment", self.name)
+        if deployment is not None:
+            events.put({"type": "ADDED", "object": deployment})
+        for kind in ("replicaset", "pod"):
+            for obj in informer.list_app(kind, self.name):
+                events.put({"type": "ADDED", "object": obj})
+        return lambda: informer.remove_listener(listener)
+
     @classmethod
-    def deployment_ping(cls, name: str, namespace: str) -> V1PodList:
+    def observed(cls, deployment: V1Deployment | None, generation: int | None) -> bool:
         """
-        Returns a list of pods for a given deployment
+        Checks if the deployment controller has observed a generation
 
-        :param name: Name of the deployment
-        :param namespace: Namespace of the deployment
-        :return: List of pods
+        :param deployment: Deployment from kubernetes api
+        :param generation: Awaited generation, the current one if None
+        :return: True if the status of the deployment is not older than the
+        generation, false otherwise
         """
-        v1 = client.CoreV1Api()
-        return v1.list_namespaced_pod(namespace=namespace, label_selector=f"app={name}")
+        if deployment is None or deployment.status is None:
+            return False
+        return (deployment.status.observed_generation or 0) >= (
+            generation or deployment.metadata.generation or 0
+        )
+
+    @classmethod
+    def current_pods(
+        cls,
+        deployment: V1Deployment | None,
+        replica_sets: dict[str, V1ReplicaSet],
+        pods: dict[str, V1Pod],
+        generation: int | None = None,
+    ) -> V1PodList:
+        """
+        Selects the pods of the replica set of the current revision by their
+        ``pod-template-hash`` label
+
+        :param deployment: Deployment from kubernetes api
+        :param replica_sets: Replica sets of the deployment by name
+        :param pods: Pods of the deployment by name
+        :param generation: Awaited generation, the current one if None
+        :return: the pods, none until the controller has observed the
+        generation and created the replica set of its revision
+        """
+        if not cls.observed(deployment, generation):
+            return V1PodList(items=[])
+        revision = (deployment.metadata.annotations or {}).get(cls.REVISION_ANNOTATION)
+        template_hash = None
+        for replica_set in replica_sets.values():
+            metadata = replica_set.metadata
+            owners = metadata.owner_references or []
+            if (
+                revision is not None
+                and (metadata.annotations or {}).get(cls.REVISION_ANNOTATION)
+                == revision
+                and any(owner.uid == deployment.metadata.uid for owner in owners)
+            ):
+                template_hash = (metadata.labels or {}).get("pod-template-hash")
+                break
+        if template_hash is None:
+            return V1PodList(items=[])
+        return V1PodList(
+            items=[
+                pod
+                for pod in pods.values()
+                if (pod.metadata.labels or {}).get("pod-template-hash") == template_hash
+            ]
+        )
 
     @classmethod
     def deployment_predicate(cls, api_response: V1PodList) -> bool:
@@ -92,24 +315,74 @@ class Pinger:
                 return False
         return True
 
+    @classmethod
+    def deployment_ready(cls, deployment: V1Deployment | None) -> bool:
+        """
+        Checks if the rollout of a deployment is complete
+
+        :param deployment: Deployment from kubernetes api
+        :return: True if every desired replica is updated and ready, false otherwise
+        """
+        if deployment is None or deployment.status is None:
+            return False
+        status = deployment.status
+        replicas = deployment.spec.replicas or 0
+        return (
+            (status.observed_generation or 0) >= (deployment.metadata.generation or 0)
+            and (status.updated_replicas or 0) >= replicas
+            and (status.ready_replicas or 0) >= replicas
+            and (status.replicas or 0) == replicas
+        )
+
+    @classmethod
+    def deployment_failed(
+        cls,
+        deployment: V1Deployment | None,
+        api_response: V1PodList,
+        generation: int | None = None,
+    ) -> bool:
+        """
+        Checks if the rollout has clearly failed and won't become ready by itself
+
+        :param deployment: Deployment from kubernetes api
+        :param api_response: Pods of the current revision, see current_pods
+        :param generation: Awaited generation, the conditions of older states
+        are ignored
+        :return: True if the rollout failed, false otherwise
+        """
+        if cls.observed(deployment, generation):
+            for condition in deployment.status.conditions or []:
+                if condition.type == "Progressing" and condition.status == "False":
+                    return True
+                if condition.type == "ReplicaFailure" and condition.status == "True":
+                    return True
+        for pod in api_response.items:
+            if pod.status.phase == PodPhase.FAILED:
+                return True
+            for container_status in pod.status.container_statuses or []:
+                waiting = container_status.state.waiting
+                if waiting and waiting.reason in cls.CONTAINER_FAILURE_REASONS:
+                    return True
+        return False
+
     @classmethod
     def deployment_error_callback(
-        cls, name: str, namespace: str, api_response: V1PodList
+        cls, name: str, namespace: str, api_response: V1PodList, delete: bool = True
     ):
         """
         Deletes a deployment and logs why the deployment failed
 
         :param name: Name of the deployment
         :param namespace: Namespace of the deployment
+        :param delete: False keeps the deployment, e.g. after a failed update
         """
         finished = False
-        v1 = client.AppsV1Api()
         for pod in api_response.items:
             _logger.error(
                 f"Pod {pod.metadata.name} in namespace {namespace} is in state "
                 f"{pod.status.phase}."
             )
-            for condition in pod.status.conditions:
+            for condition in pod.status.conditions or []:
                 if condition.type == "PodScheduled" and condition.status == "False":
                     _logger.error(
                         "Pod is not scheduled. \n"
@@ -133,9 +406,14 @@ class Pinger:
                 pod.status.phase, lambda: _logger.error("Could not match pod's phase")
             )()
 
+        if not delete:
+            _logger.error(f"Keeping deployment {name} in namespace {namespace}")
+            return
         _logger.error(f"Deleting deployment {name} in namespace {namespace}...")
         try:
-            v1.delete_namespaced_deployment(name=name, namespace=namespace)
+            K8sClient.apps().delete_namespaced_deployment(
+                name=name, namespace=namespace, _request_timeout=K8sClient.timeout()
+            )
         except Exception as e:
             _logger.error(f"Deleting deployment {name} in namespace {namespace} failed")
             raise e
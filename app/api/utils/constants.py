@@ -13,10 +13,15 @@ class Constants:
     # MLflow
     MLFLOW_ENV_MANAGER = os.environ.get("MLFLOW_ENV_MANAGER", "conda")
     MLFLOW_BASE_IMAGE_NAME = "mlflow-models-base"
+    # "layered" builds on the base image, "full" solves a fresh environment
+    MLFLOW_BUILD_MODE = os.environ.get("MLFLOW_BUILD_MODE", "layered")
 
     # Kubernetes cluster
     K8S_NAMESPACE_MODELS = "tyro-models"
     K8S_DEPLOYMENT_PORT = 8080
     K8S_SERVICE_PORT = 80
     K8S_MODEL_PREFIX = "tyro-model-"
-    K8S_PING_LIMIT = 10
+    K8S_READINESS_TIMEOUT = int(os.environ.get("K8S_READINESS_TIMEOUT", 300))
+    # "apply" patches the resources in place, "create" fails if they exist
+    K8S_DEPLOY_MODE = os.environ.get("K8S_DEPLOY_MODE", "apply")
+    K8S_FIELD_MANAGER = "tyro-api"
@@ -0,0 +1,202 @@
+"""
+This module provides the in-process event bus of model progress.
+
+Events are published to a topic named after the kubernetes resource of the
+model (``tyro-model-<name>``), which is also the name of its image. They can
+be published from the event loop, from the threads of the task executor and
+from its build processes. Build processes hand their events to the API
+process through a queue, which is drained by a forwarding thread.
+
+Subscribers receive events through a bounded queue. A subscriber which does
+not keep up loses its oldest events instead of slowing the publishers down.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import multiprocessing
+import multiprocessing.queues
+import threading
+import time
+from typing import Iterator, TextIO
+
+from config.config import settings
+
+
+_logger = logging.getLogger(__name__)
+
+
+class EventBus:
+    """
+    Delivers events of a topic to all of its subscribers.
+
+    Example:
+    >>> with EventBus.subscribe("tyro-model-test") as events:
+    >>>     EventBus.publish("tyro-model-test", "status", status="building")
+    >>>     await events.get()
+    {"type": "status", "time": 1690000000.0, "status": "building"}
+    """
+
+    _loop: asyncio.AbstractEventLoop | None = None
+    _subscribers: dict[str, set[asyncio.Queue]] = {}
+    # Queue of the build processes, set in the processes and in the API process
+    _process_queue: multiprocessing.queues.Queue | None = None
+    _forwarder: threading.Thread | None = None
+    _in_process: bool = False
+
+    @classmethod
+    def start(cls) -> None:
+        """
+        Binds the bus to the running event loop, events published before are
+        dropped.
+        """
+        cls._loop = asyncio.get_running_loop()
+
+    @classmethod
+    def stop(cls) -> None:
+        """
+        Unbinds the bus from the event loop and stops forwarding events of
+        the build processes.
+        """
+        if cls._forwarder is not None:
+            cls._process_queue.put(None)
+            cls._forwarder.join(timeout=5)
+            cls._forwarder = None
+            cls._process_queue = None
+        cls._loop = None
+
+    @classmethod
+    def process_queue(cls, context: multiprocessing.context.BaseContext):
+        """
+        Returns the queue to which build processes publish their events.
+        Events put into it are forwarded to the subscribers of the API process.
+
+        :param context: multiprocessing context of the build processes
+        :return: the queue to be passed to the build processes
+        """
+        if cls._forwarder is None:
+            cls._process_queue = context.Queue()
+            cls._forwarder = threading.Thread(
+                target=cls.__forward,
+                args=(cls._process_queue,),
+                name="event-forwarder",
+                daemon=True,
+            )
+            cls._forwarder.start()
+        return cls._process_queue
+
+    @classmethod
+    def attach_process(cls, queue: multiprocessing.queues.Queue) -> None:
+        """
+        Makes a build process publish its events into the queue of the API
+        process.
+
+        :param queue: queue returned by process_queue
+        """
+        cls._process_queue = queue
+        cls._in_process = True
+
+    @classmethod
+    def publish(cls, topic: str, kind: str, **data) -> None:
+        """
+        Publishes an event. Never raises, so progress reports cannot break
+        the work they report on.
+
+        :param topic: name of the model resource
+        :param kind: type of the event, e.g. "status", "log", "push" or "rollout"
+        :param data: fields of the event, must be JSON serializable
+        """
+        event = {"type": kind, "time": time.time(), **data}
+        try:
+            if cls._in_process:
+                cls._process_queue.put((topic, event))
+                return
+            loop = cls._loop
+            if loop is None:
+                return
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is loop:
+                cls.__deliver(topic, event)
+            else:
+                loop.call_soon_threadsafe(cls.__deliver, topic, event)
+        except Exception as e:
+            _logger.debug(f"Dropping event of {topic}: {e}")
+
+    @classmethod
+    @contextlib.contextmanager
+    def subscribe(cls, topic: str) -> Iterator[asyncio.Queue]:
+        """
+        Subscribes to the events of a topic for the duration of the block
+
+        :param topic: name of the model resource
+        :return: queue receiving the events
+        """
+        queue = asyncio.Queue(maxsize=settings.EVENT_QUEUE_SIZE)
+        cls._subscribers.setdefault(topic, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = cls._subscribers.get(topic, set())
+            subscribers.discard(queue)
+            if not subscribers:
+                cls._subscribers.pop(topic, None)
+
+    @classmethod
+    def __deliver(cls, topic: str, event: dict) -> None:
+        for queue in cls._subscribers.get(topic, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    @classmethod
+    def __forward(cls, queue: multiprocessing.queues.Queue) -> None:
+        while (item := queue.get()) is not None:
+            topic, event = item
+            loop = cls._loop
+            if loop is not None:
+                try:
+                    loop.call_soon_threadsafe(cls.__deliver, topic, event)
+                except RuntimeError:
+                    pass
+
+
+class EventLogStream:
+    """
+    Text stream which publishes every written line as a "log" event and
+    passes the text on to another stream.
+
+    Example:
+    >>> with contextlib.redirect_stderr(EventLogStream(topic, sys.stderr)):
+    >>>     mlflow.models.build_docker(...)
+    """
+
+    def __init__(self, topic: str, stream: TextIO) -> None:
+        self.topic: str = topic
+        self.stream: TextIO = stream
+        self.buffer: str = ""
+
+    def write(self, text: str) -> int:
+        self.stream.write(text)
+        self.buffer += text
+        *lines, self.buffer = self.buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                EventBus.publish(self.topic, "log", line=line)
+        return len(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def to_sse(event: dict) -> str:
+    """
+    Formats an event as a message of a server-sent events stream
+
+    :param event: the event
+    :return: the message with the event type as name and the event as data
+    """
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
@@ -62,3 +62,53 @@ class ErrImageNeverPull(Exception):
         message="Image never pulled! Checkout imagePullPolicy or image tag!",
     ) -> None:
         super().__init__(message)
+
+
+class InvalidCursor(Exception):
+    def __init__(
+        self,
+        cursor: str,
+        message="Invalid pagination cursor",
+    ) -> None:
+        super().__init__(message)
+        self.cursor = cursor
+
+
+class PushFailed(Exception):
+    def __init__(
+        self,
+        image_tag: str,
+        message="Image push error",
+    ) -> None:
+        super().__init__(message)
+        self.image_tag = image_tag
+
+
+class JobAlreadyPending(Exception):
+    def __init__(
+        self, model_id: int, message="Model already has a pending job"
+    ) -> None:
+        super().__init__(message)
+        self.model_id = model_id
+
+
+class JobQueueFull(Exception):
+    def __init__(
+        self,
+        message="Job queue is full",
+    ) -> None:
+        super().__init__(message)
+
+
+class InvalidStatusTransition(Exception):
+    def __init__(
+        self,
+        id: int,
+        current: str,
+        status: str,
+        message="Invalid model status transition",
+    ) -> None:
+        super().__init__(f"{message} of model {id} from {current} to {status}")
+        self.id = id
+        self.current = current
+        self.status = status
@@ -0,0 +1,145 @@
+"""
+This module provides a bounded execution layer for blocking work.
+
+Kubernetes, docker registry and mlflow calls are blocking, so they are run
+in pools outside of the event loop. Image builds run in a process pool,
+because mlflow keeps global state (e.g. the tracking uri) and builds are
+long running. The process pool is sized by the build capacity of the node.
+Everything else runs in a thread pool.
+"""
+
+import asyncio
+import enum
+import functools
+import logging
+import multiprocessing
+import multiprocessing.queues
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Any, Callable
+
+from config.config import settings
+from utils.build_scheduler import BuildScheduler
+from utils.events import EventBus
+
+
+_logger = logging.getLogger(__name__)
+
+
+class TaskKind(str, enum.Enum):
+    """
+    Kinds of blocking tasks, each with its own concurrency cap
+    """
+
+    BUILD = "build"
+    PUSH = "push"
+    DEPLOY = "deploy"
+    DEACTIVATE = "deactivate"
+
+
+def _init_process_worker(event_queue: multiprocessing.queues.Queue) -> None:
+    """
+    Configures logging and the event bus in a freshly spawned build process.
+
+    :param event_queue: queue forwarding events to the API process
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(levelname)s] %(asctime)s - %(name)s - %(message)s",
+    )
+    EventBus.attach_process(event_queue)
+
+
+class TaskExecutor:
+    """
+    Runs blocking functions off the event loop.
+
+    Example:
+    >>> image_tag = await TaskExecutor.run(TaskKind.PUSH, model_builder.push)
+    """
+
+    _thread_pool: ThreadPoolExecutor | None = None
+    _process_pool: ProcessPoolExecutor | None = None
+    _semaphores: dict[TaskKind, asyncio.Semaphore] = {}
+    _futures: set[Future] = set()
+
+    @classmethod
+    async def run(cls, kind: TaskKind, func: Callable, *args, **kwargs) -> Any:
+        """
+        Runs a blocking function in the pool matching the kind of the task.
+        Waits for a free slot if the concurrency cap of the kind is reached.
+
+        Functions of kind BUILD run in another process, so the function and its
+        arguments must be picklable and state changes are not visible to the
+        caller unless they are returned.
+
+        :param kind: kind of the task
+        :param func: blocking function to run
+        :return: the value returned by the function
+        :raises: Any exception raised by the function
+        """
+        async with cls.__get_semaphore(kind):
+            future = cls.__get_pool(kind).submit(
+                functools.partial(func, *args, **kwargs)
+            )
+            cls._futures.add(future)
+            future.add_done_callback(cls._futures.discard)
+            return await asyncio.wrap_future(future)
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        """
+        Shuts the pools down. Queued tasks are cancelled and running tasks are
+        awaited for up to EXECUTOR_SHUTDOWN_TIMEOUT_SECONDS, tasks still
+        running afterwards are abandoned.
+        """
+        _logger.info("Shutting down task executor...")
+        for pool in (cls._thread_pool, cls._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        cls._thread_pool = None
+        cls._process_pool = None
+        cls._semaphores = {}
+        running = [asyncio.wrap_future(future) for future in list(cls._futures)]
+        if running:
+            _logger.info(f"Waiting for {len(running)} running tasks...")
+            _, pending = await asyncio.wait(
+                running, timeout=settings.EXECUTOR_SHUTDOWN_TIMEOUT_SECONDS
+            )
+            if pending:
+                _logger.warning(f"Abandoning {len(pending)} running tasks")
+
+    @classmethod
+    def __get_pool(cls, kind: TaskKind) -> Executor:
+        if kind == TaskKind.BUILD:
+            if cls._process_pool is None:
+                context = multiprocessing.get_context("spawn")
+                cls._process_pool = ProcessPoolExecutor(
+                    max_workers=BuildScheduler.capacity(),
+                    mp_context=context,
+                    initializer=_init_process_worker,
+                    initargs=(EventBus.process_queue(context),),
+                )
+            return cls._process_pool
+        if cls._thread_pool is None:
+            cls._thread_pool = ThreadPoolExecutor(
+                max_workers=settings.EXECUTOR_THREAD_WORKERS,
+                thread_name_prefix="task-executor",
+            )
+        return cls._thread_pool
+
+    @classmethod
+    def __get_semaphore(cls, kind: TaskKind) -> asyncio.Semaphore:
+        if kind not in cls._semaphores:
+            limits = {
+                TaskKind.BUILD: BuildScheduler.capacity(),
+                TaskKind.PUSH: settings.MAX_CONCURRENT_PUSHES,
+                TaskKind.DEPLOY: settings.MAX_CONCURRENT_DEPLOYS,
+                TaskKind.DEACTIVATE: settings.MAX_CONCURRENT_DEACTIVATIONS,
+            }
+            cls._semaphores[kind] = asyncio.Semaphore(limits[kind])
+        return cls._semaphores[kind]
@@ -0,0 +1,107 @@
+"""
+This module forwards the inference requests of gates to the model services.
+
+Requests are sent with a client shared by the whole process, which keeps the
+connections to the services of the models alive between requests, so a
+forwarded request does not pay for a connection setup in the common case.
+"""
+
+import logging
+
+import httpx
+
+from config.config import settings
+from utils.constants import Constants
+
+
+_logger = logging.getLogger(__name__)
+
+# Request headers passed on to the model and response headers passed back
+FORWARDED_REQUEST_HEADERS = ("content-type", "accept")
+FORWARDED_RESPONSE_HEADERS = ("content-type",)
+
+
+class InferenceProxy:
+    """
+    Forwards inference requests to the services of the models.
+
+    Example:
+    >>> response = await InferenceProxy.forward(model_name, body, headers)
+    """
+
+    _client: httpx.AsyncClient | None = None
+
+    @classmethod
+    def client(cls) -> httpx.AsyncClient:
+        """
+        Returns the HTTP client, created on first use
+
+        :return: the client with pooled keep-alive connections
+        """
+        if cls._client is None:
+            cls._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.PROXY_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.PROXY_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.PROXY_KEEPALIVE_EXPIRY_SECONDS,
+                ),
+                timeout=httpx.Timeout(
+                    settings.PROXY_TIMEOUT_SECONDS,
+                    connect=settings.PROXY_CONNECT_TIMEOUT_SECONDS,
+                ),
+            )
+        return cls._client
+
+    @classmethod
+    async def close(cls) -> None:
+        """
+        Closes the pooled connections.
+        """
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+
+    @staticmethod
+    def backend_url(model_name: str) -> str:
+        """
+        Returns the inference URL of the service of a model
+
+        :param model_name: name of the model
+        :return: the URL of the invocations endpoint of the model
+        """
+        base_url = settings.PROXY_BACKEND_URL.format(
+            service=Constants.K8S_MODEL_PREFIX + model_name,
+            namespace=Constants.K8S_NAMESPACE_MODELS,
+            port=Constants.K8S_SERVICE_PORT,
+        )
+        return f"{base_url}/invocations"
+
+    @classmethod
+    async def forward(
+        cls,
+        model_name: str,
+        body: bytes,
+        headers: dict[str, str],
+        client: httpx.AsyncClient | None = None,
+    ) -> httpx.Response:
+        """
+        Forwards an inference request to the service of a model
+
+        :param model_name: name of the model
+        :param body: body of the request
+        :param headers: headers of the request, only the content negotiation
+        headers are passed on
+        :param client: (optional) client used instead of the shared one
+
+        :raise httpx.HTTPError: if the model cannot be reached or times out
+        :return: the response of the model
+        """
+        return await (client or cls.client()).post(
+            cls.backend_url(model_name),
+            content=body,
+            headers={
+                name: headers[name]
+                for name in FORWARDED_REQUEST_HEADERS
+                if name in headers
+            },
+        )
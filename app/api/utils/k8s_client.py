@@ -0,0 +1,154 @@
+"""
+This module provides the shared client of the kubernetes API.
+
+The cluster configuration is loaded once per process and all API objects
+share a single ``ApiClient``, so deploys, deactivations and rollout watches
+reuse its pooled, already established TLS connections instead of opening
+their own. API objects may be replaced, e.g. by fakes in tests.
+"""
+
+import logging
+import threading
+from typing import TypeVar
+
+from kubernetes import client, config
+
+from config.config import settings
+from utils.constants import Constants
+
+
+_logger = logging.getLogger(__name__)
+
+Api = TypeVar("Api")
+
+
+class K8sClient:
+    """
+    Hands out kubernetes API objects bound to one shared, pooled connection.
+
+    Example:
+    >>> K8sClient.apps().read_namespaced_deployment(
+    >>>     name, namespace, _request_timeout=K8sClient.timeout()
+    >>> )
+    >>> K8sClient.override(client.CoreV1Api, FakeCoreV1Api())
+    >>> K8sClient.reset()
+    """
+
+    _api_client: client.ApiClient | None = None
+    _apis: dict[type, object] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def api_client(cls) -> client.ApiClient:
+        """
+        Returns the shared API client, loading the in-cluster configuration
+        on first use
+
+        :return: the API client
+        """
+        with cls._lock:
+            if cls._api_client is None:
+                configuration = client.Configuration()
+                config.load_incluster_config(client_configuration=configuration)
+                # Every rollout watch holds two connections while it runs
+                configuration.connection_pool_maxsize = settings.K8S_POOL_SIZE
+                configuration.retries = settings.K8S_RETRIES
+                cls._api_client = client.ApiClient(configuration)
+                _logger.info(
+                    f"Kubernetes client of {configuration.host} created with "
+                    f"{settings.K8S_POOL_SIZE} pooled connections"
+                )
+            return cls._api_client
+
+    @classmethod
+    def api(cls, api_class: type[Api]) -> Api:
+        """
+        Returns the shared instance of an API class
+
+        :param api_class: API class of the kubernetes client, e.g. AppsV1Api
+        :return: the API object or its replacement
+        """
+        api = cls._apis.get(api_class)
+        if api is None:
+            api_client = cls.api_client()
+            with cls._lock:
+                api = cls._apis.setdefault(api_class, api_class(api_client))
+        return api
+
+    @classmethod
+    def apps(cls) -> client.AppsV1Api:
+        return cls.api(client.AppsV1Api)
+
+    @classmethod
+    def core(cls) -> client.CoreV1Api:
+        return cls.api(client.CoreV1Api)
+
+    @classmethod
+    def autoscaling(cls) -> client.AutoscalingV2Api:
+        return cls.api(client.AutoscalingV2Api)
+
+    @classmethod
+    def override(cls, api_class: type, api: object) -> None:
+        """
+        Replaces the shared instance of an API class, e.g. with a fake
+
+        :param api_class: API class of the kubernetes client
+        :param api: object used instead of the instance of the class
+        """
+        with cls._lock:
+            cls._apis[api_class] = api
+
+    @classmethod
+    def reset(cls) -> None:
+        """
+        Drops the API objects, their replacements and the pooled connections,
+        so the next use loads the configuration again.
+        """
+        with cls._lock:
+            cls._apis = {}
+            if cls._api_client is not None:
+                cls._api_client.close()
+                cls._api_client = None
+
+    @classmethod
+    def apply(cls, path: str, body: object, response_type: str) -> tuple[object, bool]:
+        """
+        Creates or updates a resource with server-side apply. Fields set by
+        other managers, e.g. the replicas of an autoscaler, are kept unless
+        the manifest sets them too, in which case this manager takes them over.
+
+        :param path: API path of the resource,
+        e.g. ``/api/v1/namespaces/<namespace>/services/<name>``
+        :param body: manifest of the resource with apiVersion and kind
+        :param response_type: name of the model class of the resource,
+        e.g. ``V1Service``
+        :return: the applied resource and whether it was created
+        """
+        api_client = cls.api_client()
+        applied, status, _ = api_client.call_api(
+            path,
+            "PATCH",
+            query_params=[
+                ("fieldManager", Constants.K8S_FIELD_MANAGER),
+                ("force", "true"),
+            ],
+            header_params={
+                "Accept": "application/json",
+                "Content-Type": "application/apply-patch+yaml",
+            },
+            body=api_client.sanitize_for_serialization(body),
+            response_type=response_type,
+            auth_settings=["BearerToken"],
+            _return_http_data_only=False,
+            _request_timeout=cls.timeout(),
+        )
+        return applied, status == 201
+
+    @staticmethod
+    def timeout() -> tuple[float, float]:
+        """
+        Returns the timeout of a single API request
+
+        :return: connect and read timeout in seconds, as ``_request_timeout``
+        """
+        return (settings.K8S_CONNECT_TIMEOUT_SECONDS, settings.K8S_READ_TIMEOUT_SECONDS)
@@ -0,0 +1,247 @@
+"""
+This module keeps a local cache of the kubernetes resources of the models.
+
+Deployments, replica sets, services, horizontal pod autoscalers and pods of
+the models namespace are listed once and then followed with watches, each kind in its
+own daemon thread. Readiness checks, deactivations and status reads look the
+resources up in memory instead of asking the API server every time.
+
+The cache trails the API server by the latency of the watch. Until every kind
+is listed, ``synced`` is false and callers fall back to live requests.
+"""
+
+import logging
+import threading
+from typing import Callable
+
+from kubernetes import watch
+from kubernetes.client.exceptions import ApiException
+
+from config.config import settings
+from utils.constants import Constants
+from utils.k8s_client import K8sClient
+
+
+_logger = logging.getLogger(__name__)
+
+# List functions of the cached kinds, resolved on use so the client is
+# created by the informer threads
+RESOURCE_KINDS: dict[str, Callable[[], Callable]] = {
+    "deployment": lambda: K8sClient.apps().list_namespaced_deployment,
+    "replicaset": lambda: K8sClient.apps().list_namespaced_replica_set,
+    "service": lambda: K8sClient.core().list_namespaced_service,
+    "autoscaler": lambda: (
+        K8sClient.autoscaling().list_namespaced_horizontal_pod_autoscaler
+    ),
+    "pod": lambda: K8sClient.core().list_namespaced_pod,
+}
+
+
+class Informer:
+    """
+    List-watches the resources of a namespace into an in-memory store indexed
+    by kind, name and ``app`` label. Pods and replica sets are indexed by their
+    ``app`` label, the other kinds by their name, which equals the label of
+    their pods.
+
+    Example:
+    >>> informer.start()
+    >>> informer.get("deployment", "tyro-model-test")
+    >>> informer.list_app("pod", "tyro-model-test")
+    >>> informer.add_listener(lambda kind, event_type, obj: ...)
+    """
+
+    def __init__(self, namespace: str) -> None:
+        """
+        :param namespace: namespace of the cached resources
+        """
+        self.namespace: str = namespace
+        self.objects: dict[str, dict[str, object]] = {}
+        self.apps: dict[str, dict[str, set[str]]] = {}
+        self.synced_kinds: set[str] = set()
+        self.listeners: list[Callable[[str, str, object], None]] = []
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.threads: list[threading.Thread] = []
+        self.watches: dict[str, watch.Watch] = {}
+        self.__clear()
+
+    @property
+    def synced(self) -> bool:
+        return self.synced_kinds == set(RESOURCE_KINDS)
+
+    def start(self) -> None:
+        """
+        Starts list-watching every kind in a daemon thread.
+        """
+        if self.threads:
+            return
+        self.stopping.clear()
+        for kind in RESOURCE_KINDS:
+            thread = threading.Thread(
+                target=self.__run, args=(kind,), name=f"informer-{kind}", daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self) -> None:
+        """
+        Stops the watches and forgets the cached resources.
+        """
+        self.stopping.set()
+        for stream_watch in list(self.watches.values()):
+            stream_watch.stop()
+        for thread in self.threads:
+            thread.join(timeout=1)
+        self.threads = []
+        with self.lock:
+            self.__clear()
+
+    def get(self, kind: str, name: str) -> object | None:
+        """
+        Returns a cached resource
+
+        :param kind: kind of the resource, one of RESOURCE_KINDS
+        :param name: name of the resource
+        :return: the resource or None if it does not exist
+        """
+        return self.objects[kind].get(name)
+
+    def list_app(self, kind: str, app: str) -> list:
+        """
+        Returns the cached resources of an app
+
+        :param kind: kind of the resources, one of RESOURCE_KINDS
+        :param app: value of the ``app`` label, the name of the model resource
+        :return: the resources
+        """
+        with self.lock:
+            names = self.apps[kind].get(app, ())
+            return [self.objects[kind][name] for name in names]
+
+    def add_listener(self, listener: Callable[[str, str, object], None]) -> None:
+        """
+        Registers a callable receiving the kind, the event type and the object
+        of every change. Listeners run on the informer threads and must not
+        block.
+
+        :param listener: the listener
+        """
+        with self.lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, str, object], None]) -> None:
+        """
+        Unregisters a listener
+
+        :param listener: the listener
+        """
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+    def __clear(self) -> None:
+        self.objects = {kind: {} for kind in RESOURCE_KINDS}
+        self.apps = {kind: {} for kind in RESOURCE_KINDS}
+        self.synced_kinds = set()
+
+    def __run(self, kind: str) -> None:
+        delay = settings.K8S_INFORMER_BACKOFF_SECONDS
+        while not self.stopping.is_set():
+            try:
+                resource_version = self.__list(kind)
+                delay = settings.K8S_INFORMER_BACKOFF_SECONDS
+                self.__watch(kind, resource_version)
+            except Exception as e:
+                if isinstance(e, ApiException) and e.status == 410:
+                    _logger.info(f"Watch of {kind}s expired, listing again")
+                    continue
+                _logger.error(f"Informer of {kind}s failed with error: {e}")
+                with self.lock:
+                    self.synced_kinds.discard(kind)
+                self.stopping.wait(delay)
+                delay = min(delay * 2, settings.K8S_INFORMER_BACKOFF_MAX_SECONDS)
+
+    def __list(self, kind: str) -> str:
+        response = RESOURCE_KINDS[kind]()(
+            namespace=self.namespace, _request_timeout=K8sClient.timeout()
+        )
+        current = {obj.metadata.name: obj for obj in response.items}
+        with self.lock:
+            removed = [
+                obj for name, obj in self.objects[kind].items() if name not in current
+            ]
+            self.objects[kind] = {}
+            self.apps[kind] = {}
+            for obj in current.values():
+                self.__store(kind, obj)
+            self.synced_kinds.add(kind)
+            listeners = list(self.listeners)
+        # Changes missed while the watch was down are replayed as one batch
+        for obj in removed:
+            self.__notify(listeners, kind, "DELETED", obj)
+        for obj in current.values():
+            self.__notify(listeners, kind, "MODIFIED", obj)
+        _logger.info(f"Informer listed {len(current)} {kind}s of {self.namespace}")
+        return response.metadata.resource_version
+
+    def __watch(self, kind: str, resource_version: str) -> None:
+        stream_watch = watch.Watch()
+        self.watches[kind] = stream_watch
+        try:
+            while not self.stopping.is_set():
+                for event in stream_watch.stream(
+                    RESOURCE_KINDS[kind](),
+                    namespace=self.namespace,
+                    resource_version=resource_version,
+                    timeout_seconds=settings.K8S_INFORMER_WATCH_SECONDS,
+                ):
+                    self.__apply(kind, event["type"], event["object"])
+                resource_version = stream_watch.resource_version
+        finally:
+            self.watches.pop(kind, None)
+
+    def __apply(self, kind: str, event_type: str, obj: object) -> None:
+        with self.lock:
+            self.__unstore(kind, obj.metadata.name)
+            if event_type != "DELETED":
+                self.__store(kind, obj)
+            listeners = list(self.listeners)
+        self.__notify(listeners, kind, event_type, obj)
+
+    def __store(self, kind: str, obj: object) -> None:
+        name = obj.metadata.name
+        self.objects[kind][name] = obj
+        self.apps[kind].setdefault(self.__app(kind, obj), set()).add(name)
+
+    def __unstore(self, kind: str, name: str) -> None:
+        obj = self.objects[kind].pop(name, None)
+        if obj is None:
+            return
+        app = self.__app(kind, obj)
+        names = self.apps[kind].get(app, set())
+        names.discard(name)
+        if not names:
+            self.apps[kind].pop(app, None)
+
+    @staticmethod
+    def __app(kind: str, obj: object) -> str:
+        if kind in ("pod", "replicaset"):
+            return (obj.metadata.labels or {}).get("app", "")
+        return obj.metadata.name
+
+    @staticmethod
+    def __notify(
+        listeners: list[Callable[[str, str, object], None]],
+        kind: str,
+        event_type: str,
+        obj: object,
+    ) -> None:
+        for listener in listeners:
+            try:
+                listener(kind, event_type, obj)
+            except Exception as e:
+                _logger.error(f"Informer listener failed with error: {e}")
+
+
+informer = Informer(Constants.K8S_NAMESPACE_MODELS)
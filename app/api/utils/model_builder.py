@@ -1,27 +1,59 @@
+import contextlib
+import hashlib
 import logging
+import os
+import shutil
+import sys
+import tempfile
 import docker
 import mlflow
+import yaml
 
 from utils.constants import Constants
+from utils.events import EventBus, EventLogStream
+from utils.registry import RegistryClient
 
 
 _logger = logging.getLogger(__name__)
 
+# The requirements are copied apart from the artifact, so their layer is
+# reused by every build with the same requirements. pip only installs the
+# packages missing in the base image.
+LAYERED_DOCKERFILE = """\
+FROM {base_image}
+COPY {artifact}/requirements.txt /opt/mlflow/model-requirements.txt
+RUN pip install --no-cache-dir -r /opt/mlflow/model-requirements.txt \\
+    "gunicorn[gevent]"
+COPY {artifact} /opt/ml/model
+ENV MLFLOW_DISABLE_ENV_CREATION="true"
+ENTRYPOINT ["python", "-c", \\
+    "from mlflow.models import container as C; C._serve('local')"]
+"""
+
 
 class ModelBuilder:
     """
     Builds a docker image from model's artifact.
-    Allows to push it to Google Container Registry.
+    Allows to push it to Google Container Registry with the shared
+    registry client.
+
+    In the layered build mode the image is built on top of the base mlflow
+    image, so only the missing requirements and the artifact are added.
+    Artifacts without requirements.txt, or logged with another python version
+    than the one of the base image, fall back to a full build.
 
     Example:
     >>> model_builder = ModelBuilder(
     >>>    name="test2",
     >>>    artifact_uri="runs://f7b2b1e1d1e84b3e8b2b1e1d1e8bb3e8/model",
     >>> )
+    >>> model_builder.prepare()
     >>> model_builder.build()
     >>> model_builder.push()
     """
 
+    _base_python_versions: dict[str, str] = {}
+
     def __init__(self, name: str, mlflow_tracking_uri: str, artifact_uri: str) -> None:
         """
         :param name: name of the docker image
@@ -32,21 +64,94 @@ class ModelBuilder:
         self.mlflow_tracking_uri: str = mlflow_tracking_uri
         self.artifact_uri: str = artifact_uri
         self.is_built: bool = False
+        self.download_dir: str | None = None
+        self.local_path: str | None = None
+        self.fingerprint: str | None = None
+        self.image_digest: str | None = None
 
-    def build(self) -> None:
+    def prepare(self) -> "ModelBuilder":
+        """
+        Downloads the model's artifact and fingerprints its contents together
+        with the build settings. Identical artifacts registered under different
+        names get the same fingerprint.
+
+        :return: the builder itself, so that its state survives a run
+        in another process
+        """
+        try:
+            _logger.info(f"Fingerprinting the artifact of {self.name}...")
+            mlflow.set_tracking_uri(self.mlflow_tracking_uri)
+            self.download_dir = tempfile.mkdtemp(prefix=f"{self.name}-")
+            self.local_path = mlflow.artifacts.download_artifacts(
+                artifact_uri=self.artifact_uri, dst_path=self.download_dir
+            )
+            self.fingerprint = self.__fingerprint(self.local_path)
+            _logger.info(f"Artifact of {self.name} has fingerprint {self.fingerprint}")
+            return self
+        except Exception as e:
+            self.cleanup()
+            _logger.error(
+                f"Fingerprinting the artifact of {self.name} failed with error: {e}"
+            )
+            raise e
+
+    def cleanup(self) -> None:
+        """
+        Removes the downloaded artifact.
+        """
+        if self.download_dir is not None:
+            shutil.rmtree(self.download_dir, ignore_errors=True)
+            self.download_dir = None
+            self.local_path = None
+
+    def build(self) -> "ModelBuilder":
         """
         Builds a docker image from model's artifact.
+
+        :return: the builder itself, so that its state survives a build
+        in another process
         """
         try:
             _logger.info(f"Building a docker image with name {self.name}...")
-            self.__build_mlflow_image()
+            client = docker.from_env()
+            if self.__can_build_layered(client):
+                self.__build_layered_image(client)
+            else:
+                self.__build_mlflow_image()
             self.is_built = True
             _logger.info(f"Building a docker image with name {self.name} finished.")
+            return self
         except Exception as e:
             _logger.error(
                 f"Building a docker image with name {self.name} failed with error: {e}"
             )
             raise e
+        finally:
+            self.cleanup()
+
+    def retag(self, source_image_tag: str, source_digest: str) -> str:
+        """
+        Reuses an image which was built from an identical artifact. The image is
+        pulled by digest, tagged with the name of this model and pushed, which
+        only uploads the manifest as the layers already exist.
+
+        :param source_image_tag: registry tag of the cached image
+        :param source_digest: digest of the cached image
+        :return: tag of the pushed image
+        """
+        try:
+            _logger.info(
+                f"Reusing image {source_image_tag}@{source_digest} for {self.name}..."
+            )
+            image = RegistryClient.pull(source_image_tag, source_digest)
+            image.tag(self.name)
+            self.is_built = True
+            image_tag = self.push()
+            _logger.info(f"Reusing image for {self.name} finished.")
+            return image_tag
+        except Exception as e:
+            _logger.error(f"Reusing image for {self.name} failed with error: {e}")
+            raise e
 
     @classmethod
     def build_base_image(cls) -> None:
@@ -74,7 +179,8 @@ class ModelBuilder:
             raise Exception("Image is not built yet.")
         try:
             _logger.info(f"Pushing a docker image with name {self.name}...")
-            image_tag = self.__push_image_to_gcr()
+            self.image_digest = RegistryClient.push(self.name)
+            image_tag = RegistryClient.image_tag(self.name)
             _logger.info(f"Pushing a docker image with name {self.name} finished.")
             return image_tag
         except Exception as e:
@@ -83,29 +189,86 @@ class ModelBuilder:
             )
             raise e
 
+    @staticmethod
+    def __fingerprint(path: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"mlflow={mlflow.__version__}\n".encode())
+        digest.update(f"env_manager={Constants.MLFLOW_ENV_MANAGER}\n".encode())
+        digest.update(f"build_mode={Constants.MLFLOW_BUILD_MODE}\n".encode())
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for file_name in sorted(files):
+                file_path = os.path.join(root, file_name)
+                digest.update(os.path.relpath(file_path, path).encode() + b"\0")
+                with open(file_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                        digest.update(chunk)
+                digest.update(b"\0")
+        return digest.hexdigest()
+
     def __build_mlflow_image(self) -> None:
         mlflow.set_tracking_uri(self.mlflow_tracking_uri)
-        mlflow.models.build_docker(
-            model_uri=self.artifact_uri,
-            name=self.name,
-            env_manager=Constants.MLFLOW_ENV_MANAGER,
-        )
+        # mlflow writes the output of docker build to stderr
+        with contextlib.redirect_stderr(EventLogStream(self.name, sys.stderr)):
+            mlflow.models.build_docker(
+                model_uri=self.local_path or self.artifact_uri,
+                name=self.name,
+                env_manager=Constants.MLFLOW_ENV_MANAGER,
+            )
+
+    def __can_build_layered(self, client: docker.DockerClient) -> bool:
+        if Constants.MLFLOW_BUILD_MODE != "layered" or self.local_path is None:
+            return False
+        if not os.path.isfile(os.path.join(self.local_path, "requirements.txt")):
+            _logger.info(f"No requirements.txt in {self.name}, building full image")
+            return False
+        try:
+            base_image = client.images.get(Constants.MLFLOW_BASE_IMAGE_NAME)
+        except docker.errors.ImageNotFound:
+            _logger.info("Base mlflow image is not built yet, building full image")
+            return False
+
+        python_env_path = os.path.join(self.local_path, "python_env.yaml")
+        if not os.path.isfile(python_env_path):
+            _logger.info(f"No python_env.yaml in {self.name}, building full image")
+            return False
+        with open(python_env_path) as f:
+            model_python = str(yaml.safe_load(f).get("python", ""))
+        base_python = self.__base_python_version(client, base_image)
+        if model_python.split(".")[:2] != base_python.split(".")[:2]:
+            _logger.info(
+                f"{self.name} needs python {model_python}, the base image has "
+                f"{base_python}, building full image"
+            )
+            return False
+        return True
 
-    def __push_image_to_gcr(self) -> str:
-        client = docker.from_env()
-        client.login(
-            username="_json_key",
-            password=Constants.GCP_CREDENTIALS,
-            registry=Constants.GCP_CONTAINER_REGISTRY_URI,
+    @classmethod
+    def __base_python_version(
+        cls, client: docker.DockerClient, base_image: docker.models.images.Image
+    ) -> str:
+        if base_image.id not in cls._base_python_versions:
+            output = client.containers.run(
+                base_image.id,
+                entrypoint=["python", "-c"],
+                command=["import platform; print(platform.python_version())"],
+                remove=True,
+            )
+            cls._base_python_versions[base_image.id] = output.decode().strip()
+        return cls._base_python_versions[base_image.id]
+
+    def __build_layered_image(self, client: docker.DockerClient) -> None:
+        with open(os.path.join(self.download_dir, "Dockerfile"), "w") as f:
+            f.write(
+                LAYERED_DOCKERFILE.format(
+                    base_image=Constants.MLFLOW_BASE_IMAGE_NAME,
+                    artifact=os.path.relpath(self.local_path, self.download_dir),
+                )
+            )
+        _, logs = client.images.build(
+            path=self.download_dir, tag=self.name, rm=True, pull=False
         )
-        image_tag = f"{Constants.GCP_CONTAINER_REGISTRY_URI}/{self.name}"
-        client.images.get(self.name).tag(image_tag)
-
-        for line in client.images.push(
-            repository=image_tag,
-            stream=True,
-            decode=True,
-        ):
+        for line in logs:
             _logger.debug(line)
-
-        return image_tag
+            if line.get("stream", "").strip():
+                EventBus.publish(self.name, "log", line=line["stream"].rstrip("\n"))
@@ -1,9 +1,17 @@
 import logging
-from kubernetes import client, config
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from kubernetes import client, watch
+from kubernetes.client.exceptions import ApiException
+
+from config.config import settings
 
 from utils.constants import Constants
 from utils.cluster_pingers import Pinger
+from utils.k8s_client import K8sClient
+from utils.k8s_informer import informer
 from models import ModelDetails
 
 _logger = logging.getLogger(__name__)
@@ -13,6 +21,11 @@ class ModelDeployment:
     """
     Deploys a docker image to a kubernetes cluster.
     Creates deployment and service attached to it.
+
+    In the "apply" deploy mode the resources are applied server-side, so a
+    redeploy patches them in place and a new image rolls out without removing
+    the serving replicas first. Images are referenced by digest, so a rebuilt
+    image under the same tag changes the pod template and is rolled out.
     """
 
     def __init__(
@@ -26,6 +39,12 @@ class ModelDeployment:
         """
         self.name: str = Constants.K8S_MODEL_PREFIX + name
         self.image_tag: str = model_details.image_tag
+        # Images pushed before digests were recorded are deployed by tag
+        self.image: str = (
+            f"{model_details.image_tag}@{model_details.image_digest}"
+            if model_details.image_digest
+            else model_details.image_tag
+        )
         self.min_replicas: int = model_details.min_replicas
         self.max_replicas: int = model_details.max_replicas
         self.cpu_limit: str = model_details.cpu_limit
@@ -35,8 +54,6 @@ class ModelDeployment:
         self.memory_request: str = model_details.memory_request
         self.memory_utilization: int = model_details.memory_utilization
 
-        config.load_incluster_config()
-
     def deploy(self) -> None:
         """
         Deploys a docker image to a kubernetes cluster.
@@ -44,48 +61,128 @@ class ModelDeployment:
         :raises: Any exception which may occur
         """
         try:
-            _logger.info(f"Deploying a docker image with tag {self.image_tag}...")
+            _logger.info(f"Deploying a docker image {self.image}...")
             self.__deploy_to_k8s()
-            _logger.info(f"Deploying a docker image with tag {self.image_tag} finished")
+            _logger.info(f"Deploying a docker image {self.image} finished")
         except Exception as e:
-            _logger.error(
-                f"Deploying an image with tag {self.image_tag} failed with error: {e}"
-            )
+            _logger.error(f"Deploying an image {self.image} failed with error: {e}")
             raise e
 
     def __deploy_to_k8s(self) -> None:
-        v1 = client.AppsV1Api()
+        if Constants.K8S_DEPLOY_MODE == "apply":
+            self.__apply_to_k8s()
+        else:
+            self.__create_in_k8s()
+
+    def __apply_to_k8s(self) -> None:
+        namespace = Constants.K8S_NAMESPACE_MODELS
+        deployment = self.__create_deployment()
+        hpa = self.__create_horizontal_pod_autoscaler()
+        manifests = [
+            (
+                f"/apis/apps/v1/namespaces/{namespace}/deployments/{self.name}",
+                deployment,
+                "V1Deployment",
+            ),
+            (
+                f"/api/v1/namespaces/{namespace}/services/{self.name}",
+                self.__create_service(),
+                "V1Service",
+            ),
+        ]
+        if hpa is not None:
+            # The replicas are left to the autoscaler, otherwise every
+            # redeploy would scale the model down to its minimum
+            deployment.spec.replicas = None
+            hpa.api_version = "autoscaling/v2"
+            manifests.append(
+                (
+                    f"/apis/autoscaling/v2/namespaces/{namespace}"
+                    f"/horizontalpodautoscalers/{self.name}",
+                    hpa,
+                    "V2HorizontalPodAutoscaler",
+                )
+            )
+
+        _logger.info(f"Applying {len(manifests)} resources of {self.name}...")
+        with ThreadPoolExecutor(max_workers=len(manifests)) as pool:
+            applied = list(
+                pool.map(lambda manifest: K8sClient.apply(*manifest), manifests)
+            )
+        applied_deployment, created = applied[0]
+        _logger.info(f"Resources of {self.name} applied")
+        if hpa is None and ModelDeployment.__autoscaler_exists(self.name):
+            _logger.info(f"Deleting stale horizontal pod autoscaler {self.name}")
+            K8sClient.autoscaling().delete_namespaced_horizontal_pod_autoscaler(
+                name=self.name,
+                namespace=namespace,
+                _request_timeout=K8sClient.timeout(),
+            )
+
+        # The error callback only reports. A failed first deploy is torn down
+        # below together with its service and autoscaler, a failed update of a
+        # running deployment is left to roll back, its previous replicas keep
+        # serving.
+        args = {"name": self.name, "namespace": namespace, "delete": False}
+        deployment_pinger = Pinger(
+            self.name,
+            namespace,
+            Pinger.deployment_predicate,
+            Pinger.deployment_error_callback,
+            args,
+            Constants.K8S_READINESS_TIMEOUT,
+            generation=applied_deployment.metadata.generation,
+        )
+        ready = False
+        try:
+            ready = deployment_pinger.ping()
+        finally:
+            if not ready and created:
+                _logger.error(f"Deleting resources of failed deploy {self.name}...")
+                error = ModelDeployment.delete_many([self.name], wait=False)[self.name]
+                if error is not None:
+                    _logger.error(error)
+        if not ready:
+            raise Exception(
+                f"Deployment with name {self.name} didn't respond in given time!"
+            )
+        _logger.info(f"Deployment with name {self.name} ready")
+
+    def __create_in_k8s(self) -> None:
         deployment = self.__create_deployment()
         hpa = self.__create_horizontal_pod_autoscaler()
         service = self.__create_service()
-        v1.create_namespaced_deployment(
-            namespace=Constants.K8S_NAMESPACE_MODELS, body=deployment
+        K8sClient.apps().create_namespaced_deployment(
+            namespace=Constants.K8S_NAMESPACE_MODELS,
+            body=deployment,
+            _request_timeout=K8sClient.timeout(),
         )
-        time.sleep(5)
         args = {"name": self.name, "namespace": Constants.K8S_NAMESPACE_MODELS}
         deployment_pinger = Pinger(
-            Pinger.deployment_ping,
-            args,
+            self.name,
+            Constants.K8S_NAMESPACE_MODELS,
             Pinger.deployment_predicate,
             Pinger.deployment_error_callback,
             args,
-            Constants.K8S_PING_LIMIT,
+            Constants.K8S_READINESS_TIMEOUT,
         )
         if not deployment_pinger.ping():
             raise Exception(
                 f"Deployment with name {self.name} didn't respond in given time!"
             )
         _logger.info(f"Deployment with name {self.name} ready")
-        v1 = client.CoreV1Api()
-        v1.create_namespaced_service(
-            namespace=Constants.K8S_NAMESPACE_MODELS, body=service
+        K8sClient.core().create_namespaced_service(
+            namespace=Constants.K8S_NAMESPACE_MODELS,
+            body=service,
+            _request_timeout=K8sClient.timeout(),
         )
         _logger.info(f"Service with name {self.name} ready")
         if hpa is not None:
             _logger.info(f"Creating horizontal pod autoscaler for {self.name}...")
-            v2 = client.AutoscalingV2Api()
-            v2.create_namespaced_horizontal_pod_autoscaler(
-                namespace=Constants.K8S_NAMESPACE_MODELS, body=hpa
+            K8sClient.autoscaling().create_namespaced_horizontal_pod_autoscaler(
+                namespace=Constants.K8S_NAMESPACE_MODELS,
+                body=hpa,
+                _request_timeout=K8sClient.timeout(),
             )
             _logger.info(f"Creating horizontal pod autoscaler for {self.name} finished")
         else:
@@ -94,7 +191,7 @@ class ModelDeployment:
     def __create_deployment(self) -> client.V1Deployment:
         container = client.V1Container(
             name=self.name,
-            image=self.image_tag,
+            image=self.image,
             ports=[
                 client.V1ContainerPort(container_port=Constants.K8S_DEPLOYMENT_PORT)
             ],
@@ -207,59 +304,183 @@ class ModelDeployment:
         return metrics
 
     @classmethod
-    def delete(cls, name: str) -> None:
+    def delete(cls, name: str, wait: bool | None = None) -> None:
         """
-        Deletes deployment and service with a given name.
+        Deletes deployment, service and horizontal pod autoscaler with a given
+        name. See delete_many.
 
-        :raises: Any exception which may occur
         :param name: Name of the deployment and service
+        :param wait: Waits until the pods are terminated, K8S_TEARDOWN_WAIT
+        by default
+
+        :raises: Exception naming every resource which could not be deleted
         """
-        v1 = client.AppsV1Api()
-        try:
-            _logger.info(f"Deleteing deployment with name {name}...")
-            v1.delete_namespaced_deployment(
-                name=name, namespace=Constants.K8S_NAMESPACE_MODELS
-            )
-            _logger.info(f"Deleteing deployment with name {name} finished.")
-        except Exception as e:
-            _logger.error(
-                f"Deleteing deployment with name {name} failed with error: {e}"
-            )
-            raise e
+        error = cls.delete_many([name], wait)[name]
+        if error is not None:
+            raise Exception(error)
+
+    @classmethod
+    def delete_many(
+        cls, names: list[str], wait: bool | None = None
+    ) -> dict[str, str | None]:
+        """
+        Deletes deployments, services and horizontal pod autoscalers of several
+        models at once. All deletions run concurrently, so the teardown takes
+        as long as the slowest of them. Resources which do not exist count as
+        deleted and a failed deletion does not stop the others.
+
+        :param names: Names of the deployments and services
+        :param wait: Waits until the pods are terminated, K8S_TEARDOWN_WAIT
+        by default
+
+        :return: error of every name, None if its resources are deleted
+        """
+        if wait is None:
+            wait = settings.K8S_TEARDOWN_WAIT
+        options = client.V1DeleteOptions(
+            propagation_policy=settings.K8S_DELETE_PROPAGATION
+        )
+        deletions = {
+            "deployment": K8sClient.apps().delete_namespaced_deployment,
+            "service": K8sClient.core().delete_namespaced_service,
+            "horizontal pod autoscaler": (
+                K8sClient.autoscaling().delete_namespaced_horizontal_pod_autoscaler
+            ),
+        }
+        _logger.info(f"Deleting resources of {len(names)} models...")
+        with ThreadPoolExecutor(max_workers=settings.K8S_TEARDOWN_CONCURRENCY) as pool:
+            futures = {
+                (name, kind): pool.submit(cls.__delete_resource, func, name, options)
+                for name in names
+                for kind, func in deletions.items()
+            }
+        failures: dict[str, list[str]] = {name: [] for name in names}
+        for (name, kind), future in futures.items():
+            if future.exception() is not None:
+                _logger.error(
+                    f"Deleteing {kind} with name {name} failed with error: "
+                    f"{future.exception()}"
+                )
+                failures[name].append(f"{kind}: {future.exception()}")
 
-        v1 = client.CoreV1Api()
+        if wait:
+            deleted = [name for name in names if not failures[name]]
+            for name in cls.__wait_for_termination(deleted):
+                failures[name].append(
+                    f"pods not terminated in {settings.K8S_TEARDOWN_TIMEOUT_SECONDS}s"
+                )
+        _logger.info(f"Deleting resources of {len(names)} models finished")
+        return {
+            name: (f"Deleting {name} failed: {'; '.join(errors)}" if errors else None)
+            for name, errors in failures.items()
+        }
+
+    @staticmethod
+    def __delete_resource(
+        func: Callable, name: str, options: client.V1DeleteOptions
+    ) -> None:
         try:
-            _logger.info(f"Deleteing service with name {name}...")
-            v1.delete_namespaced_service(
-                name=name, namespace=Constants.K8S_NAMESPACE_MODELS
+            func(
+                name=name,
+                namespace=Constants.K8S_NAMESPACE_MODELS,
+                body=options,
+                _request_timeout=K8sClient.timeout(),
             )
-            _logger.info(f"Deleteing service with name {name} finished.")
-        except Exception as e:
-            _logger.error(f"Deleteing service with name {name} failed with error: {e}")
-            raise
+        except ApiException as e:
+            if e.status != 404:
+                raise e
+
+    @classmethod
+    def __wait_for_termination(cls, names: list[str]) -> set[str]:
+        """
+        Waits until no pod of the names is left, from the informer cache once
+        it is synced. Returns the names which still have pods at the timeout.
+        """
+        if not names:
+            return set()
+        deadline = time.monotonic() + settings.K8S_TEARDOWN_TIMEOUT_SECONDS
+        if informer.synced:
+            changed = threading.Event()
+
+            def listener(kind: str, event_type: str, obj) -> None:
+                if kind == "pod" and event_type == "DELETED":
+                    changed.set()
+
+            informer.add_listener(listener)
+            try:
+                while remaining := {
+                    name for name in names if informer.list_app("pod", name)
+                }:
+                    if not changed.wait(deadline - time.monotonic()):
+                        return remaining
+                    changed.clear()
+                return set()
+            finally:
+                informer.remove_listener(listener)
 
-        v2 = client.AutoscalingV2Api()
+        selector = f"app in ({','.join(names)})"
+        pods = K8sClient.core().list_namespaced_pod(
+            namespace=Constants.K8S_NAMESPACE_MODELS,
+            label_selector=selector,
+            _request_timeout=K8sClient.timeout(),
+        )
+        apps = {pod.metadata.name: pod.metadata.labels["app"] for pod in pods.items}
+        resource_version = pods.metadata.resource_version
+        stream_watch = watch.Watch()
+        while apps and (timeout := int(deadline - time.monotonic())) > 0:
+            for event in stream_watch.stream(
+                K8sClient.core().list_namespaced_pod,
+                namespace=Constants.K8S_NAMESPACE_MODELS,
+                label_selector=selector,
+                resource_version=resource_version,
+                timeout_seconds=timeout,
+            ):
+                if event["type"] == "DELETED":
+                    apps.pop(event["object"].metadata.name, None)
+                if not apps:
+                    stream_watch.stop()
+            resource_version = stream_watch.resource_version
+        return set(apps.values())
+
+    @classmethod
+    def rollout(cls, name: str) -> dict | None:
+        """
+        Returns the state of the resources of a model from the informer cache
+
+        :param name: Name of the deployment and service
+        :return: dict with the resources, replicas and pod phases of the model
+        or None if the cache is not synced yet
+        """
+        if not informer.synced:
+            return None
+        deployment = informer.get("deployment", name)
+        status = deployment.status if deployment is not None else None
+        return {
+            "deployment": deployment is not None,
+            "service": informer.get("service", name) is not None,
+            "autoscaler": informer.get("autoscaler", name) is not None,
+            "replicas": (deployment.spec.replicas or 0) if deployment else 0,
+            "ready_replicas": (status.ready_replicas or 0) if status else 0,
+            "pods": {
+                pod.metadata.name: pod.status.phase if pod.status else None
+                for pod in informer.list_app("pod", name)
+            },
+        }
+
+    @classmethod
+    def __autoscaler_exists(cls, name: str) -> bool:
+        """
+        Checks if a model has a horizontal pod autoscaler, in the informer
+        cache once it is synced
+        """
+        if informer.synced:
+            return informer.get("autoscaler", name) is not None
         try:
-            v2.read_namespaced_horizontal_pod_autoscaler(
-                name=name, namespace=Constants.K8S_NAMESPACE_MODELS
+            K8sClient.autoscaling().read_namespaced_horizontal_pod_autoscaler(
+                name=name,
+                namespace=Constants.K8S_NAMESPACE_MODELS,
+                _request_timeout=K8sClient.timeout(),
             )
         except Exception:
-            _logger.info(
-                f"Horizontal pod autoscaler with name {name} not found, "
-                "skipping deletion"
-            )
-            return
-        try:
-            _logger.info(f"Deleteing horizontal pod autoscaler with name {name}...")
-            v2.delete_namespaced_horizontal_pod_autoscaler(
-                name=name, namespace=Constants.K8S_NAMESPACE_MODELS
-            )
-            _logger.info(
-                f"Deleteing horizontal pod autoscaler with name {name} finished."
-            )
-        except Exception as e:
-            _logger.error(
-                f"Deleteing horizontal pod autoscaler with name {name} "
-                f"failed with error: {e}"
-            )
-            raise
+            return False
+        return True
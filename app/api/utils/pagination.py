@@ -0,0 +1,89 @@
+"""
+This module provides keyset pagination of list endpoints.
+
+A page is selected with ``WHERE id > :after_id ORDER BY id LIMIT :limit``,
+which uses the primary key index, so deep pages cost the same as the first
+one. Clients get the position of the next page as an opaque cursor.
+"""
+
+import base64
+import binascii
+import json
+
+from sqlalchemy import Select
+from sqlalchemy.orm import InstrumentedAttribute
+
+from utils.exception import InvalidCursor
+
+
+def encode_cursor(after_id: int) -> str:
+    """
+    Encodes the ID of the last returned row into an opaque cursor
+
+    :param after_id: ID of the last row of the page
+
+    :return: URL safe cursor string
+    """
+    data = json.dumps({"after_id": after_id}).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> int | None:
+    """
+    Decodes a cursor created by encode_cursor
+
+    :param cursor: cursor string or None
+
+    :raises InvalidCursor: if the cursor is malformed
+    :return: ID of the last row of the previous page, None if no cursor given
+    """
+    if cursor is None:
+        return None
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        after_id = json.loads(data)["after_id"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(cursor) from e
+    if not isinstance(after_id, int) or isinstance(after_id, bool):
+        raise InvalidCursor(cursor)
+    return after_id
+
+
+def next_cursor(items: list, limit: int) -> str | None:
+    """
+    Returns the cursor of the page following the given one
+
+    :param items: rows of the current page, ordered by ID
+    :param limit: the requested page size
+
+    :return: cursor of the next page or None if this is the last page
+    """
+    if not items or len(items) < limit:
+        return None
+    return encode_cursor(items[-1].id)
+
+
+def paginate(
+    statement: Select,
+    id_column: InstrumentedAttribute,
+    skip: int,
+    limit: int,
+    after_id: int | None,
+) -> Select:
+    """
+    Orders a select statement by ID and applies the requested page
+
+    :param statement: select statement of the listed rows
+    :param id_column: the primary key column the rows are ordered by
+    :param skip: number of rows to skip, ignored if after_id is given
+    :param limit: maximum number of rows
+    :param after_id: ID of the last row of the previous page
+
+    :return: the paginated select statement
+    """
+    statement = statement.order_by(id_column)
+    if after_id is not None:
+        statement = statement.where(id_column > after_id)
+    else:
+        statement = statement.offset(skip)
+    return statement.limit(limit)
@@ -0,0 +1,280 @@
+"""
+This module provides the client of the container registry.
+
+The docker client and its registry login are kept for the lifetime of the
+process, so pushes do not pay an authentication round trip each. Pushes run
+in the thread pool of the task executor, several images at once, and report
+their progress per layer.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import docker
+
+from config.config import settings
+from utils.constants import Constants
+from utils.events import EventBus
+from utils.exception import PushFailed
+
+
+_logger = logging.getLogger(__name__)
+
+
+class PushProgress:
+    """
+    Progress of a single image push, updated from the lines of the docker
+    push stream.
+    """
+
+    def __init__(self, image_name: str, image_tag: str) -> None:
+        self.image_name: str = image_name
+        self.image_tag: str = image_tag
+        self.status: str = "pushing"
+        self.layers: dict[str, dict] = {}
+        self.digest: str | None = None
+        self.error: str | None = None
+        self.started_at: float = time.time()
+        self.finished_at: float | None = None
+
+    def update(self, line: dict) -> None:
+        """
+        Records a line of the push stream
+
+        :param line: decoded line of the docker push stream
+        """
+        if "error" in line:
+            self.error = line["error"]
+        if "aux" in line and "Digest" in line["aux"]:
+            self.digest = line["aux"]["Digest"]
+        if "id" not in line or "status" not in line:
+            return
+        layer = self.layers.setdefault(
+            line["id"], {"status": None, "current": 0, "total": 0}
+        )
+        layer["status"] = line["status"]
+        detail = line.get("progressDetail") or {}
+        if "total" in detail:
+            layer["total"] = detail["total"]
+        if "current" in detail:
+            layer["current"] = detail["current"]
+        if line["status"] == "Pushed":
+            layer["current"] = layer["total"]
+
+    def finish(self, status: str) -> None:
+        """
+        Marks the push as finished and publishes its final state
+
+        :param status: final status, one of "pushed", "skipped" or "failed"
+        """
+        self.status = status
+        self.finished_at = time.time()
+        EventBus.publish(self.image_name, "push", **self.summary())
+
+    def summary(self) -> dict:
+        """
+        Returns the state of the push with byte counts and throughput
+
+        :return: dict with the status, layer and byte counts of the push
+        """
+        uploaded = [
+            layer
+            for layer in self.layers.values()
+            if layer["status"] != "Layer already exists"
+        ]
+        bytes_pushed = sum(layer["current"] for layer in uploaded)
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "image_tag": self.image_tag,
+            "status": self.status,
+            "layers": len(self.layers),
+            "layers_pushed": sum(
+                layer["status"] == "Pushed" for layer in self.layers.values()
+            ),
+            "layers_existing": len(self.layers) - len(uploaded),
+            "bytes_pushed": bytes_pushed,
+            "bytes_total": sum(layer["total"] for layer in uploaded),
+            "throughput_bps": bytes_pushed / elapsed if elapsed > 0 else 0.0,
+            "elapsed_seconds": elapsed,
+            "digest": self.digest,
+            "error": self.error,
+        }
+
+
+class RegistryClient:
+    """
+    Pushes and pulls images of the container registry with a shared,
+    authenticated docker client.
+
+    Example:
+    >>> digest = RegistryClient.push("tyro-model-test")
+    >>> RegistryClient.get_progress("tyro-model-test").summary()
+    """
+
+    _client: docker.DockerClient | None = None
+    _lock = threading.Lock()
+    _pushes: OrderedDict[str, PushProgress] = OrderedDict()
+
+    @classmethod
+    def client(cls) -> docker.DockerClient:
+        """
+        Returns the docker client, logged in to the registry on first use
+
+        :return: the authenticated docker client
+        """
+        with cls._lock:
+            if cls._client is None:
+                client = docker.from_env()
+                client.login(
+                    username="_json_key",
+                    password=Constants.GCP_CREDENTIALS,
+                    registry=Constants.GCP_CONTAINER_REGISTRY_URI,
+                )
+                cls._client = client
+            return cls._client
+
+    @classmethod
+    def reset(cls) -> None:
+        """
+        Drops the docker client, so the next use logs in again.
+        """
+        with cls._lock:
+            if cls._client is not None:
+                cls._client.close()
+                cls._client = None
+
+    @classmethod
+    def image_tag(cls, image_name: str) -> str:
+        """
+        Returns the registry tag of a local image
+
+        :param image_name: name of the local image
+        :return: the tag of the image in the registry
+        """
+        return f"{Constants.GCP_CONTAINER_REGISTRY_URI}/{image_name}"
+
+    @classmethod
+    def pull(cls, image_tag: str, digest: str) -> docker.models.images.Image:
+        """
+        Pulls an image of the registry by digest
+
+        :param image_tag: registry tag of the image
+        :param digest: digest of the image
+        :return: the pulled image
+        """
+        return cls.__with_login(
+            lambda: cls.client().images.pull(f"{image_tag}@{digest}")
+        )
+
+    @classmethod
+    def push(cls, image_name: str) -> str:
+        """
+        Pushes a local image to the registry. The upload is skipped if the
+        registry already holds the same image under its tag.
+
+        :param image_name: name of the local image
+        :raise PushFailed: if the registry rejects the image
+        :return: digest of the image in the registry
+        """
+        image_tag = cls.image_tag(image_name)
+        progress = PushProgress(image_name, image_tag)
+        cls.__track(progress)
+        try:
+            image = cls.client().images.get(image_name)
+            image.tag(image_tag)
+            digest = cls.__pushed_digest(image, image_tag)
+            if digest is not None:
+                _logger.info(f"{image_tag}@{digest} already exists, skipping push")
+                progress.digest = digest
+                progress.finish("skipped")
+                return digest
+
+            cls.__with_login(lambda: cls.__push_stream(image_tag, progress))
+            if progress.digest is None:
+                raise PushFailed(image_tag, "Registry did not return a digest")
+            progress.finish("pushed")
+            _logger.info(f"Pushed {image_tag}: {progress.summary()}")
+            return progress.digest
+        except Exception as e:
+            progress.error = progress.error or str(e)
+            progress.finish("failed")
+            raise e
+
+    @classmethod
+    def get_progress(cls, image_name: str) -> PushProgress | None:
+        """
+        Returns the progress of the latest push of an image in this process
+
+        :param image_name: name of the local image
+        :return: the push progress or None if the image was not pushed recently
+        """
+        return cls._pushes.get(image_name)
+
+    @classmethod
+    def __track(cls, progress: PushProgress) -> None:
+        with cls._lock:
+            cls._pushes.pop(progress.image_name, None)
+            cls._pushes[progress.image_name] = progress
+            while len(cls._pushes) > settings.REGISTRY_PUSH_HISTORY:
+                cls._pushes.popitem(last=False)
+
+    @classmethod
+    def __push_stream(cls, image_tag: str, progress: PushProgress) -> None:
+        progress.error = None
+        published = 0.0
+        for line in cls.client().images.push(
+            repository=image_tag, stream=True, decode=True
+        ):
+            _logger.debug(line)
+            progress.update(line)
+            if "error" in line:
+                raise PushFailed(image_tag, line["error"])
+            # Byte counts are reported many times a second, so they are
+            # throttled, while other changes of the layers are published
+            now = time.monotonic()
+            if (
+                line.get("status") != "Pushing"
+                or now - published >= settings.EVENT_PROGRESS_INTERVAL_SECONDS
+            ):
+                published = now
+                EventBus.publish(progress.image_name, "push", **progress.summary())
+
+    @classmethod
+    def __pushed_digest(
+        cls, image: docker.models.images.Image, image_tag: str
+    ) -> str | None:
+        local_digests = {
+            repo_digest.split("@")[1]
+            for repo_digest in image.attrs.get("RepoDigests", [])
+            if repo_digest.split("@")[0] == image_tag
+        }
+        if not local_digests:
+            return None
+        try:
+            remote_digest = cls.client().images.get_registry_data(image_tag).id
+        except docker.errors.APIError:
+            return None
+        return remote_digest if remote_digest in local_digests else None
+
+    @classmethod
+    def __with_login(cls, func):
+        try:
+            return func()
+        except (docker.errors.APIError, PushFailed) as e:
+            if not cls.__is_auth_error(e):
+                raise e
+            _logger.warning(f"Registry rejected the credentials, logging in again: {e}")
+            cls.reset()
+            return func()
+
+    @staticmethod
+    def __is_auth_error(error: Exception) -> bool:
+        if isinstance(error, docker.errors.APIError) and error.status_code in (
+            401,
+            403,
+        ):
+            return True
+        message = str(error).lower()
+        return "unauthorized" in message or "denied" in message
@@ -0,0 +1,176 @@
+"""
+This module compiles the topology of the gates into routing tables.
+
+A routing table is an immutable snapshot of the deployed production models of
+every gate and their weights, and of the staging models which receive copies
+of the requests, compiled from a single query. Writes to gates,
+pools and their models bump the version of the tables, and the next request
+compiles a new table which replaces the previous one as a whole. Requests
+therefore read a consistent table without locks and pick a model without
+touching the database.
+"""
+
+import asyncio
+import bisect
+import itertools
+import logging
+import random
+from types import MappingProxyType
+from typing import Awaitable, Callable, Iterable
+
+from db.notify import ORIGIN
+from models.pool import PoolModelMode
+
+
+_logger = logging.getLogger(__name__)
+
+# Gate name, mode, model name and weight, the model name is None for gates
+# without deployed models
+RouteRow = tuple[str, PoolModelMode | None, str | None, int | None]
+
+
+class GateRoutes:
+    """
+    Production models of a gate with their cumulative weights, picked by
+    bisection, and the staging models of the gate.
+    """
+
+    __slots__ = ("names", "cum_weights", "staging")
+
+    def __init__(
+        self, routes: list[tuple[str, int]], staging: tuple[str, ...] = ()
+    ) -> None:
+        """
+        :param routes: names and positive weights of the production models
+        :param staging: (optional) names of the staging models
+        """
+        names, weights = zip(*routes) if routes else ((), ())
+        self.names: tuple[str, ...] = tuple(names)
+        self.cum_weights: tuple[int, ...] = tuple(itertools.accumulate(weights))
+        self.staging: tuple[str, ...] = staging
+
+    def __bool__(self) -> bool:
+        return bool(self.names)
+
+    def pick(self) -> str:
+        """
+        Picks a model with a probability proportional to its weight
+
+        :return: name of the picked model
+        """
+        return self.names[
+            bisect.bisect(self.cum_weights, random.random() * self.cum_weights[-1])
+        ]
+
+
+class RoutingTable:
+    """
+    Immutable routes of all gates at a version of the topology.
+    """
+
+    __slots__ = ("version", "gates")
+
+    def __init__(self, version: int, gates: dict[str, GateRoutes]) -> None:
+        """
+        :param version: version of the topology the table was compiled from
+        :param gates: routes by gate name
+        """
+        self.version: int = version
+        self.gates: MappingProxyType[str, GateRoutes] = MappingProxyType(gates)
+
+    @classmethod
+    def compile(cls, version: int, rows: Iterable[RouteRow]) -> "RoutingTable":
+        """
+        Compiles a routing table
+
+        :param version: version of the topology
+        :param rows: the routes of the models of the gates
+        :return: the routing table
+        """
+        routes: dict[str, list[tuple[str, int]]] = {}
+        staging: dict[str, list[str]] = {}
+        for gate_name, mode, model_name, weight in rows:
+            gate_routes = routes.setdefault(gate_name, [])
+            if model_name is None:
+                continue
+            if mode == PoolModelMode.STAGING:
+                staging.setdefault(gate_name, []).append(model_name)
+            else:
+                gate_routes.append((model_name, weight))
+        return cls(
+            version,
+            {
+                name: GateRoutes(r, tuple(staging.get(name, ())))
+                for name, r in routes.items()
+            },
+        )
+
+    def get(self, gate_name: str) -> GateRoutes | None:
+        """
+        Returns the routes of a gate
+
+        :param gate_name: name of the gate
+        :return: the routes, empty if the gate has no deployed models, or None
+        if the gate does not exist
+        """
+        return self.gates.get(gate_name)
+
+
+class RoutingTables:
+    """
+    Holds the current routing table and compiles a new one after changes of
+    the topology.
+
+    Example:
+    >>> table = await routing_tables.get(lambda: GateService.get_routes(db=db))
+    >>> table.get("gate").pick()
+    >>> routing_tables.invalidate()
+    """
+
+    def __init__(self) -> None:
+        self.version: int = 0
+        self.table: RoutingTable | None = None
+        self.lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        """
+        Marks the current table as outdated, call it after the change is
+        committed.
+        """
+        self.version += 1
+
+    def handle_notification(self, payload: dict) -> None:
+        """
+        Invalidates the table after a change of another replica.
+
+        :param payload: the notification
+        """
+        if payload.get("origin") != ORIGIN:
+            self.invalidate()
+
+    async def get(
+        self,
+        load: Callable[[], Awaitable[Iterable[RouteRow]]],
+    ) -> RoutingTable:
+        """
+        Returns the current routing table, compiling it if it is outdated
+
+        :param load: coroutine function returning the rows of the topology
+        :return: the routing table
+        """
+        table = self.table
+        if table is not None and table.version == self.version:
+            return table
+        async with self.lock:
+            if self.table is None or self.table.version != self.version:
+                # Changes during the load make the table outdated right away
+                version = self.version
+                self.table = RoutingTable.compile(version, await load())
+                _logger.info(
+                    f"Routing table {version} compiled with "
+                    f"{len(self.table.gates)} gates"
+                )
+            return self.table
+
+
+routing_tables = RoutingTables()
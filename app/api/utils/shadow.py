@@ -0,0 +1,240 @@
+"""
+This module mirrors the inference requests of the gates to their staging
+models.
+
+A sampled request is copied to every staging model of its gate once the
+production model has answered. The copies wait in a bounded queue and are sent
+by background workers over their own connections, so mirroring neither delays
+the production response nor competes for its connections. Copies which do not
+fit into the queue are dropped.
+
+The latency and the response of every staging model are compared with those
+of the production model and recorded per staging model. The records are kept
+in memory by every replica separately.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime
+
+import httpx
+
+from config.config import settings
+from utils.inference_proxy import InferenceProxy
+
+
+_logger = logging.getLogger(__name__)
+
+# Bytes of the bodies kept in the records of differing responses
+DIFF_BODY_LIMIT = 1024
+
+
+class ShadowStats:
+    """
+    Mirrored requests of a staging model.
+    """
+
+    def __init__(self) -> None:
+        self.mirrored: int = 0
+        self.dropped: int = 0
+        self.failed: int = 0
+        self.mismatched: int = 0
+        self.latency_seconds: float = 0.0
+        self.production_latency_seconds: float = 0.0
+        self.diffs: deque[dict] = deque(maxlen=settings.SHADOW_DIFF_HISTORY)
+
+    def as_dict(self) -> dict:
+        """
+        Returns the counters, the mean latencies and the recent differences
+
+        :return: the statistics
+        """
+        answered = self.mirrored - self.failed
+        return {
+            "mirrored": self.mirrored,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "mismatched": self.mismatched,
+            "latency_ms": (
+                self.latency_seconds * 1000 / answered if answered else None
+            ),
+            "production_latency_ms": (
+                self.production_latency_seconds * 1000 / answered if answered else None
+            ),
+            "diffs": list(self.diffs),
+        }
+
+
+class ShadowMirror:
+    """
+    Copies sampled requests to staging models in the background.
+
+    Example:
+    >>> shadow_mirror.start()
+    >>> if shadow_mirror.sample():
+    >>>     shadow_mirror.mirror(staging, model_name, body, headers, response, latency)
+    >>> shadow_mirror.stats("model")
+    >>> await shadow_mirror.stop()
+    """
+
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue | None = None
+        self.client: httpx.AsyncClient | None = None
+        self.tasks: list[asyncio.Task] = []
+        self.models: dict[str, ShadowStats] = {}
+
+    def start(self) -> None:
+        """
+        Starts the workers, if a fraction of the requests is mirrored.
+        """
+        if self.queue is not None or settings.SHADOW_FRACTION <= 0:
+            return
+        self.queue = asyncio.Queue(maxsize=settings.SHADOW_QUEUE_SIZE)
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=settings.SHADOW_WORKERS),
+            timeout=settings.SHADOW_TIMEOUT_SECONDS,
+        )
+        self.tasks = [
+            asyncio.create_task(self.__run()) for _ in range(settings.SHADOW_WORKERS)
+        ]
+        _logger.info(
+            f"Mirroring {settings.SHADOW_FRACTION:.1%} of the requests "
+            "to staging models"
+        )
+
+    async def stop(self) -> None:
+        """
+        Stops the workers, dropping the queued copies, and closes the
+        connections.
+        """
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.queue = None
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def sample(self) -> bool:
+        """
+        Decides whether a request is mirrored
+
+        :return: True for the configured fraction of the requests
+        """
+        return self.queue is not None and random.random() < settings.SHADOW_FRACTION
+
+    def mirror(
+        self,
+        model_names: tuple[str, ...],
+        production_model: str,
+        body: bytes,
+        headers: dict[str, str],
+        response: httpx.Response,
+        latency: float,
+    ) -> None:
+        """
+        Queues copies of a request answered by a production model, without
+        waiting
+
+        :param model_names: names of the staging models
+        :param production_model: name of the production model
+        :param body: body of the request
+        :param headers: headers of the request
+        :param response: response of the production model
+        :param latency: latency of the production model in seconds
+        """
+        for model_name in model_names:
+            try:
+                self.queue.put_nowait(
+                    (model_name, production_model, body, headers, response, latency)
+                )
+            except asyncio.QueueFull:
+                self.__stats(model_name).dropped += 1
+
+    def stats(self, model_name: str) -> dict:
+        """
+        Returns the statistics of the mirrored requests of a staging model
+
+        :param model_name: name of the model
+        :return: the statistics, see ShadowStats.as_dict
+        """
+        return self.models.get(model_name, ShadowStats()).as_dict()
+
+    def __stats(self, model_name: str) -> ShadowStats:
+        stats = self.models.get(model_name)
+        if stats is None:
+            stats = self.models[model_name] = ShadowStats()
+        return stats
+
+    async def __run(self) -> None:
+        while True:
+            item = await self.queue.get()
+            try:
+                await self.__send(*item)
+            except Exception as e:
+                _logger.error(f"Mirroring a request failed with error: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def __send(
+        self,
+        model_name: str,
+        production_model: str,
+        body: bytes,
+        headers: dict[str, str],
+        production: httpx.Response,
+        production_latency: float,
+    ) -> None:
+        stats = self.__stats(model_name)
+        stats.mirrored += 1
+        start = time.perf_counter()
+        try:
+            response = await InferenceProxy.forward(
+                model_name, body, headers, client=self.client
+            )
+        except httpx.HTTPError as e:
+            stats.failed += 1
+            _logger.info(f"Mirroring to staging model {model_name} failed: {e!r}")
+            return
+        latency = time.perf_counter() - start
+        stats.latency_seconds += latency
+        stats.production_latency_seconds += production_latency
+        if response.status_code == production.status_code and self.__same(
+            response.content, production.content
+        ):
+            return
+        stats.mismatched += 1
+        stats.diffs.append(
+            {
+                "time": datetime.utcnow(),
+                "production_model": production_model,
+                "status_code": response.status_code,
+                "production_status_code": production.status_code,
+                "body": self.__excerpt(response.content),
+                "production_body": self.__excerpt(production.content),
+                "latency_ms": latency * 1000,
+                "production_latency_ms": production_latency * 1000,
+            }
+        )
+
+    @staticmethod
+    def __same(content: bytes, production_content: bytes) -> bool:
+        if content == production_content:
+            return True
+        # JSON documents differing only in formatting or key order are equal
+        try:
+            return json.loads(content) == json.loads(production_content)
+        except ValueError:
+            return False
+
+    @staticmethod
+    def __excerpt(content: bytes) -> str:
+        return content[:DIFF_BODY_LIMIT].decode(errors="replace")
+
+
+shadow_mirror = ShadowMirror()
@@ -0,0 +1,103 @@
+"""
+This module provides warm-up tasks which prepare the service in the background.
+
+The application starts serving right away. Readiness is reported separately,
+once the warm-up tasks it depends on are finished.
+"""
+
+import asyncio
+import enum
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable
+
+
+_logger = logging.getLogger(__name__)
+
+
+class WarmupStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class Warmup:
+    """
+    Runs a coroutine once in the background and keeps its outcome.
+
+    Example:
+    >>> warmup = Warmup("database")
+    >>> warmup.start(migrate_db)
+    >>> warmup.ready
+    False
+    """
+
+    def __init__(self, name: str) -> None:
+        """
+        :param name: name of the warm-up task
+        """
+        self.name: str = name
+        self.status: WarmupStatus = WarmupStatus.PENDING
+        self.error: str | None = None
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+        self.task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == WarmupStatus.READY
+
+    @property
+    def failed(self) -> bool:
+        return self.status == WarmupStatus.FAILED
+
+    def start(self, func: Callable[[], Awaitable]) -> None:
+        """
+        Starts the warm-up task on the running event loop.
+
+        :param func: coroutine function doing the warm-up
+        """
+        self.task = asyncio.create_task(self.__run(func))
+
+    async def stop(self) -> None:
+        """
+        Cancels the warm-up task if it is still running.
+        """
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+    def summary(self) -> dict:
+        """
+        Returns the state of the warm-up task
+
+        :return: dict with the name, status, error and timestamps
+        """
+        return {
+            "name": self.name,
+            "status": self.status,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    async def __run(self, func: Callable[[], Awaitable]) -> None:
+        _logger.info(f"Starting {self.name} warm-up...")
+        self.status = WarmupStatus.RUNNING
+        self.started_at = datetime.utcnow()
+        try:
+            await func()
+        except Exception as e:
+            self.status = WarmupStatus.FAILED
+            self.error = str(e)
+            _logger.error(f"Warm-up {self.name} failed with error: {e}")
+        else:
+            self.status = WarmupStatus.READY
+            _logger.info(f"Warm-up {self.name} finished")
+        finally:
+            self.finished_at = datetime.utcnow()
+
+
+database_warmup = Warmup("database")
+base_image_warmup = Warmup("base_image")